@@ -6,6 +6,8 @@ from PyQt5.QtCore import Qt, QPoint, QRect
 from PyQt5.QtGui import QGuiApplication, QCursor, QColor, QPixmap, QImage, QPainter
 from PyQt5.QtWidgets import QWidget, QLabel, QVBoxLayout
 
+from macro_capture import get_default_backend
+
 class _SystemCursor:
     _hidden = False
     @classmethod
@@ -31,8 +33,16 @@ class _SystemCursor:
         if current_count >=0 : cls._hidden = False
 
 class Magnifier(QWidget):
-    def __init__(self, zoom: int = 10, sample_size: int = 31, parent=None):
+    """커서 주변 확대 미리보기. 격자/십자선은 미리 그려 둔 투명 오버레이 픽스맵 한 장으로 덮고,
+    커서 위치와 캡처한 픽셀이 직전 프레임과 같으면 확대/그리기/창 이동을 모두 건너뜀
+    refresh_interval_ms()는 커서가 움직이는 동안은 짧게, 멈춰 있으면 점점 길게 다음 갱신 간격을 알려 줌"""
+    FAST_INTERVAL_MS = 16  # 커서가 움직이는 동안의 갱신 간격
+    IDLE_INTERVAL_MS = 120 # 커서가 멈춰 있을 때의 최대 갱신 간격 (화면 내용 변화는 이 간격으로 반영)
+    IDLE_BACKOFF = 1.5     # 멈춰 있는 프레임마다 간격 증가 배율
+
+    def __init__(self, zoom: int = 10, sample_size: int = 31, parent=None, capture_backend=None):
         super().__init__(parent, Qt.ToolTip | Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
+        self.capture_backend = capture_backend if capture_backend is not None else get_default_backend(gui_thread=True)
         self.zoom = zoom
         self.sample_size = sample_size 
         if self.sample_size % 2 == 0: self.sample_size +=1 # 홀수로 보정하여 중앙 픽셀 명확화
@@ -61,68 +71,93 @@ class Magnifier(QWidget):
         
         self.current_center_color = QColor(0,0,0) # 현재 캡처된 중앙 픽셀 색상 저장
         self.current_cursor_pos = QPoint(0,0) # 현재 캡처된 커서 위치 저장 (돋보기 기준점)
+        self._overlay = self._build_overlay() # 격자 + 십자선 (크기/배율이 같으면 매 프레임 재사용)
+        self._last_image = None      # 직전에 그린 캡처 이미지 (같으면 다시 그리지 않음)
+        self._last_pos = None        # 직전에 그린 커서 위치
+        self._shown_color = None     # 색상 라벨에 표시 중인 색 (바뀔 때만 글자를 다시 설정)
+        self._screen_geoms = None    # 창 위치 계산에 쓴 화면의 (전체 영역, 사용 가능 영역). 커서가 그 화면 안에 있으면 screenAt 생략
+        self._interval_ms = self.FAST_INTERVAL_MS
+        self.drawn_frames = 0; self.skipped_frames = 0 # 다시 그린 / 변화가 없어 건너뛴 프레임 수
+
+    def _build_overlay(self):
+        # 확대 이미지 위에 덮을 투명 픽스맵에 격자와 십자선을 한 번만 그려 둠
+        width, height = self.img_label.width(), self.img_label.height()
+        overlay = QPixmap(width, height); overlay.fill(Qt.transparent)
+        painter = QPainter(overlay)
+        painter.setPen(QColor(0, 0, 0, 70)); grid_zoom = self.zoom # 그리드 색상 및 줌 배율
+        for i in range(self.sample_size + 1): # 그리드 선 그리기
+            pos = i * grid_zoom
+            painter.drawLine(pos, 0, pos, height) # 수직선
+            painter.drawLine(0, pos, width, pos) # 수평선
+        
+        painter.setPen(QColor(255, 0, 0, 200)); cross_len = max(3, self.zoom // 2 -1) # 십자선 길이
+        cx, cy = width // 2, height // 2 # 확대된 이미지의 중앙
+        
+        # 십자선이 중앙 픽셀을 정확히 가리키도록 (중앙 픽셀을 비워둠)
+        painter.drawLine(cx - cross_len, cy, cx - 1, cy) # 왼쪽
+        painter.drawLine(cx + 1, cy, cx + cross_len, cy) # 오른쪽
+        painter.drawLine(cx, cy - cross_len, cx, cy - 1) # 위쪽
+        painter.drawLine(cx, cy + 1, cx, cy + cross_len) # 아래쪽
+        painter.end()
+        return overlay
 
     def update_preview(self, gpos: QPoint): # gpos는 전역 (가상 데스크톱) 좌표
+        """커서 위치의 확대 미리보기 갱신. 다시 그렸으면 True, 변화가 없거나 캡처에 실패했으면 False"""
+        moved = gpos != self._last_pos
+        self._interval_ms = self.FAST_INTERVAL_MS if moved else min(self.IDLE_INTERVAL_MS, int(self._interval_ms * self.IDLE_BACKOFF))
         self.current_cursor_pos = gpos # 현재 커서 위치 업데이트 (get_current_color_info 위함)
-        screen = QGuiApplication.screenAt(gpos) # 커서 위치의 화면 객체 가져오기
-        if not screen: screen = QGuiApplication.primaryScreen() # 없으면 주 화면 사용
+        if self.capture_backend is None: return False
 
         # 캡처할 영역의 좌상단 좌표 계산
         x0 = gpos.x() - self._half_sample
         y0 = gpos.y() - self._half_sample
         
         try:
-            # 화면의 지정된 영역 캡처 (WId=0은 전체 데스크톱 의미)
-            pixmap = screen.grabWindow(0, int(x0), int(y0), self.sample_size, self.sample_size)
-        except Exception: return # 캡처 실패 시 중단
+            # 공용 캡처 백엔드로 지정된 영역 캡처
+            frame = self.capture_backend.grab((int(x0), int(y0), int(x0) + self.sample_size, int(y0) + self.sample_size))
+            img = frame.to_qimage()
+        except Exception: return False # 캡처 실패 시 중단
 
-        # QPixmap을 QImage로 변환 (픽셀 접근 및 색상 형식 일관성 위함)
-        img = pixmap.toImage().convertToFormat(QImage.Format_RGB888)
         # 유효하지 않은 이미지거나, 중앙 픽셀 좌표가 이미지 범위를 벗어나면 중단
-        if img.isNull() or not img.valid(self._half_sample, self._half_sample): return
+        if img.isNull() or not img.valid(self._half_sample, self._half_sample): return False
+        if not moved and img == self._last_image: self.skipped_frames += 1; return False # 커서도 화면도 그대로
+        self._last_pos = QPoint(gpos); self._last_image = img; self.drawn_frames += 1
 
-        self.current_center_color = QColor(img.pixel(self._half_sample, self._half_sample))
-        r, g, b = self.current_center_color.red(), self.current_center_color.green(), self.current_center_color.blue()
+        r, g, b = frame.pixel(self._half_sample, self._half_sample)
+        color = QColor(r, g, b)
 
-        # QImage를 QPixmap으로 변환 후 확대 (Nearest Neighbor 효과)
-        pm_scaled = QPixmap.fromImage(img).scaled(
-            self.img_label.width(), self.img_label.height(), 
-            Qt.IgnoreAspectRatio, Qt.FastTransformation # 픽셀아트처럼 보이도록 FastTransformation 사용
-        )
-        
-        # QPainter를 사용하여 확대된 QPixmap에 그리드 및 십자선 그리기
+        # 캡처 이미지를 라벨 크기로 늘려 그리고 (부드럽게 하지 않아 픽셀아트처럼 보임. RGB32가 가장 빠름) 미리 그려 둔 격자/십자선을 덮음
+        if img.format() != QImage.Format_RGB32: img = img.convertToFormat(QImage.Format_RGB32)
+        pm_scaled = QPixmap(self.img_label.size())
         painter = QPainter(pm_scaled)
-        painter.setPen(QColor(0, 0, 0, 70)); grid_zoom = self.zoom # 그리드 색상 및 줌 배율
-        for i in range(self.sample_size + 1): # 그리드 선 그리기
-            pos = i * grid_zoom
-            painter.drawLine(pos, 0, pos, pm_scaled.height()) # 수직선
-            painter.drawLine(0, pos, pm_scaled.width(), pos) # 수평선
-        
-        painter.setPen(QColor(255, 0, 0, 200)); cross_len = max(3, self.zoom // 2 -1) # 십자선 길이
-        cx, cy = pm_scaled.width() // 2, pm_scaled.height() // 2 # 확대된 이미지의 중앙
-        
-        # 십자선이 중앙 픽셀을 정확히 가리키도록 (중앙 픽셀을 비워둠)
-        painter.drawLine(cx - cross_len, cy, cx - 1, cy) # 왼쪽
-        painter.drawLine(cx + 1, cy, cx + cross_len, cy) # 오른쪽
-        painter.drawLine(cx, cy - cross_len, cx, cy - 1) # 위쪽
-        painter.drawLine(cx, cy + 1, cx, cy + cross_len) # 아래쪽
+        painter.drawImage(pm_scaled.rect(), img); painter.drawPixmap(0, 0, self._overlay)
         painter.end()
 
         self.img_label.setPixmap(pm_scaled) # 최종 이미지 라벨에 설정
-        self.hex_label.setText(f"#{r:02X}{g:02X}{b:02X}") # HEX 코드 업데이트
-        self.rgb_label.setText(f"({r},{g},{b})") # RGB 값 업데이트
+        if color != self._shown_color:
+            self.hex_label.setText(f"#{r:02X}{g:02X}{b:02X}") # HEX 코드 업데이트
+            self.rgb_label.setText(f"({r},{g},{b})") # RGB 값 업데이트
+            self._shown_color = color
+        self.current_center_color = color
         
-        self._move_smart(gpos) # 돋보기 창 위치 조정
+        if moved: self._move_smart(gpos) # 돋보기 창 위치 조정
+        return True
+
+    def refresh_interval_ms(self):
+        """다음 update_preview까지 기다릴 간격 (커서가 움직이면 FAST_INTERVAL_MS, 멈춰 있으면 IDLE_INTERVAL_MS까지 늘어남)"""
+        return self._interval_ms
 
-    def _move_smart(self, global_cursor_pos: QPoint): # 이전과 동일 (화면 벗어나지 않게 위치 조정)
+    def _move_smart(self, global_cursor_pos: QPoint): # 화면 벗어나지 않게 위치 조정 (같은 화면 안에서는 화면을 다시 찾지 않음)
         offset = QPoint(20, 20)
-        screen = QGuiApplication.screenAt(global_cursor_pos) or QGuiApplication.primaryScreen()
-        screen_geom = screen.availableGeometry()
+        if self._screen_geoms is None or not self._screen_geoms[0].contains(global_cursor_pos):
+            screen = QGuiApplication.screenAt(global_cursor_pos) or QGuiApplication.primaryScreen()
+            self._screen_geoms = (screen.geometry(), screen.availableGeometry())
+        screen_geom = self._screen_geoms[1]
         target_pos = global_cursor_pos + offset
         if target_pos.x() + self.width() > screen_geom.right(): target_pos.setX(global_cursor_pos.x() - self.width() - offset.x())
         if target_pos.y() + self.height() > screen_geom.bottom(): target_pos.setY(global_cursor_pos.y() - self.height() - offset.y())
         target_pos.setX(max(target_pos.x(), screen_geom.left())); target_pos.setY(max(target_pos.y(), screen_geom.top()))
-        self.move(target_pos)
+        if target_pos != self.pos(): self.move(target_pos)
 
     def get_current_color_info(self) -> (QPoint, QColor):
         """돋보기가 마지막으로 업데이트한 커서 위치와 중앙 색상을 반환"""
@@ -2,32 +2,44 @@
 import sys
 import platform 
 import ctypes
-from PyQt5.QtWidgets import (QApplication, QComboBox, QDialog, QFormLayout, QHBoxLayout, QLabel,
+from PyQt5.QtWidgets import (QApplication, QComboBox, QDialog, QDoubleSpinBox, QFormLayout, QHBoxLayout, QLabel,
                              QLineEdit, QMessageBox, QPushButton, QSpinBox, QVBoxLayout, QWidget)
 from PyQt5.QtCore import pyqtSignal, Qt, QPoint, QRect, QTimer
 from PyQt5.QtGui import (QGuiApplication, QCursor, QColor, QPixmap, QImage, QPainter, QMouseEvent, QKeyEvent)
 
 # Listener 스레드들을 import
 from macro_input_listeners import MouseCoordListenerThread, KeyboardKeyListenerThread
-# eyedropper.py 에서 Magnifier 등을 가져오도록 수정
-from eyedropper import _SystemCursor, Magnifier, Overlay
-
+from macro_color_search import (TOLERANCE_MODE_CHANNEL, MAX_TARGET_COLORS,
+                                SEARCH_ORDER_SCAN, SEARCH_ORDER_NEAREST)
+from macro_capture import get_default_backend
+import macro_templates
+from macro_actions import (action_from_dict, as_action, LOOP_MODE_COUNT, LOOP_MODE_LABELS, BUTTON_LABELS, TOLERANCE_MODE_LABELS, WAIT_UNTIL_LABELS,
+                           ON_TIMEOUT_LABELS, IF_CONDITION_LABELS)
+from macro_mouse_path import PATH_LINEAR, PATH_RECORDED, PATH_KIND_LABELS, DEFAULT_PATH_DURATION_MS, DEFAULT_PATH_RATE_HZ, MAX_PATH_RATE_HZ, validate_path
+
+COLOR_ACTION_TYPES = ("색 찾기 후 클릭", "색 대기") # 색상 캡처/검색 범위/일치 조건 위젯을 공유하는 액션 유형
+MOUSE_PATH_ACTION_TYPES = ("마우스 경로 이동", "마우스 드래그") # 경로 위젯을 공유하는 액션 유형 (드래그는 버튼 추가)
+CONTROL_ACTION_TYPES = ("반복 시작", "반복 끝", "조건 시작", "아니면", "조건 끝", "라벨", "라벨로 이동") # 흐름 제어 (실행기가 직접 해석)
 
 class ActionInputDialog(QDialog):
-    def __init__(self, main_app_status_update_func, pynput_mouse_module, pynput_keyboard_module, parent=None, action_to_edit=None):
+    def __init__(self, main_app_status_update_func, pynput_mouse_module, pynput_keyboard_module, parent=None, action_to_edit=None,
+                 config_file="macro_config.json"):
         super().__init__(parent)
+        self.config_file = config_file # 템플릿 이미지 저장 위치 기준
         self.pynput_mouse_module = pynput_mouse_module
         self.pynput_keyboard_module = pynput_keyboard_module
         self.main_app_status_update_func = main_app_status_update_func
         self.action_data = None
         self.coord_capture_listener_thread = None # 일반 좌표 및 검색 범위용
         self.key_listener_thread = None
-        self.magnifier_widget: Magnifier | None = None
+        self.magnifier_widget = None # eyedropper.Magnifier (돋보기를 처음 열 때 생성)
         self.magnifier_update_timer: QTimer | None = None
-        self.overlay_widget_magnifier: Overlay | None = None
+        self.overlay_widget_magnifier = None # eyedropper.Overlay
         self.is_magnifier_capture_active = False
         self._search_area_capture_stage = 0
         self._search_area_p1: QPoint | None = None
+        self._area_capture_purpose = "search" # 두 번 클릭 영역 지정의 용도: "search"(검색 범위) / "template"(템플릿 이미지)
+        self._temp_template_path = None
 
         self.setWindowTitle("액션 편집" if action_to_edit else "새 액션 추가")
         self.setMinimumWidth(450)
@@ -44,7 +56,8 @@ class ActionInputDialog(QDialog):
         # *** 사용자 지정 액션 이름 필드 끝 ***
 
         self.action_type_combo = QComboBox()
-        self.action_type_combo.addItems(["마우스 클릭", "키보드 입력", "딜레이", "색 찾기 후 클릭"])
+        self.action_type_combo.addItems(["마우스 클릭", "키보드 입력", "딜레이", "색 찾기 후 클릭", "색 대기", "이미지 찾기 후 클릭", *MOUSE_PATH_ACTION_TYPES,
+                                         *CONTROL_ACTION_TYPES])
         self.layout.addWidget(QLabel("액션 유형:"))
         self.layout.addWidget(self.action_type_combo)
         
@@ -53,7 +66,7 @@ class ActionInputDialog(QDialog):
 
         self.mouse_x_input = QSpinBox(); self.mouse_x_input.setRange(-99999, 99999)
         self.mouse_y_input = QSpinBox(); self.mouse_y_input.setRange(-99999, 99999)
-        self.mouse_button_combo = QComboBox(); self.mouse_button_combo.addItems(["왼쪽 버튼", "오른쪽 버튼", "가운데 버튼"])
+        self.mouse_button_combo = QComboBox(); self.mouse_button_combo.addItems(list(BUTTON_LABELS.values()))
         self.capture_coords_button = QPushButton("마우스 좌표 캡처")
         
         self.captured_key_display = QLineEdit(); self.captured_key_display.setReadOnly(True); self.captured_key_display.setPlaceholderText("아래 버튼을 눌러 키를 캡처하세요.")
@@ -71,14 +84,49 @@ class ActionInputDialog(QDialog):
         self.search_x2_input = QSpinBox(); self.search_x2_input.setRange(-99999, 99999); self.search_x2_input.setToolTip("검색 끝 X (X1과 다를 수 있음)")
         self.search_y2_input = QSpinBox(); self.search_y2_input.setRange(-99999, 99999); self.search_y2_input.setToolTip("검색 끝 Y (Y1과 다를 수 있음)")
         self.define_search_area_button = QPushButton("검색 범위 마우스 지정")
+        self.color_tolerance_input = QSpinBox(); self.color_tolerance_input.setRange(0, 441); self.color_tolerance_input.setValue(0)
+        self.color_tolerance_input.setToolTip("0이면 정확히 일치하는 색상만 찾음")
+        self.tolerance_mode_combo = QComboBox(); self.tolerance_mode_combo.addItems(list(TOLERANCE_MODE_LABELS.values()))
+        self.extra_colors_input = QLineEdit(); self.extra_colors_input.setPlaceholderText("예: 255,0,0; 0,128,255 (선택 사항)")
+        self.add_captured_color_button = QPushButton("캡처한 색상을 추가 색상에 넣기")
+        self.search_order_combo = QComboBox(); self.search_order_combo.addItems(["초기 위치에서 가까운 순", "좌상단부터 (열 우선)"])
+        self.search_order_combo.setToolTip("가까운 순: 색상을 캡처한 위치 주변부터 넓혀가며 검색 (대상이 그대로면 매우 빠름)")
+        self.wait_condition_combo = QComboBox(); self.wait_condition_combo.addItems(list(WAIT_UNTIL_LABELS.values()))
+        self.wait_timeout_input = QSpinBox(); self.wait_timeout_input.setRange(100, 3600000); self.wait_timeout_input.setSuffix(" ms")
+        self.wait_timeout_input.setValue(10000); self.wait_timeout_input.setSingleStep(500)
+        self.wait_on_timeout_combo = QComboBox(); self.wait_on_timeout_combo.addItems(list(ON_TIMEOUT_LABELS.values()))
+        self.capture_template_button = QPushButton("템플릿 영역 마우스 지정 (두 번 클릭)")
+        self.template_display = QLabel("템플릿: 없음")
+        self.template_preview = QLabel(); self.template_preview.setFixedHeight(80); self.template_preview.setAlignment(Qt.AlignCenter)
+        self.match_threshold_input = QDoubleSpinBox(); self.match_threshold_input.setRange(0.5, 1.0); self.match_threshold_input.setSingleStep(0.01)
+        self.match_threshold_input.setDecimals(2); self.match_threshold_input.setValue(macro_templates.DEFAULT_MATCH_THRESHOLD)
+        self.loop_mode_combo = QComboBox(); self.loop_mode_combo.addItems(list(LOOP_MODE_LABELS.values()))
+        self.loop_count_input = QSpinBox(); self.loop_count_input.setRange(0, 1000000); self.loop_count_input.setValue(10); self.loop_count_input.setSuffix(" 회")
+        self.loop_max_iterations_input = QSpinBox(); self.loop_max_iterations_input.setRange(0, 10000000); self.loop_max_iterations_input.setSpecialValueText("제한 없음")
+        self.loop_max_iterations_input.setToolTip("색 조건이 끝내 충족되지 않을 때 반복을 끝낼 횟수 (0 = 제한 없음)")
+        self.if_condition_combo = QComboBox(); self.if_condition_combo.addItems(list(IF_CONDITION_LABELS.values()))
+        self.label_input = QLineEdit(); self.label_input.setPlaceholderText("예: 시작")
+        self.path_kind_combo = QComboBox(); self.path_kind_combo.addItems(list(PATH_KIND_LABELS.values()))
+        self.path_points_input = QLineEdit(); self.path_points_input.setPlaceholderText("예: 100,200; 400,260 (첫 점 -> 끝 점. 베지어는 사이에 제어점)")
+        self.path_capture_button = QPushButton("마우스 좌표 캡처해 경로에 추가")
+        self.path_duration_input = QSpinBox(); self.path_duration_input.setRange(0, 600000); self.path_duration_input.setSuffix(" ms")
+        self.path_duration_input.setValue(DEFAULT_PATH_DURATION_MS); self.path_duration_input.setSingleStep(100)
+        self.path_rate_input = QSpinBox(); self.path_rate_input.setRange(1, MAX_PATH_RATE_HZ); self.path_rate_input.setSuffix(" Hz")
+        self.path_rate_input.setValue(DEFAULT_PATH_RATE_HZ); self.path_rate_input.setToolTip("초당 커서를 옮기는 횟수")
+        self._temp_recorded_points = None # 녹화된 경로의 (x, y, ms) 표본 (매크로 녹화로 만든 액션을 편집할 때만 있음)
         self._temp_captured_color_rgb = None
         self._temp_captured_initial_xy = None
 
         self.action_type_combo.currentIndexChanged.connect(self.update_ui_for_action_type)
+        self.loop_mode_combo.currentIndexChanged.connect(self.update_ui_for_action_type)
+        self.path_kind_combo.currentIndexChanged.connect(self.update_ui_for_action_type)
         self.capture_coords_button.clicked.connect(self.start_generic_coords_capture)
+        self.path_capture_button.clicked.connect(self.start_generic_coords_capture)
         self.capture_key_button.clicked.connect(self.start_key_capture_mode)
         self.color_capture_button.clicked.connect(self.start_color_capture_with_magnifier)
         self.define_search_area_button.clicked.connect(self.start_define_search_area_mode)
+        self.add_captured_color_button.clicked.connect(self.append_captured_color_to_extra_colors)
+        self.capture_template_button.clicked.connect(self.start_template_capture_mode)
 
         self.ok_button = QPushButton("확인"); self.cancel_button = QPushButton("취소")
         self.ok_button.clicked.connect(self.accept_action)
@@ -91,28 +139,68 @@ class ActionInputDialog(QDialog):
         if not action_to_edit: self.action_type_combo.setCurrentIndex(0)
 
 
-    def _populate_widgets_for_editing(self, action_data):
-        self.action_name_input.setText(action_data.get('user_given_name', '')) # 사용자 이름 로드
+    def _populate_widgets_for_editing(self, action):
+        action_data = as_action(action).to_dict() # 필드가 모두 채워진 JSON 형식 (없는 필드는 기본값)
+        self.action_name_input.setText(action.user_given_name or '') # 사용자 이름 로드
         action_type = action_data.get('type')
         self.action_type_combo.blockSignals(True)
         if action_type == "마우스 클릭":
             self.action_type_combo.setCurrentText("마우스 클릭"); self.mouse_x_input.setValue(action_data.get('x', 0)); self.mouse_y_input.setValue(action_data.get('y', 0))
-            button_map_rev = {"left": "왼쪽 버튼", "right": "오른쪽 버튼", "middle": "가운데 버튼"}; self.mouse_button_combo.setCurrentText(button_map_rev.get(action_data.get('button'), "왼쪽 버튼"))
+            self.mouse_button_combo.setCurrentText(BUTTON_LABELS.get(action_data.get('button'), BUTTON_LABELS['left']))
         elif action_type == "키보드 입력":
             self.action_type_combo.setCurrentText("키보드 입력"); self.captured_key_display.setText(action_data.get('key_str', ''))
         elif action_type == "딜레이":
             self.action_type_combo.setCurrentText("딜레이"); self.delay_input_ms.setValue(action_data.get('duration_ms', 100))
-        elif action_type == "색 찾기 후 클릭":
-            self.action_type_combo.setCurrentText("색 찾기 후 클릭")
-            self._temp_captured_color_rgb = tuple(action_data.get('target_color', [0,0,0]))
-            self._temp_captured_initial_xy = tuple(action_data.get('initial_xy', [0,0]))
-            self.captured_color_display.setText(f"캡처된 색상: RGB{self._temp_captured_color_rgb}")
-            self.captured_pos_display.setText(f"초기 위치: XY{self._temp_captured_initial_xy}")
-            search_area = action_data.get('search_area', [0,0,100,100])
+        elif action_type in COLOR_ACTION_TYPES:
+            self.action_type_combo.setCurrentText(action_type)
+            self._populate_color_condition(action_data)
+            if action_type == "색 대기":
+                self.wait_condition_combo.setCurrentText(WAIT_UNTIL_LABELS['disappear' if action_data.get('wait_until') == 'disappear' else 'appear'])
+                self.wait_timeout_input.setValue(action_data.get('timeout_ms', 10000))
+                self.wait_on_timeout_combo.setCurrentText(ON_TIMEOUT_LABELS['continue' if action_data.get('on_timeout') == 'continue' else 'fail'])
+        elif action_type == "이미지 찾기 후 클릭":
+            self.action_type_combo.setCurrentText("이미지 찾기 후 클릭")
+            search_area = action_data.get('search_area') or [0,0,100,100]
             self.search_x1_input.setValue(search_area[0]); self.search_y1_input.setValue(search_area[1])
             self.search_x2_input.setValue(search_area[2]); self.search_y2_input.setValue(search_area[3])
+            self.match_threshold_input.setValue(action_data.get('match_threshold', macro_templates.DEFAULT_MATCH_THRESHOLD))
+            self._set_template(action_data.get('template_path'))
+        elif action_type in MOUSE_PATH_ACTION_TYPES:
+            self.action_type_combo.setCurrentText(action_type)
+            path_kind = action_data.get('path_kind', PATH_LINEAR)
+            self.path_kind_combo.setCurrentText(PATH_KIND_LABELS.get(path_kind, PATH_KIND_LABELS[PATH_LINEAR]))
+            if path_kind == PATH_RECORDED: self._temp_recorded_points = action_data.get('points')
+            else: self.path_points_input.setText("; ".join(f"{p[0]},{p[1]}" for p in action_data.get('points') or []))
+            self.path_duration_input.setValue(action_data.get('duration_ms', DEFAULT_PATH_DURATION_MS))
+            self.path_rate_input.setValue(action_data.get('rate_hz', DEFAULT_PATH_RATE_HZ))
+            if action_type == "마우스 드래그": self.mouse_button_combo.setCurrentText(BUTTON_LABELS.get(action_data.get('button'), BUTTON_LABELS['left']))
+        elif action_type in CONTROL_ACTION_TYPES:
+            self.action_type_combo.setCurrentText(action_type)
+            if action_type == "반복 시작":
+                loop_mode = action_data.get('loop_mode', LOOP_MODE_COUNT)
+                self.loop_mode_combo.setCurrentText(LOOP_MODE_LABELS.get(loop_mode, LOOP_MODE_LABELS[LOOP_MODE_COUNT]))
+                self.loop_count_input.setValue(action_data.get('count', 10)); self.loop_max_iterations_input.setValue(action_data.get('max_iterations', 0))
+                if loop_mode != LOOP_MODE_COUNT: self._populate_color_condition(action_data)
+            elif action_type == "조건 시작":
+                self.if_condition_combo.setCurrentText(IF_CONDITION_LABELS['not_found' if action_data.get('condition') == 'not_found' else 'found'])
+                self._populate_color_condition(action_data)
+            elif action_type in ("라벨", "라벨로 이동"): self.label_input.setText(action_data.get('label', ''))
         self.action_type_combo.blockSignals(False)
 
+    def _populate_color_condition(self, action_data): # 색상/검색 범위/일치 조건 위젯 (색 찾기, 색 대기, 반복/조건의 색 조건 공용)
+        self._temp_captured_color_rgb = tuple(action_data.get('target_color', [0,0,0]))
+        self._temp_captured_initial_xy = tuple(action_data.get('initial_xy', [0,0]))
+        self.captured_color_display.setText(f"캡처된 색상: RGB{self._temp_captured_color_rgb}")
+        self.captured_pos_display.setText(f"초기 위치: XY{self._temp_captured_initial_xy}")
+        search_area = action_data.get('search_area') or [0,0,100,100]
+        self.search_x1_input.setValue(search_area[0]); self.search_y1_input.setValue(search_area[1])
+        self.search_x2_input.setValue(search_area[2]); self.search_y2_input.setValue(search_area[3])
+        self.color_tolerance_input.setValue(action_data.get('color_tolerance', 0))
+        self.tolerance_mode_combo.setCurrentText(TOLERANCE_MODE_LABELS.get(action_data.get('tolerance_mode'), TOLERANCE_MODE_LABELS[TOLERANCE_MODE_CHANNEL]))
+        self.extra_colors_input.setText("; ".join(",".join(str(c) for c in color) for color in action_data.get('extra_target_colors') or []))
+        # search_order가 없는 기존 설정은 기존 방식(좌상단부터)
+        self.search_order_combo.setCurrentText("초기 위치에서 가까운 순" if action_data.get('search_order') == SEARCH_ORDER_NEAREST else "좌상단부터 (열 우선)")
+
     def update_ui_for_action_type(self):
         # 1) 레이아웃에서 모든 위젯 분리하고 숨기기
         for i in reversed(range(self.form_layout.count())):
@@ -142,22 +230,139 @@ class ActionInputDialog(QDialog):
             self.form_layout.addRow("대기 시간 (ms):", self.delay_input_ms)
             self.delay_input_ms.show()
 
-        elif current == "색 찾기 후 클릭":
-            self.form_layout.addRow(self.color_capture_button)
-            self.form_layout.addRow(self.captured_color_display)
-            self.form_layout.addRow(self.captured_pos_display)
+        elif current in COLOR_ACTION_TYPES:
+            if current == "색 대기":
+                self.form_layout.addRow("대기 조건:", self.wait_condition_combo)
+                self.form_layout.addRow("최대 대기:", self.wait_timeout_input)
+                self.form_layout.addRow("시간 초과 시:", self.wait_on_timeout_combo)
+                for w in (self.wait_condition_combo, self.wait_timeout_input, self.wait_on_timeout_combo): w.show()
+            self._add_color_condition_rows()
+
+        elif current == "이미지 찾기 후 클릭":
+            self.form_layout.addRow(self.capture_template_button)
+            self.form_layout.addRow(self.template_display)
+            self.form_layout.addRow(self.template_preview)
+            self.form_layout.addRow("최소 유사도:", self.match_threshold_input)
             self.form_layout.addRow(QLabel("--- 검색 범위 (좌상단 XY, 우하단 XY) ---"))
             self.form_layout.addRow("X1:", self.search_x1_input)
             self.form_layout.addRow("Y1:", self.search_y1_input)
             self.form_layout.addRow("X2:", self.search_x2_input)
             self.form_layout.addRow("Y2:", self.search_y2_input)
             self.form_layout.addRow(self.define_search_area_button)
-            for w in (self.color_capture_button, self.captured_color_display,
-                      self.captured_pos_display, self.search_x1_input,
-                      self.search_y1_input, self.search_x2_input,
-                      self.search_y2_input, self.define_search_area_button):
+            for w in (self.capture_template_button, self.template_display, self.template_preview,
+                      self.match_threshold_input, self.search_x1_input, self.search_y1_input,
+                      self.search_x2_input, self.search_y2_input, self.define_search_area_button):
                 w.show()
 
+        elif current in MOUSE_PATH_ACTION_TYPES:
+            if current == "마우스 드래그": self.form_layout.addRow("버튼:", self.mouse_button_combo); self.mouse_button_combo.show()
+            self.form_layout.addRow("경로 종류:", self.path_kind_combo)
+            recorded = self.path_kind_combo.currentText() == PATH_KIND_LABELS[PATH_RECORDED]
+            if recorded: # 녹화된 표본은 직접 편집하지 않음 (시간/빈도만 조정)
+                count = len(self._temp_recorded_points or ())
+                self.form_layout.addRow(QLabel(f"녹화된 표본 {count}개" if count else "녹화된 경로가 없습니다. '매크로 녹화'에서 드래그하면 만들어집니다."))
+            else:
+                self.form_layout.addRow("경로 점 (X,Y):", self.path_points_input)
+                self.form_layout.addRow(self.path_capture_button)
+            self.form_layout.addRow("이동 시간:", self.path_duration_input)
+            self.form_layout.addRow("이동 빈도:", self.path_rate_input)
+            for w in (self.path_kind_combo, self.path_duration_input, self.path_rate_input): w.show()
+            if not recorded: self.path_points_input.show(); self.path_capture_button.show()
+
+        elif current == "반복 시작":
+            self.form_layout.addRow("반복 방식:", self.loop_mode_combo); self.loop_mode_combo.show()
+            if self.loop_mode_combo.currentText() == LOOP_MODE_LABELS[LOOP_MODE_COUNT]:
+                self.form_layout.addRow("반복 횟수:", self.loop_count_input); self.loop_count_input.show()
+            else:
+                self.form_layout.addRow("최대 반복:", self.loop_max_iterations_input); self.loop_max_iterations_input.show()
+                self.form_layout.addRow(QLabel("--- 매 반복이 끝날 때 확인할 색 조건 ---"))
+                self._add_color_condition_rows()
+
+        elif current == "조건 시작":
+            self.form_layout.addRow("조건:", self.if_condition_combo); self.if_condition_combo.show()
+            self._add_color_condition_rows()
+
+        elif current in ("라벨", "라벨로 이동"):
+            self.form_layout.addRow("라벨 이름:", self.label_input); self.label_input.show()
+
+        elif current in CONTROL_ACTION_TYPES:
+            self.form_layout.addRow(QLabel("설정할 항목이 없습니다. 목록에서 블록의 위치를 정하세요."))
+
+
+    def _add_color_condition_rows(self): # 색상 캡처/검색 범위/일치 조건 행 (색 찾기, 색 대기, 반복/조건의 색 조건 공용)
+        self.form_layout.addRow(self.color_capture_button)
+        self.form_layout.addRow(self.captured_color_display)
+        self.form_layout.addRow(self.captured_pos_display)
+        self.form_layout.addRow(QLabel("--- 검색 범위 (좌상단 XY, 우하단 XY) ---"))
+        self.form_layout.addRow("X1:", self.search_x1_input)
+        self.form_layout.addRow("Y1:", self.search_y1_input)
+        self.form_layout.addRow("X2:", self.search_x2_input)
+        self.form_layout.addRow("Y2:", self.search_y2_input)
+        self.form_layout.addRow(self.define_search_area_button)
+        self.form_layout.addRow("검색 순서:", self.search_order_combo)
+        self.form_layout.addRow(QLabel("--- 색상 일치 조건 ---"))
+        self.form_layout.addRow("허용 오차:", self.color_tolerance_input)
+        self.form_layout.addRow("오차 방식:", self.tolerance_mode_combo)
+        self.form_layout.addRow("추가 색상:", self.extra_colors_input)
+        self.form_layout.addRow(self.add_captured_color_button)
+        for w in (self.color_capture_button, self.captured_color_display,
+                  self.captured_pos_display, self.search_x1_input,
+                  self.search_y1_input, self.search_x2_input,
+                  self.search_y2_input, self.define_search_area_button, self.search_order_combo,
+                  self.color_tolerance_input, self.tolerance_mode_combo,
+                  self.extra_colors_input, self.add_captured_color_button):
+            w.show()
+
+    def _set_template(self, template_path):
+        self._temp_template_path = template_path
+        if not template_path: self.template_display.setText("템플릿: 없음"); self.template_preview.clear(); return
+        pixmap = QPixmap(macro_templates.resolve_template_path(template_path, self.config_file))
+        if pixmap.isNull(): self.template_display.setText(f"템플릿: {template_path} (파일을 읽을 수 없음)"); self.template_preview.clear(); return
+        self.template_display.setText(f"템플릿: {template_path} ({pixmap.width()}x{pixmap.height()})")
+        self.template_preview.setPixmap(pixmap.scaled(240, 80, Qt.KeepAspectRatio, Qt.FastTransformation))
+
+    def _capture_template_region(self, x1, y1, x2, y2):
+        backend = get_default_backend(gui_thread=True)
+        if backend is None or not macro_templates.is_available():
+            QMessageBox.warning(self, "캡처 불가", "템플릿 저장에는 화면 캡처 라이브러리와 numpy/Pillow가 필요합니다."); return False
+        try: template_path = macro_templates.save_template(backend.grab((x1, y1, x2, y2)), self.config_file)
+        except Exception as e: QMessageBox.warning(self, "템플릿 캡처 실패", f"{type(e).__name__}: {e}"); return False
+        self._set_template(template_path)
+        if not (self.search_x1_input.value() < self.search_x2_input.value() and self.search_y1_input.value() < self.search_y2_input.value()):
+            # 검색 범위가 아직 없으면 템플릿 주변을 기본 검색 범위로 제안
+            self.search_x1_input.setValue(x1 - 200); self.search_y1_input.setValue(y1 - 200)
+            self.search_x2_input.setValue(x2 + 200); self.search_y2_input.setValue(y2 + 200)
+        return True
+
+    def append_captured_color_to_extra_colors(self):
+        if not self._temp_captured_color_rgb: QMessageBox.warning(self, "입력 오류", "먼저 돋보기로 색상을 캡처하세요."); return
+        color_text = ",".join(str(c) for c in self._temp_captured_color_rgb)
+        current_text = self.extra_colors_input.text().strip()
+        self.extra_colors_input.setText(f"{current_text}; {color_text}" if current_text else color_text)
+
+    def _parse_extra_colors(self):
+        # "R,G,B; R,G,B" 형식 문자열을 [[R,G,B], ...]로 변환, 형식 오류 시 ValueError
+        colors = []
+        for chunk in self.extra_colors_input.text().split(";"):
+            chunk = chunk.strip()
+            if not chunk: continue
+            parts = [p.strip() for p in chunk.strip("()[] ").split(",")]
+            if len(parts) != 3: raise ValueError(f"'{chunk}'은(는) R,G,B 형식이 아닙니다.")
+            rgb = [int(p) for p in parts]
+            if not all(0 <= c <= 255 for c in rgb): raise ValueError(f"'{chunk}'의 값은 0~255 범위여야 합니다.")
+            colors.append(rgb)
+        return colors
+
+    def _parse_path_points(self):
+        # "X,Y; X,Y" 형식 문자열을 [[X,Y], ...]로 변환, 형식 오류 시 ValueError
+        points = []
+        for chunk in self.path_points_input.text().split(";"):
+            chunk = chunk.strip()
+            if not chunk: continue
+            parts = [p.strip() for p in chunk.strip("()[] ").split(",")]
+            if len(parts) != 2: raise ValueError(f"'{chunk}'은(는) X,Y 형식이 아닙니다.")
+            points.append([int(p) for p in parts])
+        return points
 
     def _is_any_capture_active(self): # 이전과 동일
         return self.is_magnifier_capture_active or \
@@ -167,7 +372,7 @@ class ActionInputDialog(QDialog):
     
     def start_generic_coords_capture(self): # 이전과 동일
         if self._is_any_capture_active(): QMessageBox.warning(self, "캡처 중복", "다른 캡처 기능이 활성화되어 있습니다."); return
-        self.capture_coords_button.setEnabled(False); self.main_app_status_update_func("일반 좌표 캡처: 원하는 위치를 좌클릭하세요...")
+        self.capture_coords_button.setEnabled(False); self.path_capture_button.setEnabled(False); self.main_app_status_update_func("일반 좌표 캡처: 원하는 위치를 좌클릭하세요...")
         QMessageBox.information(self, "좌표 캡처", "원하는 위치를 마우스 왼쪽 버튼으로 클릭하세요.")
         self.coord_capture_listener_thread = MouseCoordListenerThread(self.pynput_mouse_module, self)
         self.coord_capture_listener_thread.coords_captured_signal.connect(self.on_generic_coords_captured)
@@ -175,13 +380,17 @@ class ActionInputDialog(QDialog):
         self.coord_capture_listener_thread.finished.connect(self.on_generic_coord_listener_finished)
         self.coord_capture_listener_thread.start()
 
-    def on_generic_coords_captured(self, x, y): # 이전과 동일
+    def on_generic_coords_captured(self, x, y): # 경로 액션이면 경로 점 끝에 추가
+        if self.action_type_combo.currentText() in MOUSE_PATH_ACTION_TYPES:
+            current_text = self.path_points_input.text().strip().rstrip(";")
+            self.path_points_input.setText(f"{current_text}; {x},{y}" if current_text else f"{x},{y}")
+            self.main_app_status_update_func(f"경로 점 추가: ({x}, {y})"); return
         self.mouse_x_input.setValue(x); self.mouse_y_input.setValue(y)
         self.main_app_status_update_func(f"일반 좌표 캡처 완료: ({x}, {y})")
         QMessageBox.information(self, "캡처 완료", f"좌표 ({x}, {y})가 '마우스 클릭' 액션의 X,Y에 입력되었습니다.")
 
     def on_generic_coord_listener_finished(self): # 이전과 동일
-        self.capture_coords_button.setEnabled(True)
+        self.capture_coords_button.setEnabled(True); self.path_capture_button.setEnabled(True)
         if self.coord_capture_listener_thread: self.main_app_status_update_func("일반 좌표 캡처 모드 종료.")
         self.coord_capture_listener_thread = None
 
@@ -216,24 +425,28 @@ class ActionInputDialog(QDialog):
         self.is_magnifier_capture_active = True; self._search_area_capture_stage = 0
         self.main_app_status_update_func("돋보기/색상 캡처: 화면 클릭(선택) 또는 ESC(취소).")
         self.color_capture_button.setText("캡처 중... (ESC로 취소)"); self.color_capture_button.setEnabled(False)
+        from eyedropper import _SystemCursor, Magnifier, Overlay # 돋보기 스택은 처음 사용할 때 로드
         if not self.magnifier_widget: self.magnifier_widget = Magnifier()
         if not self.overlay_widget_magnifier: self.overlay_widget_magnifier = Overlay()
         QApplication.setOverrideCursor(Qt.BlankCursor); _SystemCursor.hide()
         self.overlay_widget_magnifier.show(); self.grabMouse(); self.grabKeyboard() 
         self.magnifier_widget.update_preview(QCursor.pos()); self.magnifier_widget.show()
         if not self.magnifier_update_timer:
-            self.magnifier_update_timer = QTimer(self); self.magnifier_update_timer.setInterval(25)
+            self.magnifier_update_timer = QTimer(self)
             self.magnifier_update_timer.timeout.connect(self._update_magnifier_tick)
-        self.magnifier_update_timer.start()
+        self.magnifier_update_timer.start(self.magnifier_widget.refresh_interval_ms())
 
-    def _update_magnifier_tick(self): # 이전과 동일
-        if self.is_magnifier_capture_active and self.magnifier_widget: self.magnifier_widget.update_preview(QCursor.pos())
+    def _update_magnifier_tick(self): # 갱신 간격은 돋보기가 커서 움직임에 맞춰 정함 (움직이면 짧게, 멈추면 길게)
+        if self.is_magnifier_capture_active and self.magnifier_widget:
+            self.magnifier_widget.update_preview(QCursor.pos())
+            self.magnifier_update_timer.setInterval(self.magnifier_widget.refresh_interval_ms())
 
     def _finish_magnifier_color_capture(self, commit_data: bool): # 이전과 동일
         if not self.is_magnifier_capture_active : return
         if self.magnifier_update_timer: self.magnifier_update_timer.stop()
         self.releaseMouse(); self.releaseKeyboard()
         if self.overlay_widget_magnifier: self.overlay_widget_magnifier.hide()
+        from eyedropper import _SystemCursor
         QApplication.restoreOverrideCursor(); _SystemCursor.show()
         if self.magnifier_widget:
             if commit_data:
@@ -250,12 +463,30 @@ class ActionInputDialog(QDialog):
         self.color_capture_button.setText("돋보기/색상 캡처 시작"); self.color_capture_button.setEnabled(True)
         self.main_app_status_update_func("돋보기/색상 캡처 모드 종료됨."); self.activateWindow()
     
+    def _area_capture_button(self):
+        return self.capture_template_button if self._area_capture_purpose == "template" else self.define_search_area_button
+
+    def _area_capture_label(self):
+        return "템플릿 영역" if self._area_capture_purpose == "template" else "검색 범위"
+
+    def _reset_area_capture_button(self):
+        self.define_search_area_button.setText("검색 범위 마우스 지정"); self.define_search_area_button.setEnabled(True)
+        self.capture_template_button.setText("템플릿 영역 마우스 지정 (두 번 클릭)"); self.capture_template_button.setEnabled(True)
+
+    def start_template_capture_mode(self): # 검색 범위 지정과 같은 두 번 클릭 흐름으로 템플릿 영역 캡처
+        if self._is_any_capture_active(): QMessageBox.warning(self, "캡처 중복", "다른 캡처 기능이 이미 활성화되어 있습니다."); return
+        self._area_capture_purpose = "template"; self._start_area_capture()
+
     def start_define_search_area_mode(self): # pynput 스레드 사용으로 변경
         if self._is_any_capture_active(): QMessageBox.warning(self, "캡처 중복", "다른 캡처 기능이 이미 활성화되어 있습니다."); return
+        self._area_capture_purpose = "search"; self._start_area_capture()
+
+    def _start_area_capture(self):
+        label = self._area_capture_label()
         self._search_area_capture_stage = 1; self.is_magnifier_capture_active = False; self._search_area_p1 = None
-        self.main_app_status_update_func("검색 범위 지정 (1/2): 첫 번째 모서리를 클릭하세요.")
-        QMessageBox.information(self, "검색 범위 지정 (1/2)", "검색 범위의 첫 번째 모서리(예: 좌상단)를 클릭하세요.\n(ESC로 취소하려면 이 대화 상자를 닫아야 할 수 있습니다.)")
-        self.define_search_area_button.setText("지정 중...(P1 대기)"); self.define_search_area_button.setEnabled(False)
+        self.main_app_status_update_func(f"{label} 지정 (1/2): 첫 번째 모서리를 클릭하세요.")
+        QMessageBox.information(self, f"{label} 지정 (1/2)", f"{label}의 첫 번째 모서리(예: 좌상단)를 클릭하세요.\n(ESC로 취소하려면 이 대화 상자를 닫아야 할 수 있습니다.)")
+        self._area_capture_button().setText("지정 중...(P1 대기)"); self._area_capture_button().setEnabled(False)
         QApplication.setOverrideCursor(Qt.CrossCursor) # 전체 앱 커서 변경
         # _SystemCursor.hide() # 선택적: 검색 범위 지정 시에는 시스템 커서 유지도 괜찮음
 
@@ -271,12 +502,14 @@ class ActionInputDialog(QDialog):
 
         if self._search_area_capture_stage == 1:
             self._search_area_p1 = QPoint(x, y)
-            self.search_x1_input.setValue(x) # 임시로 첫 번째 클릭을 X1, Y1에 설정
-            self.search_y1_input.setValue(y)
-            self.main_app_status_update_func(f"첫 점 ({x},{y}) 선택. 검색 범위 지정 (2/2): 두 번째 모서리를 클릭하세요.")
-            QMessageBox.information(self, "검색 범위 지정 (2/2)", f"첫 번째 점 ({x},{y})이 선택되었습니다.\n이제 두 번째 모서리(예: 우하단)를 클릭하세요.")
+            if self._area_capture_purpose == "search":
+                self.search_x1_input.setValue(x) # 임시로 첫 번째 클릭을 X1, Y1에 설정
+                self.search_y1_input.setValue(y)
+            label = self._area_capture_label()
+            self.main_app_status_update_func(f"첫 점 ({x},{y}) 선택. {label} 지정 (2/2): 두 번째 모서리를 클릭하세요.")
+            QMessageBox.information(self, f"{label} 지정 (2/2)", f"첫 번째 점 ({x},{y})이 선택되었습니다.\n이제 두 번째 모서리(예: 우하단)를 클릭하세요.")
             self._search_area_capture_stage = 2
-            self.define_search_area_button.setText("지정 중...(P2 대기)")
+            self._area_capture_button().setText("지정 중...(P2 대기)")
             
             # 다음 클릭을 위해 새 리스너 시작 (이전 리스너는 finished 후 정리됨)
             self.coord_capture_listener_thread = MouseCoordListenerThread(self.pynput_mouse_module, self)
@@ -300,8 +533,8 @@ class ActionInputDialog(QDialog):
                 QMessageBox.warning(self, "영역 오류", "선택된 두 점으로 유효한 사각형 영역(너비/높이 > 0)을 만들 수 없습니다.\n첫 번째 점부터 다시 시도하세요.")
                 self._search_area_p1 = None
                 self._search_area_capture_stage = 1 
-                self.main_app_status_update_func("검색 영역 지정 오류. 첫 번째 모서리를 다시 클릭하세요.")
-                self.define_search_area_button.setText("지정 중...(P1 대기)")
+                self.main_app_status_update_func(f"{self._area_capture_label()} 지정 오류. 첫 번째 모서리를 다시 클릭하세요.")
+                self._area_capture_button().setText("지정 중...(P1 대기)")
                 # 첫 번째 클릭을 위해 리스너 다시 시작
                 self.coord_capture_listener_thread = MouseCoordListenerThread(self.pynput_mouse_module, self)
                 self.coord_capture_listener_thread.coords_captured_signal.connect(self._on_search_area_point_captured)
@@ -310,6 +543,10 @@ class ActionInputDialog(QDialog):
                 self.coord_capture_listener_thread.start()
                 return
 
+            if self._area_capture_purpose == "template":
+                captured = self._capture_template_region(x1_val, y1_val, x2_val, y2_val)
+                self._finish_define_search_area_pynput(success=captured, message=None if captured else "템플릿 캡처에 실패했습니다.")
+                return
             self.search_x1_input.setValue(x1_val)
             self.search_y1_input.setValue(y1_val)
             self.search_x2_input.setValue(x2_val)
@@ -322,8 +559,7 @@ class ActionInputDialog(QDialog):
         # self.coord_capture_listener_thread = None # 여기서 None으로 하면 다음 스레드 시작 불가
         # _finish_define_search_area_pynput 에서 최종 정리 및 버튼 상태 관리
         if not self._search_area_capture_stage: # 이미 종료된 경우
-             self.define_search_area_button.setEnabled(True)
-             self.define_search_area_button.setText("검색 범위 마우스 지정")
+             self._reset_area_capture_button()
 
     def _finish_define_search_area_pynput(self, success: bool, message: str = None):
         if self.coord_capture_listener_thread and self.coord_capture_listener_thread.isRunning():
@@ -337,13 +573,14 @@ class ActionInputDialog(QDialog):
         # _SystemCursor.show() # 필요시
 
         self._search_area_capture_stage = 0 # 상태 초기화
-        self.define_search_area_button.setText("검색 범위 마우스 지정")
-        self.define_search_area_button.setEnabled(True)
+        self._reset_area_capture_button()
         
-        if success:
+        if success and self._area_capture_purpose == "template":
+            self.main_app_status_update_func(f"템플릿 캡처 완료: {self._temp_template_path}")
+        elif success:
             self.main_app_status_update_func(f"검색 범위 지정 완료: ({self.search_x1_input.value()},{self.search_y1_input.value()})-({self.search_x2_input.value()},{self.search_y2_input.value()})")
         else:
-            final_message = message if message else "검색 범위 지정이 취소되었거나 실패했습니다."
+            final_message = message if message else f"{self._area_capture_label()} 지정이 취소되었거나 실패했습니다."
             self.main_app_status_update_func(final_message)
         self.activateWindow() # 다이얼로그 다시 활성화
 
@@ -368,37 +605,77 @@ class ActionInputDialog(QDialog):
             # 또는, _finish_define_search_area_pynput(False)를 호출할 수 있는 다른 수단 필요.
         super().keyPressEvent(event)
         
-    def get_action_data(self): # 사용자 지정 이름 추가
+    def get_action_data(self): # 입력값으로 액션 객체를 만듦 (표시 문자열은 액션이 describe()로 생성)
         action_type = self.action_type_combo.currentText()
         user_name = self.action_name_input.text().strip()
         data = {'type': action_type, 'user_given_name': user_name if user_name else None }
-        details_list = []
         if action_type == "마우스 클릭": 
-            x, y = self.mouse_x_input.value(), self.mouse_y_input.value()
-            button_map = {"왼쪽 버튼": "left", "오른쪽 버튼": "right", "가운데 버튼": "middle"}
-            button = button_map.get(self.mouse_button_combo.currentText(), "left")
-            data.update({'x': x, 'y': y, 'button': button}); details_list.append(f"{self.mouse_button_combo.currentText()} 클릭 ({x},{y})")
+            button = next((button for button, text in BUTTON_LABELS.items() if text == self.mouse_button_combo.currentText()), "left")
+            data.update({'x': self.mouse_x_input.value(), 'y': self.mouse_y_input.value(), 'button': button})
         elif action_type == "키보드 입력": 
             key_str = self.captured_key_display.text().strip()
             if not key_str: QMessageBox.warning(self, "입력 오류", "캡처된 키가 없습니다."); return None
-            data.update({'key_str': key_str}); details_list.append(f"키 입력: '{key_str}'")
+            data.update({'key_str': key_str})
         elif action_type == "딜레이": 
-            duration = self.delay_input_ms.value(); data.update({'duration_ms': duration}); details_list.append(f"{duration}ms 대기")
-        elif action_type == "색 찾기 후 클릭":
-            if not self._temp_captured_color_rgb or not self._temp_captured_initial_xy: QMessageBox.warning(self, "입력 오류", "'색상 및 위치 캡처'를 먼저 실행해주세요."); return None
+            data.update({'duration_ms': self.delay_input_ms.value()})
+        elif action_type in COLOR_ACTION_TYPES:
+            if not self._collect_color_condition(data): return None
+            if action_type == "색 대기":
+                wait_until = 'disappear' if self.wait_condition_combo.currentText() == WAIT_UNTIL_LABELS['disappear'] else 'appear'
+                on_timeout = 'continue' if self.wait_on_timeout_combo.currentText() == ON_TIMEOUT_LABELS['continue'] else 'fail'
+                data.update({'wait_until': wait_until, 'timeout_ms': self.wait_timeout_input.value(), 'on_timeout': on_timeout})
+        elif action_type == "이미지 찾기 후 클릭":
+            if not self._temp_template_path: QMessageBox.warning(self, "입력 오류", "'템플릿 영역 마우스 지정'으로 찾을 이미지를 먼저 캡처해주세요."); return None
             x1, y1, x2, y2 = self.search_x1_input.value(), self.search_y1_input.value(), self.search_x2_input.value(), self.search_y2_input.value()
             if not (x1 < x2 and y1 < y2) : QMessageBox.warning(self, "범위 오류", "검색 범위의 끝 X,Y는 시작 X,Y보다 커야 합니다."); return None
-            data.update({'target_color': list(self._temp_captured_color_rgb), 'initial_xy': list(self._temp_captured_initial_xy), 'search_area': [x1, y1, x2, y2]})
-            details_list.append(f"색상 RGB{self._temp_captured_color_rgb} 찾아서 클릭 (범위: {x1},{y1}-{x2},{y2})")
+            data.update({'template_path': self._temp_template_path, 'search_area': [x1, y1, x2, y2], 'match_threshold': round(self.match_threshold_input.value(), 2)})
         
-        auto_details = " ".join(details_list) if details_list else "알 수 없는 액션"
-        data['details'] = f"{user_name} ({auto_details})" if user_name and auto_details else (user_name if user_name else auto_details)
-        return data
+        elif action_type in MOUSE_PATH_ACTION_TYPES:
+            path_kind = next((kind for kind, text in PATH_KIND_LABELS.items() if text == self.path_kind_combo.currentText()), PATH_LINEAR)
+            if path_kind == PATH_RECORDED: points = [list(p) for p in self._temp_recorded_points or ()]
+            else:
+                try: points = self._parse_path_points()
+                except ValueError as e: QMessageBox.warning(self, "경로 오류", str(e)); return None
+            error = validate_path(path_kind, points)
+            if error: QMessageBox.warning(self, "경로 오류", error); return None
+            data.update({'path_kind': path_kind, 'points': points, 'duration_ms': self.path_duration_input.value(), 'rate_hz': self.path_rate_input.value()})
+            if action_type == "마우스 드래그":
+                data['button'] = next((button for button, text in BUTTON_LABELS.items() if text == self.mouse_button_combo.currentText()), "left")
+        elif action_type == "반복 시작":
+            loop_mode = next(mode for mode, text in LOOP_MODE_LABELS.items() if text == self.loop_mode_combo.currentText())
+            data['loop_mode'] = loop_mode
+            if loop_mode == LOOP_MODE_COUNT: data['count'] = self.loop_count_input.value()
+            else:
+                if not self._collect_color_condition(data): return None
+                data['max_iterations'] = self.loop_max_iterations_input.value()
+        elif action_type == "조건 시작":
+            if not self._collect_color_condition(data): return None
+            data['condition'] = 'not_found' if self.if_condition_combo.currentText() == IF_CONDITION_LABELS['not_found'] else 'found'
+        elif action_type in ("라벨", "라벨로 이동"):
+            label = self.label_input.text().strip()
+            if not label: QMessageBox.warning(self, "입력 오류", "라벨 이름을 입력해주세요."); return None
+            data['label'] = label
+        return action_from_dict(data)
+
+    def _collect_color_condition(self, data):
+        # 색상/검색 범위/일치 조건 위젯 값을 data에 채우고 True. 입력 오류면 경고 후 False
+        if not self._temp_captured_color_rgb or not self._temp_captured_initial_xy: QMessageBox.warning(self, "입력 오류", "'색상 및 위치 캡처'를 먼저 실행해주세요."); return False
+        x1, y1, x2, y2 = self.search_x1_input.value(), self.search_y1_input.value(), self.search_x2_input.value(), self.search_y2_input.value()
+        if not (x1 < x2 and y1 < y2) : QMessageBox.warning(self, "범위 오류", "검색 범위의 끝 X,Y는 시작 X,Y보다 커야 합니다."); return False
+        try: extra_colors = self._parse_extra_colors()
+        except ValueError as e: QMessageBox.warning(self, "추가 색상 오류", str(e)); return False
+        if len(extra_colors) + 1 > MAX_TARGET_COLORS: QMessageBox.warning(self, "추가 색상 오류", f"색상은 최대 {MAX_TARGET_COLORS}개까지 지정할 수 있습니다."); return False
+        tolerance = self.color_tolerance_input.value()
+        tolerance_mode = next((mode for mode, text in TOLERANCE_MODE_LABELS.items() if text == self.tolerance_mode_combo.currentText()), TOLERANCE_MODE_CHANNEL)
+        search_order = SEARCH_ORDER_NEAREST if self.search_order_combo.currentText() == "초기 위치에서 가까운 순" else SEARCH_ORDER_SCAN
+        data.update({'target_color': list(self._temp_captured_color_rgb), 'initial_xy': list(self._temp_captured_initial_xy), 'search_area': [x1, y1, x2, y2],
+                     'extra_target_colors': extra_colors, 'color_tolerance': tolerance, 'tolerance_mode': tolerance_mode, 'search_order': search_order})
+        return True
 
     def accept_action(self):
         self.action_data = self.get_action_data();
         if self.action_data:
-            if self.action_data['type'] == "색 찾기 후 클릭":
+            if hasattr(self.action_data, 'target_color'):
                  self._temp_captured_color_rgb = None; self._temp_captured_initial_xy = None
             self.accept()
 
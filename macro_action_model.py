@@ -0,0 +1,101 @@
+# macro_action_model.py
+# 액션 목록 모델 (MacroApp의 한 열짜리 목록 뷰용). 매크로의 액션 객체 목록을 복사하지 않고 그대로 감싸며,
+# 편집은 행 단위 삽입/삭제/이동/변경 시그널로 알리고 표시 문자열은 뷰가 그리는 행만 data()에서 만들므로
+# 액션 수와 관계없이 편집 비용이 일정함 (목록 전체를 다시 만들지 않음)
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+
+from macro_actions import BLOCK_OPEN_CODES, BLOCK_MIDDLE_CODES, BLOCK_CLOSE_CODES
+from macro_plan import block_depths
+
+ACTION_ROLE = Qt.UserRole # data(index, ACTION_ROLE): 액션 객체 (macro_actions)
+_BLOCK_CODES = frozenset(BLOCK_OPEN_CODES + BLOCK_MIDDLE_CODES + BLOCK_CLOSE_CODES)
+_INDENTING_CODES = frozenset(BLOCK_OPEN_CODES + BLOCK_MIDDLE_CODES) # 다음 행부터 한 단계 들여씀
+_INDENT = '    '
+
+
+class ActionListModel(QAbstractListModel):
+    def __init__(self, actions=None, parent=None):
+        super().__init__(parent)
+        self._actions = actions if actions is not None else []
+        self._depths = None # 반복/조건 블록 들여쓰기 깊이 캐시 (블록 액션이 바뀌면 버리고 다음 data()에서 다시 계산)
+
+    def actions(self):
+        return self._actions
+
+    def set_actions(self, actions):
+        """다른 목록으로 교체 (매크로 전환, 일괄 변경). 뷰 전체를 다시 그림"""
+        self.beginResetModel()
+        self._actions = actions; self._depths = None
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._actions)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return None
+        row = index.row()
+        if role == Qt.DisplayRole:
+            if self._depths is None: self._depths = block_depths(self._actions)
+            return f"{row + 1}. {_INDENT * self._depths[row]}{self._actions[row].describe()}"
+        if role == ACTION_ROLE: return self._actions[row]
+        return None
+
+    def _structure_changed(self, first_row, *actions):
+        # 블록 액션이 끼어 있으면 이후 행들의 들여쓰기가 바뀔 수 있음
+        if any(action.code in _BLOCK_CODES for action in actions):
+            self._depths = None
+            if first_row < len(self._actions): self.dataChanged.emit(self.index(first_row), self.index(len(self._actions) - 1), [Qt.DisplayRole])
+            return True
+        return False
+
+    def insert_action(self, row, action):
+        row = max(0, min(row, len(self._actions)))
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._actions.insert(row, action)
+        if self._depths is not None and action.code not in _BLOCK_CODES: # 블록이 아닌 액션은 바로 앞 행 기준 깊이
+            self._depths.insert(row, self._depths[row - 1] + (self._actions[row - 1].code in _INDENTING_CODES) if row else 0)
+        self.endInsertRows()
+        self._structure_changed(row, action)
+
+    def append_action(self, action):
+        self.insert_action(len(self._actions), action)
+
+    def insert_actions(self, row, actions):
+        """여러 액션을 한 번에 삽입 (녹화 결과 등). 행 삽입 시그널은 한 번만 보냄"""
+        if not actions: return
+        row = max(0, min(row, len(self._actions)))
+        self.beginInsertRows(QModelIndex(), row, row + len(actions) - 1)
+        self._actions[row:row] = actions; self._depths = None
+        self.endInsertRows()
+        self._structure_changed(row, *actions)
+
+    def remove_action(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        action = self._actions.pop(row)
+        if self._depths is not None: del self._depths[row]
+        self.endRemoveRows()
+        self._structure_changed(row, action)
+        return action
+
+    def replace_action(self, row, action):
+        old_action = self._actions[row]; self._actions[row] = action
+        if not self._structure_changed(row, old_action, action): self.dataChanged.emit(self.index(row), self.index(row), [Qt.DisplayRole])
+
+    def move_action(self, row, new_row):
+        """row의 액션을 new_row 위치로 (한 칸 이동은 두 행만 다시 그림)"""
+        if row == new_row or not (0 <= new_row < len(self._actions)): return False
+        # beginMoveRows의 목적지는 '이동 전 목록 기준으로 그 앞에 놓일 행'
+        if not self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), new_row + 1 if new_row > row else new_row): return False
+        action = self._actions.pop(row); self._actions.insert(new_row, action)
+        self.endMoveRows()
+        first, last = min(row, new_row), max(row, new_row)
+        # 사이에 블록 액션이 없으면 그 구간의 깊이는 모두 같으므로 캐시가 그대로 유효하고, 번호가 바뀐 행들만 다시 그림
+        if not self._structure_changed(first, *self._actions[first:last + 1]):
+            self.dataChanged.emit(self.index(first), self.index(last), [Qt.DisplayRole])
+        return True
+
+    def clear_actions(self):
+        if not self._actions: return
+        self.beginRemoveRows(QModelIndex(), 0, len(self._actions) - 1)
+        self._actions.clear(); self._depths = None
+        self.endRemoveRows()
@@ -0,0 +1,306 @@
+# macro_actions.py
+# 매크로 액션 표현: 유형별 __slots__ 클래스 (Qt/pynput에 의존하지 않음). 액션마다 dict를 두지 않고 유형에 필요한 필드만 담으며
+# 좌표/색상은 튜플로, 버튼/키 이름처럼 반복되는 짧은 문자열은 intern해 공유하므로 긴 녹화(수만 단계)도 메모리를 적게 씀
+# 유형은 표시 언어와 무관한 고정 코드(ACTION_CLICK 등)로 구분. 설정 JSON에는 기존과 같은 한국어 'type' 문자열과 필드 이름으로 저장
+# 목록 표시 문자열(예전 'details')은 저장하지 않고 describe()가 필요할 때 만듦 (예전 설정의 'details'는 읽을 때 버림)
+import sys
+
+from macro_color_search import TOLERANCE_MODE_CHANNEL, TOLERANCE_MODE_EUCLIDEAN, SEARCH_ORDER_SCAN
+import macro_templates
+from macro_mouse_path import PATH_LINEAR, PATH_BEZIER, PATH_RECORDED, PATH_KIND_LABELS, DEFAULT_PATH_DURATION_MS, DEFAULT_PATH_RATE_HZ
+
+ACTION_CLICK = 'click'
+ACTION_KEY = 'key'
+ACTION_DELAY = 'delay'
+ACTION_COLOR_CLICK = 'color_click'
+ACTION_COLOR_WAIT = 'color_wait'
+ACTION_IMAGE_CLICK = 'image_click'
+ACTION_LOOP_START = 'loop_start'
+ACTION_LOOP_END = 'loop_end'
+ACTION_IF_COLOR = 'if_color'
+ACTION_ELSE = 'else'
+ACTION_END_IF = 'end_if'
+ACTION_LABEL = 'label'
+ACTION_GOTO = 'goto'
+ACTION_MOUSE_PATH = 'mouse_path'
+ACTION_MOUSE_DRAG = 'mouse_drag'
+# 대화상자와 설정 JSON의 'type' 문자열 (기존 설정과 호환되도록 바꾸지 않음)
+ACTION_TYPE_LABELS = {ACTION_CLICK: "마우스 클릭", ACTION_KEY: "키보드 입력", ACTION_DELAY: "딜레이", ACTION_COLOR_CLICK: "색 찾기 후 클릭",
+                      ACTION_COLOR_WAIT: "색 대기", ACTION_IMAGE_CLICK: "이미지 찾기 후 클릭", ACTION_LOOP_START: "반복 시작",
+                      ACTION_LOOP_END: "반복 끝", ACTION_IF_COLOR: "조건 시작", ACTION_ELSE: "아니면", ACTION_END_IF: "조건 끝",
+                      ACTION_LABEL: "라벨", ACTION_GOTO: "라벨로 이동",
+                      ACTION_MOUSE_PATH: "마우스 경로 이동", ACTION_MOUSE_DRAG: "마우스 드래그"}
+
+BLOCK_OPEN_CODES = (ACTION_LOOP_START, ACTION_IF_COLOR)
+BLOCK_MIDDLE_CODES = (ACTION_ELSE,)
+BLOCK_CLOSE_CODES = (ACTION_LOOP_END, ACTION_END_IF)
+LOOP_MODE_COUNT = 'count'
+LOOP_MODE_UNTIL_APPEAR = 'until_appear'
+LOOP_MODE_UNTIL_DISAPPEAR = 'until_disappear'
+
+BUTTON_LABELS = {'left': "왼쪽 버튼", 'right': "오른쪽 버튼", 'middle': "가운데 버튼"}
+TOLERANCE_MODE_LABELS = {TOLERANCE_MODE_CHANNEL: "채널별 차이", TOLERANCE_MODE_EUCLIDEAN: "유클리드 거리"}
+WAIT_UNTIL_LABELS = {'appear': "나타날 때까지", 'disappear': "사라질 때까지"}
+ON_TIMEOUT_LABELS = {'fail': "실행 중단", 'continue': "다음 액션으로 진행"}
+LOOP_MODE_LABELS = {LOOP_MODE_COUNT: "횟수만큼", LOOP_MODE_UNTIL_APPEAR: "색이 나타날 때까지", LOOP_MODE_UNTIL_DISAPPEAR: "색이 사라질 때까지"}
+IF_CONDITION_LABELS = {'found': "색이 있으면", 'not_found': "색이 없으면"}
+
+
+def _freeze(value):
+    # JSON 목록은 불변 튜플로 (중첩 포함), 문자열은 intern해 같은 값을 한 객체로 공유
+    if type(value) is list: return tuple(_freeze(item) for item in value)
+    if type(value) is str: return sys.intern(value)
+    return value
+
+
+def _area_text(search_area):
+    return "{},{}-{},{}".format(*search_area) if len(search_area) == 4 else str(tuple(search_area))
+
+
+class Action:
+    """액션 공통. FIELDS는 (필드 이름, 기본값) 튜플로 필드 이름이 곧 슬롯 이름이자 JSON 키. 편집은 새 객체로 교체 (제자리 변경 안 함)"""
+    __slots__ = ('user_given_name',)
+    code = None
+    FIELDS = ()
+
+    def __init__(self, user_given_name=None, **fields):
+        self.user_given_name = user_given_name or None
+        for key, default in self.FIELDS:
+            value = fields.pop(key, None)
+            setattr(self, key, default if value is None else _freeze(value))
+        if fields: raise TypeError(f"{type(self).__name__}: 알 수 없는 필드 {sorted(fields)}")
+
+    @property
+    def type_label(self):
+        return ACTION_TYPE_LABELS[self.code]
+
+    def to_dict(self):
+        data = {'type': self.type_label, 'user_given_name': self.user_given_name}
+        for key, _ in self.FIELDS: data[key] = getattr(self, key)
+        return data
+
+    def summary(self):
+        """자동 설명 (사용자 이름 제외)"""
+        return self.type_label
+
+    def describe(self):
+        """목록 표시 문자열. 예전 'details'와 같은 형식 (사용자 이름이 있으면 '이름 (설명)')"""
+        summary = self.summary()
+        return f"{self.user_given_name} ({summary})" if self.user_given_name else summary
+
+    def display_name(self):
+        """상태 메시지/실행 계획에 쓰는 이름"""
+        return self.user_given_name or self.summary()
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{key}={getattr(self, key)!r}' for key, _ in self.FIELDS)})"
+
+
+class ClickAction(Action):
+    __slots__ = ('x', 'y', 'button')
+    code = ACTION_CLICK
+    FIELDS = (('x', 0), ('y', 0), ('button', 'left'))
+
+    def summary(self):
+        return f"{BUTTON_LABELS.get(self.button, self.button)} 클릭 ({self.x},{self.y})"
+
+
+class KeyAction(Action):
+    __slots__ = ('key_str',)
+    code = ACTION_KEY
+    FIELDS = (('key_str', ''),)
+
+    def summary(self):
+        return f"키 입력: '{self.key_str}'"
+
+
+class DelayAction(Action):
+    __slots__ = ('duration_ms',)
+    code = ACTION_DELAY
+    FIELDS = (('duration_ms', 0),)
+
+    def summary(self):
+        return f"{self.duration_ms}ms 대기"
+
+
+class _ColorAction(Action):
+    """색 조건(색상/검색 범위/일치 조건)을 가진 액션 공통 (색 찾기, 색 대기, 반복/조건의 색 조건)"""
+    __slots__ = ('target_color', 'initial_xy', 'search_area', 'extra_target_colors', 'color_tolerance', 'tolerance_mode', 'search_order')
+    FIELDS = (('target_color', (0, 0, 0)), ('initial_xy', (0, 0)), ('search_area', ()), ('extra_target_colors', ()),
+              ('color_tolerance', 0), ('tolerance_mode', TOLERANCE_MODE_CHANNEL), ('search_order', SEARCH_ORDER_SCAN))
+
+    def color_summary(self):
+        text = f"색상 RGB{tuple(self.target_color)}" + (f" 외 {len(self.extra_target_colors)}색" if self.extra_target_colors else "")
+        if self.color_tolerance: text += f" (오차 ±{self.color_tolerance}, {TOLERANCE_MODE_LABELS.get(self.tolerance_mode, self.tolerance_mode)})"
+        return text
+
+
+class ColorClickAction(_ColorAction):
+    __slots__ = ()
+    code = ACTION_COLOR_CLICK
+
+    def summary(self):
+        return f"{self.color_summary()} 찾아서 클릭 (범위: {_area_text(self.search_area)})"
+
+
+class ColorWaitAction(_ColorAction):
+    __slots__ = ('wait_until', 'timeout_ms', 'on_timeout')
+    code = ACTION_COLOR_WAIT
+    FIELDS = _ColorAction.FIELDS + (('wait_until', 'appear'), ('timeout_ms', 10000), ('on_timeout', 'fail'))
+
+    def summary(self):
+        return (f"{self.color_summary()} {WAIT_UNTIL_LABELS.get(self.wait_until, self.wait_until)} 대기 (범위: {_area_text(self.search_area)}, "
+                f"최대 {self.timeout_ms}ms, 초과 시 {ON_TIMEOUT_LABELS.get(self.on_timeout, self.on_timeout)})")
+
+
+class ImageClickAction(Action):
+    __slots__ = ('template_path', 'search_area', 'match_threshold')
+    code = ACTION_IMAGE_CLICK
+    FIELDS = (('template_path', None), ('search_area', ()), ('match_threshold', macro_templates.DEFAULT_MATCH_THRESHOLD))
+
+    def summary(self):
+        return f"이미지 '{self.template_path}' 찾아서 클릭 (유사도 ≥ {self.match_threshold}, 범위: {_area_text(self.search_area)})"
+
+
+class LoopStartAction(_ColorAction):
+    """횟수 반복이면 count만, 색 조건 반복이면 색 조건과 max_iterations(0이면 제한 없음)를 씀"""
+    __slots__ = ('loop_mode', 'count', 'max_iterations')
+    code = ACTION_LOOP_START
+    FIELDS = _ColorAction.FIELDS + (('loop_mode', LOOP_MODE_COUNT), ('count', 1), ('max_iterations', 0))
+
+    def to_dict(self):
+        data = {'type': self.type_label, 'user_given_name': self.user_given_name, 'loop_mode': self.loop_mode}
+        if self.loop_mode == LOOP_MODE_COUNT: data['count'] = self.count
+        else:
+            for key, _ in _ColorAction.FIELDS: data[key] = getattr(self, key)
+            data['max_iterations'] = self.max_iterations
+        return data
+
+    def summary(self):
+        if self.loop_mode == LOOP_MODE_COUNT: return f"반복 시작 ({self.count}회)"
+        limit = f", 최대 {self.max_iterations}회" if self.max_iterations else ""
+        return f"반복 시작 ({self.color_summary()} {LOOP_MODE_LABELS.get(self.loop_mode, self.loop_mode)}{limit})"
+
+
+class LoopEndAction(Action):
+    __slots__ = ()
+    code = ACTION_LOOP_END
+
+
+class IfColorAction(_ColorAction):
+    __slots__ = ('condition',)
+    code = ACTION_IF_COLOR
+    FIELDS = _ColorAction.FIELDS + (('condition', 'found'),)
+
+    def summary(self):
+        return f"조건: {self.color_summary()}이(가) 범위 {_area_text(self.search_area)}에 {'없으면' if self.condition == 'not_found' else '있으면'}"
+
+
+class ElseAction(Action):
+    __slots__ = ()
+    code = ACTION_ELSE
+
+
+class EndIfAction(Action):
+    __slots__ = ()
+    code = ACTION_END_IF
+
+
+class LabelAction(Action):
+    __slots__ = ('label',)
+    code = ACTION_LABEL
+    FIELDS = (('label', ''),)
+
+    def summary(self):
+        return f"라벨 '{self.label}'"
+
+
+class GotoAction(Action):
+    __slots__ = ('label',)
+    code = ACTION_GOTO
+    FIELDS = (('label', ''),)
+
+    def summary(self):
+        return f"라벨 '{self.label}'(으)로 이동"
+
+
+class MousePathAction(Action):
+    """points를 따라 duration_ms 동안 rate_hz로 커서를 옮김. 직선/베지어는 (x, y) 점, 녹화된 경로는 (x, y, ms) 표본 (macro_mouse_path)"""
+    __slots__ = ('path_kind', 'points', 'duration_ms', 'rate_hz')
+    code = ACTION_MOUSE_PATH
+    FIELDS = (('path_kind', PATH_LINEAR), ('points', ()), ('duration_ms', DEFAULT_PATH_DURATION_MS), ('rate_hz', DEFAULT_PATH_RATE_HZ))
+
+    def path_summary(self):
+        if not self.points: return PATH_KIND_LABELS.get(self.path_kind, self.path_kind)
+        (x0, y0), (x1, y1) = self.points[0][:2], self.points[-1][:2]
+        inner = len(self.points) - 2
+        if self.path_kind == PATH_RECORDED: extra = f" {len(self.points)}점"
+        else: extra = (f" 제어점 {inner}개" if self.path_kind == PATH_BEZIER else f" 경유 {inner}점") if inner > 0 else ""
+        return f"{PATH_KIND_LABELS.get(self.path_kind, self.path_kind)}{extra} ({x0},{y0})→({x1},{y1}), {self.duration_ms}ms, {self.rate_hz}Hz"
+
+    def summary(self):
+        return f"마우스 이동: {self.path_summary()}"
+
+
+class MouseDragAction(MousePathAction):
+    """첫 점에서 버튼을 누르고 경로를 따라 옮긴 뒤 끝 점에서 뗌"""
+    __slots__ = ('button',)
+    code = ACTION_MOUSE_DRAG
+    FIELDS = MousePathAction.FIELDS + (('button', 'left'),)
+
+    def summary(self):
+        return f"{BUTTON_LABELS.get(self.button, self.button)} 드래그: {self.path_summary()}"
+
+
+class UnknownAction(Action):
+    """이 버전이 모르는 유형 (다른 버전에서 만든 설정 등). 받은 dict를 그대로 보관해 다시 저장할 때 잃지 않음"""
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.user_given_name = data.get('user_given_name') or None; self.data = dict(data)
+
+    @property
+    def type_label(self):
+        return str(self.data.get('type'))
+
+    def to_dict(self):
+        return dict(self.data)
+
+    def summary(self):
+        return self.data.get('details') or "정의되지 않은 액션"
+
+
+ACTION_CLASSES = {cls.code: cls for cls in (ClickAction, KeyAction, DelayAction, ColorClickAction, ColorWaitAction, ImageClickAction, LoopStartAction,
+                                             LoopEndAction, IfColorAction, ElseAction, EndIfAction, LabelAction, GotoAction,
+                                             MousePathAction, MouseDragAction)}
+# JSON 'type'은 한국어 문자열(기존 설정)과 유형 코드를 모두 받음
+_CLASS_BY_TYPE = {**{ACTION_TYPE_LABELS[code]: cls for code, cls in ACTION_CLASSES.items()}, **ACTION_CLASSES}
+
+
+def action_from_dict(data):
+    """설정 JSON의 액션 dict -> 액션 객체. 없는 필드는 기본값, 'details' 등 모르는 키는 버림"""
+    cls = _CLASS_BY_TYPE.get(data.get('type'))
+    if cls is None: return UnknownAction(data)
+    action = cls.__new__(cls); action.user_given_name = data.get('user_given_name') or None
+    for key, default in cls.FIELDS:
+        value = data.get(key)
+        setattr(action, key, default if value is None else _freeze(value))
+    return action
+
+
+def as_action(action):
+    """액션 객체는 그대로, dict(예전 형식)는 변환"""
+    return action if isinstance(action, Action) else action_from_dict(action)
+
+
+def actions_from_dicts(items):
+    return [action_from_dict(data) for data in items or []]
+
+
+def actions_to_dicts(actions):
+    return [action.to_dict() for action in actions]
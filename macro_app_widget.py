@@ -1,38 +1,74 @@
 # macro_app_widget.py
-import sys
 import time
 import json
+import math
 import os
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QListWidget, 
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QListWidget, QTableView, QHeaderView, 
                              QPushButton, QLabel, QLineEdit, QDialog, QKeySequenceEdit,
-                             QAbstractItemView, QMessageBox, QGroupBox, QDateTimeEdit, QApplication, QCheckBox, QFormLayout) # QCheckBox 추가
-from PyQt5.QtCore import Qt, QTimer, QDateTime
+                             QAbstractItemView, QMessageBox, QGroupBox, QDateTimeEdit, QCheckBox, QFormLayout, QSpinBox,
+                             QComboBox, QInputDialog, QListWidgetItem) # QCheckBox 추가
+from PyQt5.QtCore import Qt, QTimer, QDateTime, QThread, pyqtSignal
 from PyQt5.QtGui import QKeySequence
 
-from macro_action_dialog import ActionInputDialog 
-
-try:
-    from PIL import ImageGrab
-except ImportError:
-    ImageGrab = None
+from macro_runner import MacroRunnerThread
+from macro_plan import compile_plan
+from macro_action_model import ActionListModel
+from macro_capture import get_default_backend
+from macro_diagnostics import ColorFindDiagnostics
+from macro_timing import TimingProfile
+from macro_trace import ExecutionTracer
+from macro_library import MacroLibrary, Macro, DEFAULT_MACRO_NAME
+from macro_hotkeys import HotkeyDispatcher, RUN_POLICIES, RUN_POLICY_LABELS, DEFAULT_RUN_POLICY, POLICY_IGNORE, POLICY_QUEUE, POLICY_RESTART, MAX_QUEUED_RUNS
+from macro_input_arbiter import INPUT_PRIORITIES, INPUT_PRIORITY_LABELS, DEFAULT_INPUT_PRIORITY
+from macro_recorder import MacroRecorder, RECORD_STOP_KEY
+from macro_actions import ClickAction, DelayAction
+from macro_scheduler import (ScheduleQueue, Schedule, SCHEDULE_KINDS, SCHEDULE_KIND_LABELS, SCHEDULE_ONCE, SCHEDULE_INTERVAL, SCHEDULE_CRON,
+                             MAX_TIMER_WAIT_S)
 
 class MacroApp(QWidget):
     CONFIG_FILE = "macro_config.json"
+    PLAN_PRECOMPILE_DELAY_MS = 300    # 마지막 편집 후 이 시간 동안 편집이 없으면 실행 계획을 미리 컴파일
+    PRECOMPILE_MAX_ACTIONS = 5000     # 이보다 큰 매크로는 편집 중에 컴파일하지 않고 실행할 때 컴파일 (GUI가 멈추지 않도록)
+    hotkey_triggered_signal = pyqtSignal(str) # 매크로 id, pynput 리스너 스레드 -> GUI 스레드 전달용
 
     def __init__(self, pynput_mouse_module, pynput_keyboard_module):
         super().__init__()
         self.pynput_mouse = pynput_mouse_module
         self.pynput_keyboard = pynput_keyboard_module
-        self.actions_list = []
-        self.hotkey = None
-        self.hotkey_listener_thread = None
-        self.hotkey_id_str = None
-        self.scheduled_datetime = None
-        self.schedule_timer = QTimer(self)
-        self.schedule_timer.timeout.connect(self.check_schedule_and_execute)
-        self.is_schedule_active = False
+        self.macro_library = MacroLibrary.for_config(self.CONFIG_FILE) # 매크로별 파일 + 색인 (설정 파일 옆 macros/ 폴더)
+        self.current_macro = Macro(None, DEFAULT_MACRO_NAME) # 편집/실행 중인 매크로, load_config에서 라이브러리의 매크로로 교체
+        self._loading_macro = False # 매크로 전환 중에는 목록 갱신을 편집으로 보지 않음 (저장 예약 안 함)
+        self.hotkey = None # 현재 매크로의 단축키 (QKeySequence)
+        self.hotkey_dispatcher = HotkeyDispatcher(pynput_keyboard_module, self.on_hotkey_activated) # 모든 매크로 단축키를 리스너 하나로 처리
+        self.schedules = ScheduleQueue() # 모든 매크로의 예약 (다음 실행 시각 힙)
+        self.schedule_timer = QTimer(self) # 가장 이른 예약 하나에만 맞춰 거는 단발 타이머 (예약이 없으면 꺼져 있음)
+        self.schedule_timer.setSingleShot(True); self.schedule_timer.setTimerType(Qt.PreciseTimer)
+        self.schedule_timer.timeout.connect(self.on_schedule_timer)
+        self.macro_runs = {} # 매크로 id -> 실행 중인 MacroRunnerThread 목록 (동시 실행 정책이면 여러 개)
+        self.queued_runs = {} # 매크로 id -> 현재 실행이 끝난 뒤 이어서 실행할 횟수 (대기열/다시 시작 정책)
+        self.execution_plans = {} # 매크로 id -> (컴파일한 액션 목록, 실행 계획). 현재 매크로 목록이 바뀌면 무효화
+        self.plan_precompile_timer = QTimer(self) # 편집이 이어지는 동안에는 컴파일하지 않도록 디바운스
+        self.plan_precompile_timer.setSingleShot(True); self.plan_precompile_timer.setInterval(self.PLAN_PRECOMPILE_DELAY_MS)
+        self.plan_precompile_timer.timeout.connect(self.precompile_execution_plan)
+        self.recorder_thread = None # 녹화 중인 MacroRecorderThread
+        self.record_status_timer = QTimer(self); self.record_status_timer.setInterval(500) # 녹화 중 이벤트/액션 수 표시
+        self.record_status_timer.timeout.connect(self.update_recording_status)
+        self.input_controllers = None # 실행마다 새로 만들지 않고 재사용하는 pynput (마우스, 키보드) 컨트롤러
+        self.color_find_diagnostics = ColorFindDiagnostics() # 기본 비활성, load_config에서 설정 반영
+        self.timing_profile = TimingProfile() # 액션 사이 패딩, load_config에서 설정 반영
+        self.execution_tracer = ExecutionTracer() # 기본 비활성, load_config에서 설정 반영
+        self.hotkey_triggered_signal.connect(self.on_hotkey_triggered_in_gui_thread)
         self.initUI()
         self.load_config()
+        self.report_capture_backend()
+
+    @property
+    def actions_list(self): # 현재 매크로의 액션 목록
+        return self.current_macro.actions
+
+    @actions_list.setter
+    def actions_list(self, actions):
+        self.current_macro.actions = actions
 
     def initUI(self):
         self.setWindowTitle('나만의 자동 입력기 Ver 1.5 (기능 추가)')
@@ -40,18 +76,36 @@ class MacroApp(QWidget):
 
         main_layout = QVBoxLayout(self)
 
+        # --- 매크로 선택 (라이브러리) ---
+        macro_select_layout = QHBoxLayout()
+        self.macro_combo = QComboBox(); self.macro_combo.setMinimumWidth(250)
+        self.new_macro_button = QPushButton("새 매크로"); self.rename_macro_button = QPushButton("이름 변경"); self.delete_macro_button = QPushButton("매크로 삭제")
+        macro_select_layout.addWidget(QLabel("매크로:")); macro_select_layout.addWidget(self.macro_combo, 1)
+        for button in (self.new_macro_button, self.rename_macro_button, self.delete_macro_button): macro_select_layout.addWidget(button)
+        main_layout.addLayout(macro_select_layout)
+
         # --- 액션 목록 및 관리 버튼 그룹 ---
         action_list_group_box = QGroupBox("액션 목록") # 그룹박스 추가
         action_list_group_layout = QVBoxLayout() # 그룹박스 내부 레이아웃
 
         action_list_and_buttons_layout = QHBoxLayout()
-        self.action_list_widget = QListWidget()
-        self.action_list_widget.setSelectionMode(QAbstractItemView.SingleSelection)
-        self.action_list_widget.itemDoubleClicked.connect(self.edit_selected_action)
-        action_list_and_buttons_layout.addWidget(self.action_list_widget, 3)
+        self.action_model = ActionListModel(self.actions_list, self) # 표시 문자열은 보이는 행만 data()에서 생성
+        # 한 열짜리 QTableView를 목록으로 사용: QListView는 행 삽입/삭제/변경마다 모든 행을 다시 배치(행 수만큼 rowCount 호출)하지만
+        # 고정 높이 행의 QTableView는 보이는 행만 다시 그리므로 10만 개 목록에서도 편집이 즉시 반영됨
+        self.action_list_view = QTableView(); self.action_list_view.setModel(self.action_model)
+        self.action_list_view.horizontalHeader().hide(); self.action_list_view.horizontalHeader().setStretchLastSection(True)
+        vertical_header = self.action_list_view.verticalHeader(); vertical_header.hide()
+        vertical_header.setSectionResizeMode(QHeaderView.Fixed); vertical_header.setDefaultSectionSize(self.fontMetrics().height() + 6)
+        self.action_list_view.setShowGrid(False); self.action_list_view.setWordWrap(False)
+        self.action_list_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.action_list_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.action_list_view.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.action_list_view.doubleClicked.connect(self.edit_selected_action)
+        action_list_and_buttons_layout.addWidget(self.action_list_view, 3)
 
         action_buttons_layout = QVBoxLayout()
         self.add_action_button = QPushButton("➕ 액션 추가")
+        self.record_button = QPushButton("⏺ 녹화")
         self.edit_action_button = QPushButton("✏️ 액션 수정")
         self.delete_action_button = QPushButton("➖ 액션 삭제")
         self.delete_all_button = QPushButton("🗑️ 모두 삭제") # *** 모두 삭제 버튼 추가 ***
@@ -59,6 +113,7 @@ class MacroApp(QWidget):
         self.move_down_button = QPushButton("▼ 아래로 이동")
         
         action_buttons_layout.addWidget(self.add_action_button)
+        action_buttons_layout.addWidget(self.record_button)
         action_buttons_layout.addWidget(self.edit_action_button)
         action_buttons_layout.addWidget(self.delete_action_button)
         action_buttons_layout.addWidget(self.delete_all_button) # 버튼 추가
@@ -69,17 +124,20 @@ class MacroApp(QWidget):
         action_list_and_buttons_layout.addLayout(action_buttons_layout, 1)
         action_list_group_layout.addLayout(action_list_and_buttons_layout)
         
-        # --- 일괄 딜레이 체크박스 추가 ---
-        self.inter_delay_checkbox = QCheckBox("모든 액션 사이에 600ms 딜레이 자동 삽입/삭제")
-        action_list_group_layout.addWidget(self.inter_delay_checkbox)
-        # --- 일괄 딜레이 체크박스 끝 ---
+        # --- 액션 사이 딜레이 정책 (목록에 딜레이를 넣지 않고 실행할 때 적용, 매크로별로 저장) ---
+        inter_delay_layout = QHBoxLayout()
+        self.inter_delay_checkbox = QCheckBox("모든 액션 사이에 딜레이:")
+        self.inter_delay_input = QSpinBox(); self.inter_delay_input.setRange(0, 60000); self.inter_delay_input.setSuffix(" ms")
+        self.inter_delay_input.setValue(self.timing_profile.to_settings()['inter_action_ms'])
+        inter_delay_layout.addWidget(self.inter_delay_checkbox); inter_delay_layout.addWidget(self.inter_delay_input); inter_delay_layout.addStretch()
+        action_list_group_layout.addLayout(inter_delay_layout)
 
         action_list_group_box.setLayout(action_list_group_layout)
         main_layout.addWidget(action_list_group_box)
 
 
         # --- 단축키 설정 그룹 (이전과 동일) ---
-        hotkey_group_box = QGroupBox("실행 단축키 설정") # 이하 동일
+        hotkey_group_box = QGroupBox("실행 단축키 설정 (현재 매크로)")
         hotkey_form_layout = QFormLayout()
         self.hotkey_display = QLineEdit()
         self.hotkey_display.setReadOnly(True); self.hotkey_display.setPlaceholderText("설정되지 않음")
@@ -88,114 +146,304 @@ class MacroApp(QWidget):
         self.set_hotkey_button = QPushButton("단축키 설정/변경"); self.clear_hotkey_button = QPushButton("단축키 해제")
         hotkey_buttons_layout.addWidget(self.set_hotkey_button); hotkey_buttons_layout.addWidget(self.clear_hotkey_button)
         hotkey_form_layout.addRow(hotkey_buttons_layout)
+        self.run_policy_combo = QComboBox()
+        for policy in RUN_POLICIES: self.run_policy_combo.addItem(RUN_POLICY_LABELS[policy], policy)
+        hotkey_form_layout.addRow(QLabel("이미 실행 중일 때:"), self.run_policy_combo)
+        self.input_priority_combo = QComboBox() # 다른 매크로와 동시에 실행될 때 입력(클릭/키) 차례를 먼저 받는 순서
+        for priority in INPUT_PRIORITIES: self.input_priority_combo.addItem(INPUT_PRIORITY_LABELS[priority], priority)
+        hotkey_form_layout.addRow(QLabel("입력 우선순위:"), self.input_priority_combo)
         hotkey_group_box.setLayout(hotkey_form_layout); main_layout.addWidget(hotkey_group_box)
         
-        # --- 예약 실행 설정 그룹 (이전과 동일) ---
-        schedule_group_box = QGroupBox("예약 실행 설정") # 이하 동일
+        # --- 예약 실행 설정 그룹 (현재 매크로에 예약 추가, 목록은 모든 매크로의 예약) ---
+        schedule_group_box = QGroupBox("예약 실행 설정")
         schedule_form_layout = QFormLayout()
         self.schedule_datetime_edit = QDateTimeEdit(self)
         self.schedule_datetime_edit.setDateTime(QDateTime.currentDateTime().addSecs(300))
         self.schedule_datetime_edit.setCalendarPopup(True); self.schedule_datetime_edit.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
         schedule_form_layout.addRow(QLabel("실행 시간:"), self.schedule_datetime_edit)
+        self.schedule_kind_combo = QComboBox()
+        for kind in SCHEDULE_KINDS: self.schedule_kind_combo.addItem(SCHEDULE_KIND_LABELS[kind], kind)
+        schedule_form_layout.addRow(QLabel("반복:"), self.schedule_kind_combo)
+        self.schedule_interval_input = QSpinBox(); self.schedule_interval_input.setRange(1, 7 * 24 * 3600); self.schedule_interval_input.setValue(600)
+        self.schedule_interval_input.setSuffix(" 초")
+        schedule_form_layout.addRow(QLabel("간격:"), self.schedule_interval_input)
+        self.schedule_cron_input = QLineEdit(); self.schedule_cron_input.setPlaceholderText("분 시 일 월 요일 (예: */15 9-18 * * 1-5)")
+        schedule_form_layout.addRow(QLabel("cron 식:"), self.schedule_cron_input)
+        self.schedule_list_widget = QListWidget(); self.schedule_list_widget.setMaximumHeight(90)
+        schedule_form_layout.addRow(self.schedule_list_widget)
         self.schedule_status_label = QLabel("예약 없음")
-        schedule_form_layout.addRow(QLabel("예약 상태:"), self.schedule_status_label)
+        schedule_form_layout.addRow(QLabel("다음 실행:"), self.schedule_status_label)
         schedule_buttons_layout = QHBoxLayout()
-        self.set_schedule_button = QPushButton("예약 설정"); self.cancel_schedule_button = QPushButton("예약 취소")
+        self.set_schedule_button = QPushButton("예약 추가"); self.cancel_schedule_button = QPushButton("선택한 예약 삭제")
         self.cancel_schedule_button.setEnabled(False)
         schedule_buttons_layout.addWidget(self.set_schedule_button); schedule_buttons_layout.addWidget(self.cancel_schedule_button)
         schedule_form_layout.addRow(schedule_buttons_layout)
         schedule_group_box.setLayout(schedule_form_layout); main_layout.addWidget(schedule_group_box)
 
+        # --- 색 찾기 진단 기록 그룹 ---
+        diagnostics_group_box = QGroupBox("색 찾기 진단 기록")
+        diagnostics_layout = QHBoxLayout()
+        self.diagnostics_checkbox = QCheckBox("최근 검색 화면 기록 (실패 시 저장)")
+        self.diagnostics_capacity_input = QSpinBox(); self.diagnostics_capacity_input.setRange(1, 500)
+        self.diagnostics_capacity_input.setValue(self.color_find_diagnostics.capacity); self.diagnostics_capacity_input.setSuffix(" 개")
+        self.dump_diagnostics_button = QPushButton("기록 지금 저장")
+        diagnostics_layout.addWidget(self.diagnostics_checkbox); diagnostics_layout.addWidget(QLabel("보관:"))
+        diagnostics_layout.addWidget(self.diagnostics_capacity_input); diagnostics_layout.addWidget(self.dump_diagnostics_button)
+        diagnostics_group_box.setLayout(diagnostics_layout); main_layout.addWidget(diagnostics_group_box)
+
+        # --- 실행 타이밍 (액션 사이 패딩) 그룹 ---
+        timing_group_box = QGroupBox("실행 타이밍 (액션 사이 여유 시간, 0 = 없음)")
+        timing_layout = QHBoxLayout(); self.timing_inputs = {}
+        for key, label in (('pre_action_ms', "액션 전:"), ('post_move_ms', "이동 후:"), ('post_action_ms', "액션 후:"), ('modifier_tap_ms', "보조키 사이:")):
+            spin = QSpinBox(); spin.setRange(0, 5000); spin.setSuffix(" ms"); spin.setValue(self.timing_profile.to_settings()[key])
+            timing_layout.addWidget(QLabel(label)); timing_layout.addWidget(spin); self.timing_inputs[key] = spin
+        timing_group_box.setLayout(timing_layout); main_layout.addWidget(timing_group_box)
+
+        # --- 실행 추적 그룹 ---
+        tracing_group_box = QGroupBox("실행 추적")
+        tracing_layout = QHBoxLayout()
+        self.tracing_checkbox = QCheckBox("액션별 실행 시간 기록 (캡처/검색/입력 단계 포함)")
+        self.export_trace_button = QPushButton("추적 내보내기 (JSON/CSV)")
+        tracing_layout.addWidget(self.tracing_checkbox); tracing_layout.addWidget(self.export_trace_button)
+        tracing_group_box.setLayout(tracing_layout); main_layout.addWidget(tracing_group_box)
+
+        run_control_layout = QHBoxLayout()
+        self.run_now_button = QPushButton("▶ 지금 실행"); self.stop_run_button = QPushButton("⏹ 실행 중지")
+        self.stop_run_button.setEnabled(False)
+        run_control_layout.addWidget(self.run_now_button); run_control_layout.addWidget(self.stop_run_button)
+        main_layout.addLayout(run_control_layout)
+
         self.status_label = QLabel("준비 완료.")
         self.status_label.setStyleSheet("padding: 5px; background-color: #e9e9e9; border: 1px solid #cccccc;")
         main_layout.addWidget(self.status_label)
 
         # 시그널 연결
+        self.macro_combo.currentIndexChanged.connect(self.on_macro_selected)
+        self.new_macro_button.clicked.connect(self.create_new_macro)
+        self.rename_macro_button.clicked.connect(self.rename_current_macro)
+        self.delete_macro_button.clicked.connect(self.delete_current_macro)
         self.add_action_button.clicked.connect(self.add_new_action)
+        self.record_button.clicked.connect(self.toggle_recording)
         self.edit_action_button.clicked.connect(self.edit_selected_action)
         self.delete_action_button.clicked.connect(self.delete_selected_action)
         self.delete_all_button.clicked.connect(self.delete_all_actions) # *** 모두 삭제 연결 ***
         self.set_hotkey_button.clicked.connect(self.set_hotkey_dialog)
         self.clear_hotkey_button.clicked.connect(self.clear_hotkey_user_action)
+        self.run_policy_combo.currentIndexChanged.connect(self.on_run_policy_changed)
+        self.input_priority_combo.currentIndexChanged.connect(self.on_input_priority_changed)
         self.move_up_button.clicked.connect(self.move_action_up)
         self.move_down_button.clicked.connect(self.move_action_down)
         self.set_schedule_button.clicked.connect(self.set_schedule)
         self.cancel_schedule_button.clicked.connect(self.cancel_schedule_user_action)
-        self.inter_delay_checkbox.stateChanged.connect(self.toggle_inter_action_delay) # *** 딜레이 체크박스 연결 ***
+        self.schedule_kind_combo.currentIndexChanged.connect(self.update_schedule_inputs)
+        self.schedule_list_widget.itemSelectionChanged.connect(lambda: self.cancel_schedule_button.setEnabled(bool(self.schedule_list_widget.selectedItems())))
+        self.update_schedule_inputs()
+        self.inter_delay_checkbox.toggled.connect(self.on_timing_settings_changed)
+        self.inter_delay_input.valueChanged.connect(self.on_timing_settings_changed)
+        self.run_now_button.clicked.connect(self.execute_actions)
+        self.stop_run_button.clicked.connect(self.stop_running_macro)
+        self.diagnostics_checkbox.toggled.connect(self.on_diagnostics_settings_changed)
+        self.diagnostics_capacity_input.valueChanged.connect(self.on_diagnostics_settings_changed)
+        self.dump_diagnostics_button.clicked.connect(self.dump_diagnostics_now)
+        for spin in self.timing_inputs.values(): spin.valueChanged.connect(self.on_timing_settings_changed)
+        self.tracing_checkbox.toggled.connect(self.on_tracing_toggled)
+        self.export_trace_button.clicked.connect(self.export_execution_traces)
 
 
     def update_status(self, message): # 이전과 동일
-        current_time = time.strftime('%H:%M:%S'); log_message = f"[{current_time}] {message}"
+        now = time.time(); current_time = f"{time.strftime('%H:%M:%S', time.localtime(now))}.{int(now * 1000) % 1000:03d}" # ms 단위까지 표시
+        log_message = f"[{current_time}] {message}"
         self.status_label.setText(log_message); print(log_message)
 
-    def save_config(self): # user_given_name 저장 로직은 ActionInputDialog에서 처리, 여기선 actions_list 그대로 저장
-        config_data = {'actions': self.actions_list, 'hotkey': self.hotkey.toString(QKeySequence.PortableText) if self.hotkey and not self.hotkey.isEmpty() else None}
+    def report_capture_backend(self): # 시작 시 선택된 (가장 빠른) 화면 캡처 백엔드 표시
+        worker_backend = get_default_backend(); gui_backend = get_default_backend(gui_thread=True)
+        if worker_backend is None: self.update_status("경고: 화면 캡처 라이브러리(mss/Pillow)가 없어 '색 찾기' 액션을 사용할 수 없습니다.")
+        else: self.update_status(f"화면 캡처 백엔드: 실행={worker_backend.name}, 돋보기={gui_backend.name if gui_backend else '없음'}")
+
+    def save_config(self): # 전역 설정만 저장 (액션 목록/타이밍은 매크로별 파일, 단축키는 라이브러리 색인에 저장됨). 디바운스 후 백그라운드에서 원자적으로 기록
+        config_data = {'diagnostics': self.color_find_diagnostics.to_settings(), 'tracing': self.execution_tracer.to_settings(),
+                       'active_macro': self.current_macro.macro_id, 'schedules': self.schedules.to_list()}
+        self.macro_library.writer.schedule(os.path.abspath(self.CONFIG_FILE), lambda: config_data, indent=4)
+
+    def load_config(self): # 전역 설정 로드 후 매크로 라이브러리를 열고 마지막으로 사용한 매크로를 선택
+        config_data = {}
+        if not os.path.exists(self.CONFIG_FILE): self.update_status(f"설정 파일 '{self.CONFIG_FILE}' 없음. 기본 설정 시작.")
+        else:
+            try:
+                with open(self.CONFIG_FILE, 'r', encoding='utf-8') as f: config_data = json.load(f)
+                self.apply_diagnostics_settings(config_data.get('diagnostics'))
+                self.apply_tracing_settings(config_data.get('tracing'))
+                self.update_status(f"설정이 '{self.CONFIG_FILE}'에서 로드되었습니다.")
+            except json.JSONDecodeError as e:
+                self.update_status(f"설정 파일 '{self.CONFIG_FILE}' 파싱 오류: {e}. 기본 설정 시작."); QMessageBox.warning(self, "로드 오류", f"설정 파일 JSON 분석 오류:\n{e}")
+                config_data = {}
+            except Exception as e:
+                self.update_status(f"설정 로드 중 오류: {e}. 기본 설정 시작."); QMessageBox.critical(self, "로드 오류", f"설정 로드 오류:\n{e}")
+                config_data = {}
+        self.open_macro_library(config_data)
+
+    def open_macro_library(self, config_data):
+        library = self.macro_library
+        try: library.load_index()
+        except (OSError, ValueError, KeyError) as e: # 색인 손상: 매크로 파일들로 다시 만듦
+            self.update_status(f"매크로 색인 '{library.index_path}' 로드 실패 ({e}). 매크로 파일에서 색인을 다시 만듭니다.")
+            library.rebuild_index()
+        try: migrated = library.migrate_legacy_config(config_data)
+        except OSError as e: migrated = None; self.update_status(f"기존 액션 목록을 매크로 라이브러리로 옮기지 못했습니다: {e}")
+        if migrated is not None:
+            config_data['active_macro'] = migrated.macro_id
+            self.update_status(f"기존 설정의 액션 {len(migrated.actions)}개를 매크로 '{migrated.name}'(으)로 옮겼습니다.")
+        if not len(library): library.create(DEFAULT_MACRO_NAME)
+        active_id = config_data.get('active_macro')
+        if active_id not in library.ids(): active_id = library.ids()[0]
+        legacy_hotkey = config_data.get('hotkey') # 예전 설정의 전역 단축키는 열리는 매크로의 단축키로 옮김
+        if legacy_hotkey and not any(library.hotkey(macro_id) for macro_id in library.ids()):
+            library.set_binding(active_id, legacy_hotkey, library.run_policy(active_id))
+        self.register_macro_hotkeys()
+        self.load_schedules(config_data.get('schedules'))
+        self.refresh_macro_selector()
+        if not self.switch_macro(active_id): self.switch_macro(library.create(DEFAULT_MACRO_NAME).macro_id)
+
+    def refresh_macro_selector(self):
+        self.macro_combo.blockSignals(True); self.macro_combo.clear()
+        for macro_id in self.macro_library.ids(): self.macro_combo.addItem(self.macro_library.name_of(macro_id), macro_id)
+        self.macro_combo.setCurrentIndex(max(0, self.macro_combo.findData(self.current_macro.macro_id)))
+        self.macro_combo.blockSignals(False)
+        self.delete_macro_button.setEnabled(len(self.macro_library) > 1)
+
+    def switch_macro(self, macro_id): # 매크로 본문은 처음 선택할 때 읽음
+        try: macro = self.macro_library.get(macro_id)
+        except (OSError, ValueError, KeyError) as e:
+            self.update_status(f"매크로 로드 실패: {e}"); QMessageBox.warning(self, "매크로 로드 오류", f"매크로를 읽을 수 없습니다:\n{e}")
+            self.refresh_macro_selector(); return False
+        self.current_macro = macro
+        self._loading_macro = True
         try:
-            with open(self.CONFIG_FILE, 'w', encoding='utf-8') as f: json.dump(config_data, f, ensure_ascii=False, indent=4)
-            self.update_status(f"설정이 '{self.CONFIG_FILE}'에 저장되었습니다.")
-        except IOError as e: self.update_status(f"설정 저장 실패: {e}"); QMessageBox.warning(self, "저장 오류", f"파일 저장 중 오류:\n{e}")
+            self.apply_timing_settings(macro.timing) # 액션 사이 딜레이 정책 포함
+            self.update_action_list_widget()
+        finally: self._loading_macro = False
+        self.refresh_macro_selector(); self.show_current_macro_binding(); self.update_run_buttons()
+        self.save_config() # 마지막으로 사용한 매크로 기억
+        self.update_status(f"매크로 '{macro.name}' 열림 ({len(macro.actions)}개 액션).")
+        return True
+
+    def on_macro_selected(self, index):
+        macro_id = self.macro_combo.itemData(index)
+        if macro_id is not None and macro_id != self.current_macro.macro_id: self.switch_macro(macro_id)
+
+    def mark_current_macro_dirty(self): # 편집할 때마다 호출: 현재 매크로 파일과 색인만 디바운스 저장
+        if self.current_macro.macro_id is not None: self.macro_library.mark_dirty(self.current_macro)
+
+    def create_new_macro(self):
+        name, ok = QInputDialog.getText(self, "새 매크로", "매크로 이름:", text=self.macro_library.unique_name("새 매크로"))
+        if not ok or not name.strip(): return
+        macro = self.macro_library.create(name.strip())
+        self.switch_macro(macro.macro_id)
+
+    def rename_current_macro(self):
+        name, ok = QInputDialog.getText(self, "매크로 이름 변경", "새 이름:", text=self.current_macro.name)
+        if not ok or not name.strip() or name.strip() == self.current_macro.name: return
+        new_name = self.macro_library.rename(self.current_macro.macro_id, name.strip())
+        self.refresh_macro_selector(); self.refresh_schedule_list(); self.update_status(f"매크로 이름이 '{new_name}'(으)로 변경되었습니다.")
+
+    def delete_current_macro(self):
+        if len(self.macro_library) <= 1: QMessageBox.information(self, "알림", "마지막 남은 매크로는 삭제할 수 없습니다."); return
+        macro = self.current_macro
+        reply = QMessageBox.question(self, "매크로 삭제 확인", f"매크로 '{macro.name}'을(를) 삭제하시겠습니까?\n이 작업은 되돌릴 수 없습니다.",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply != QMessageBox.Yes: return
+        try: self.macro_library.delete(macro.macro_id)
+        except OSError as e: self.update_status(f"매크로 삭제 실패: {e}"); return
+        self.hotkey_dispatcher.unbind(macro.macro_id); self.execution_plans.pop(macro.macro_id, None); self.queued_runs.pop(macro.macro_id, None)
+        if self.schedules.remove_macro(macro.macro_id): self.arm_schedule_timer()
+        self.switch_macro(self.macro_library.ids()[0])
+        self.update_status(f"매크로 '{macro.name}'이(가) 삭제되었습니다.")
+
+    def apply_diagnostics_settings(self, settings):
+        self.color_find_diagnostics = ColorFindDiagnostics.from_settings(settings)
+        for w in (self.diagnostics_checkbox, self.diagnostics_capacity_input): w.blockSignals(True)
+        self.diagnostics_checkbox.setChecked(self.color_find_diagnostics.enabled)
+        self.diagnostics_capacity_input.setValue(self.color_find_diagnostics.capacity)
+        for w in (self.diagnostics_checkbox, self.diagnostics_capacity_input): w.blockSignals(False)
+
+    def apply_timing_settings(self, settings):
+        self.timing_profile = TimingProfile.from_settings(settings); values = self.timing_profile.to_settings()
+        for key, spin in list(self.timing_inputs.items()) + [('inter_action_ms', self.inter_delay_input)]:
+            spin.blockSignals(True); spin.setValue(values[key]); spin.blockSignals(False)
+        self.inter_delay_checkbox.blockSignals(True); self.inter_delay_checkbox.setChecked(values['inter_action_enabled']); self.inter_delay_checkbox.blockSignals(False)
+        self.inter_delay_input.setEnabled(values['inter_action_enabled'])
+
+    def on_timing_settings_changed(self, *_):
+        settings = {key: spin.value() for key, spin in self.timing_inputs.items()}
+        settings.update(inter_action_enabled=self.inter_delay_checkbox.isChecked(), inter_action_ms=self.inter_delay_input.value())
+        self.inter_delay_input.setEnabled(self.inter_delay_checkbox.isChecked())
+        self.timing_profile = TimingProfile.from_settings(settings)
+        self.current_macro.timing = self.timing_profile.to_settings(); self.mark_current_macro_dirty()
+
+    def apply_tracing_settings(self, settings):
+        self.execution_tracer = ExecutionTracer.from_settings(settings)
+        self.tracing_checkbox.blockSignals(True); self.tracing_checkbox.setChecked(self.execution_tracer.enabled); self.tracing_checkbox.blockSignals(False)
+
+    def on_tracing_toggled(self, checked):
+        self.execution_tracer.enabled = checked
+        self.save_config()
 
-    def load_config(self): # user_given_name 로드 로직은 ActionInputDialog에서 처리, 여기선 actions_list 그대로 로드
-        if not os.path.exists(self.CONFIG_FILE): self.update_status(f"설정 파일 '{self.CONFIG_FILE}' 없음. 기본 설정 시작."); return
+    def export_execution_traces(self):
+        runs = self.execution_tracer.runs()
+        if not runs: self.update_status("내보낼 실행 추적 기록이 없습니다. (추적을 켜고 매크로를 실행하세요)"); return
         try:
-            with open(self.CONFIG_FILE, 'r', encoding='utf-8') as f: config_data = json.load(f)
-            self.actions_list = config_data.get('actions', []); 
-            
-            # 로드 후 inter_delay_checkbox 상태 업데이트 (auto_inserted 플래그 기반)
-            has_auto_inserted_delay = any(action.get('auto_inserted', False) for action in self.actions_list if action['type'] == '딜레이')
-            self.inter_delay_checkbox.blockSignals(True) # 상태 변경 시그널 임시 비활성화
-            self.inter_delay_checkbox.setChecked(has_auto_inserted_delay)
-            self.inter_delay_checkbox.blockSignals(False)
-
-            self.update_action_list_widget() # UI 업데이트 먼저
-
-            hotkey_str = config_data.get('hotkey')
-            if hotkey_str:
-                self.hotkey = QKeySequence.fromString(hotkey_str, QKeySequence.PortableText)
-                if self.hotkey and not self.hotkey.isEmpty():
-                    self.hotkey_display.setText(self.hotkey.toString(QKeySequence.NativeText))
-                    if self.setup_hotkey_listener(): self.update_status(f"저장된 단축키 '{self.hotkey_display.text()}' 로드 및 리스너 설정됨.")
-                    else: self.update_status(f"저장된 단축키 '{self.hotkey_display.text()}' 리스너 설정 실패."); self.clear_hotkey_internal_logic()
-                else: self.hotkey = None; self.hotkey_display.clear(); self.hotkey_display.setPlaceholderText("설정되지 않음"); self.update_status(f"저장된 단축키 문자열 '{hotkey_str}' 유효하지 않음.")
-            else: self.hotkey = None; self.hotkey_display.clear(); self.hotkey_display.setPlaceholderText("설정되지 않음")
-            self.update_status(f"설정이 '{self.CONFIG_FILE}'에서 로드되었습니다.")
-        except json.JSONDecodeError as e:
-            self.update_status(f"설정 파일 '{self.CONFIG_FILE}' 파싱 오류: {e}. 기본 설정 시작."); QMessageBox.warning(self, "로드 오류", f"설정 파일 JSON 분석 오류:\n{e}")
-            self.actions_list = []; self.update_action_list_widget(); self.clear_hotkey_internal_logic()
-        except Exception as e:
-            self.update_status(f"설정 로드 중 오류: {e}. 기본 설정 시작."); QMessageBox.critical(self, "로드 오류", f"설정 로드 오류:\n{e}")
-            self.actions_list = []; self.update_action_list_widget(); self.clear_hotkey_internal_logic()
+            json_path, csv_path = self.execution_tracer.export()
+            self.update_status(f"실행 추적 {len(runs)}회분 저장: {json_path}, {csv_path}")
+        except OSError as e: self.update_status(f"실행 추적 저장 실패: {e}"); QMessageBox.warning(self, "저장 오류", f"추적 저장 중 오류:\n{e}")
+
+    def on_diagnostics_settings_changed(self, *_):
+        self.color_find_diagnostics.enabled = self.diagnostics_checkbox.isChecked()
+        if self.diagnostics_capacity_input.value() != self.color_find_diagnostics.capacity:
+            self.color_find_diagnostics.set_capacity(self.diagnostics_capacity_input.value())
+        if not self.color_find_diagnostics.enabled: self.color_find_diagnostics.clear()
+        self.save_config()
+
+    def dump_diagnostics_now(self):
+        count = self.color_find_diagnostics.dump(reason="request")
+        if count: self.update_status(f"진단 기록 {count}건을 '{self.color_find_diagnostics.output_dir}' 폴더에 저장합니다 (백그라운드).")
+        else: self.update_status("저장할 진단 기록이 없습니다. (기록이 꺼져 있거나 아직 '색 찾기'가 실행되지 않음)")
+
+    def current_action_row(self):
+        index = self.action_list_view.currentIndex()
+        return index.row() if index.isValid() else -1
+
+    def select_action_row(self, row):
+        index = self.action_model.index(row)
+        self.action_list_view.setCurrentIndex(index); self.action_list_view.scrollTo(index)
 
     def add_new_action(self): # 이전과 동일
-        dialog = ActionInputDialog(self.update_status, self.pynput_mouse, self.pynput_keyboard, self)
+        from macro_action_dialog import ActionInputDialog # 대화상자/돋보기 관련 모듈은 처음 열 때 로드
+        dialog = ActionInputDialog(self.update_status, self.pynput_mouse, self.pynput_keyboard, self, config_file=self.CONFIG_FILE)
         if dialog.exec_() == QDialog.Accepted:
             action_data = dialog.action_data
             if action_data:
-                # 일괄 딜레이 체크 상태에 따라 새 액션 뒤에 딜레이 추가 (선택적)
-                # 현재는 toggle_inter_action_delay 에서 일괄 처리하므로 여기서는 추가 안 함.
-                self.actions_list.append(action_data)
-                self.update_action_list_widget()
-                self.update_status(f"액션 추가됨: {action_data.get('user_given_name') or action_data['details']}")
+                self.action_model.append_action(action_data); self.on_actions_edited()
+                self.select_action_row(len(self.actions_list) - 1)
+                self.update_status(f"액션 추가됨: {action_data.display_name()}")
 
 
     def edit_selected_action(self): # 이전과 동일
-        current_row = self.action_list_widget.currentRow()
+        current_row = self.current_action_row()
         if current_row < 0: QMessageBox.warning(self, "선택 오류", "수정할 액션을 선택하세요."); self.update_status("액션 수정 시도: 선택된 항목 없음."); return
         action_to_edit = self.actions_list[current_row]
-        dialog = ActionInputDialog(self.update_status, self.pynput_mouse, self.pynput_keyboard, self, action_to_edit=action_to_edit)
+        from macro_action_dialog import ActionInputDialog
+        dialog = ActionInputDialog(self.update_status, self.pynput_mouse, self.pynput_keyboard, self, action_to_edit=action_to_edit, config_file=self.CONFIG_FILE)
         if dialog.exec_() == QDialog.Accepted:
             updated_action_data = dialog.action_data
             if updated_action_data:
-                self.actions_list[current_row] = updated_action_data
-                self.update_action_list_widget(); self.action_list_widget.setCurrentRow(current_row)
-                self.update_status(f"액션 수정됨: {updated_action_data.get('user_given_name') or updated_action_data['details']}")
+                self.action_model.replace_action(current_row, updated_action_data); self.on_actions_edited()
+                self.update_status(f"액션 수정됨: {updated_action_data.display_name()}")
 
     def delete_selected_action(self): # 이전과 동일
-        current_row = self.action_list_widget.currentRow()
+        current_row = self.current_action_row()
         if current_row >= 0: 
-            removed_action = self.actions_list.pop(current_row)
-            self.update_action_list_widget()
-            self.update_status(f"액션 삭제됨: {removed_action.get('user_given_name') or removed_action['details']}")
+            removed_action = self.action_model.remove_action(current_row); self.on_actions_edited()
+            self.update_status(f"액션 삭제됨: {removed_action.display_name()}")
         else: QMessageBox.warning(self, "선택 오류", "삭제할 액션을 선택해주세요.")
 
     # *** 모두 삭제 기능 메서드 ***
@@ -208,123 +456,70 @@ class MacroApp(QWidget):
                                      "정말로 모든 액션을 삭제하시겠습니까?\n이 작업은 되돌릴 수 없습니다.",
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
-            self.actions_list.clear()
-            self.update_action_list_widget()
+            self.action_model.clear_actions(); self.on_actions_edited()
             self.update_status("모든 액션이 삭제되었습니다.")
-            # 일괄 딜레이 체크박스도 초기화 (선택적)
-            self.inter_delay_checkbox.blockSignals(True)
-            self.inter_delay_checkbox.setChecked(False)
-            self.inter_delay_checkbox.blockSignals(False)
 
 
     def move_action_up(self): # 이전과 동일
-        current_row = self.action_list_widget.currentRow()
-        if current_row > 0:
-            action = self.actions_list.pop(current_row)
-            self.actions_list.insert(current_row - 1, action)
-            self.update_action_list_widget(); self.action_list_widget.setCurrentRow(current_row - 1)
-            self.update_status(f"액션 '{action.get('user_given_name') or action['details']}' 위로 이동됨.")
+        current_row = self.current_action_row()
+        if current_row > 0 and self.action_model.move_action(current_row, current_row - 1):
+            self.on_actions_edited(); self.select_action_row(current_row - 1)
+            action = self.actions_list[current_row - 1]
+            self.update_status(f"액션 '{action.display_name()}' 위로 이동됨.")
 
     def move_action_down(self): # 이전과 동일
-        current_row = self.action_list_widget.currentRow()
-        if current_row >= 0 and current_row < len(self.actions_list) - 1:
-            action = self.actions_list.pop(current_row)
-            self.actions_list.insert(current_row + 1, action)
-            self.update_action_list_widget(); self.action_list_widget.setCurrentRow(current_row + 1)
-            self.update_status(f"액션 '{action.get('user_given_name') or action['details']}' 아래로 이동됨.")
-
-    def update_action_list_widget(self): # 사용자 지정 이름 반영
-        self.action_list_widget.clear()
-        for i, action_data in enumerate(self.actions_list):
-            display_name = action_data.get('user_given_name')
-            details = action_data.get('details', '정의되지 않은 액션')
-            if display_name: # 사용자 이름이 있으면
-                # "이름 (자동 상세)" 또는 "이름"만 표시 등 선택 가능
-                # 여기서는 자동 상세 설명을 괄호 안에 표시
-                # details에서 사용자 이름 부분을 제외하고 표시하도록 수정 필요 (현재 details에 이미 이름이 포함될 수 있음)
-                # get_action_data 에서 details 생성 시 user_given_name을 반영하므로, 여기서는 details만 써도 됨.
-                # 단, get_action_data의 details 생성 방식을 일관되게 해야 함.
-                # ActionInputDialog.get_action_data 수정: 'details'는 순수 자동 설명, 'display_text'를 새로 만들거나 여기서 조합
-                list_item_text = f"{i+1}. {details}" # get_action_data에서 details에 이미 이름 반영
-            else:
-                list_item_text = f"{i+1}. {details}"
-            self.action_list_widget.addItem(list_item_text)
-
-    # --- 일괄 딜레이 삽입/삭제 메서드 ---
-    def toggle_inter_action_delay(self, state):
-        is_checked = (state == Qt.Checked)
-        delay_action_template = {'type': '딜레이', 'duration_ms': 600, 
-                                 'details': '자동 삽입된 600ms 대기', 
-                                 'auto_inserted': True,
-                                 'user_given_name': None} # 자동 삽입 딜레이에는 사용자 이름 없음
-
-        if is_checked:
-            self.update_status("액션 사이에 600ms 딜레이 삽입 중...")
-            new_actions_list = []
-            for i, action in enumerate(self.actions_list):
-                new_actions_list.append(action)
-                # 마지막 액션이 아니고, 현재 액션이나 다음 액션이 자동 삽입된 딜레이가 아닐 경우에만 추가
-                if i < len(self.actions_list) - 1:
-                    is_current_auto_delay = action.get('auto_inserted', False) and action['type'] == '딜레이'
-                    # 다음 액션이 자동 삽입된 딜레이인지 미리 보기는 어려우므로,
-                    # 일단 추가하고 나중에 중복 제거하는 방식 또는,
-                    # 현재 액션 뒤에 무조건 추가 후, 다음 액션이 auto_inserted 딜레이면 그것을 건너뛰는 방식.
-                    # 여기서는 더 간단하게, 현재 액션이 딜레이가 아니면 그 뒤에 추가.
-                    if not (action['type'] == '딜레이' and action.get('auto_inserted', False)):
-                         # 다음 액션이 이미 자동 딜레이인지 확인 (더 복잡한 로직 필요 시)
-                         # 현재는 단순하게, 현재 액션과 다음 액션 사이에 딜레이가 필요한지 판단하여 삽입
-                         # 이미 사용자 정의 딜레이가 있거나, 다음 액션이 자동딜레이인 경우 등 고려하면 복잡해짐
-                         # 가장 단순하게: 액션 뒤에, 만약 그 액션이 auto_inserted 딜레이가 아니라면, 딜레이 추가
-                        new_actions_list.append(delay_action_template.copy())
-            
-            # 위 로직은 너무 많은 딜레이를 만들 수 있음. 정확한 "사이" 로직으로 변경:
-            if is_checked:
-                new_actions_list_with_delays = []
-                for i, current_action in enumerate(self.actions_list):
-                    new_actions_list_with_delays.append(current_action)
-                    # 마지막 액션이 아니고, 현재 액션이 자동 삽입된 딜레이가 아닐 경우에만 뒤에 딜레이 추가
-                    if i < len(self.actions_list) - 1 and not (current_action.get('auto_inserted') and current_action['type'] == '딜레이'):
-                        # 다음 액션이 자동 삽입된 딜레이가 아닌 경우에만 추가
-                        # (하지만 다음 액션은 아직 new_actions_list_with_delays에 없음)
-                        # -> 기존 리스트를 기준으로 판단해야 함.
-                        # 기존 리스트에서 현재 액션과 다음 액션 사이에 자동딜레이가 없다면 추가.
-                        # 이 방식은 복잡하므로, 일단 단순하게 "모든 non-auto-delay 액션 뒤에 추가 (마지막 제외)"
-                        new_actions_list_with_delays.append(delay_action_template.copy())
-                
-                # 위 로직도 여전히 문제 소지가 있음.
-                # 가장 확실한 방법:
-                # 1. 먼저 모든 auto_inserted 딜레이를 제거한다.
-                # 2. 그 후, 액션 사이에 auto_inserted 딜레이를 삽입한다.
-                self.actions_list = [act for act in self.actions_list if not act.get('auto_inserted')]
-                
-                final_actions_list = []
-                for i, action in enumerate(self.actions_list):
-                    final_actions_list.append(action)
-                    if i < len(self.actions_list) - 1: # 마지막 액션 뒤에는 추가 안 함
-                        final_actions_list.append(delay_action_template.copy())
-                self.actions_list = final_actions_list
-                self.update_status("모든 액션 사이에 600ms 딜레이가 삽입되었습니다.")
-
-        else: # 체크 해제 시
-            self.update_status("자동 삽입된 딜레이 삭제 중...")
-            self.actions_list = [action for action in self.actions_list if not action.get('auto_inserted')]
-            self.update_status("자동 삽입된 모든 600ms 딜레이가 삭제되었습니다.")
-        
-        self.update_action_list_widget()
-
-
-    # set_hotkey_dialog, get_pynput_hotkey_str, stop_existing_hotkey_listener, setup_hotkey_listener,
-    # on_hotkey_activated, _clear_hotkey_state_variables_no_ui_change, clear_hotkey_internal_logic,
-    # clear_hotkey_user_action: 이전과 동일 (개선된 버전 사용)
-    # set_schedule, check_schedule_and_execute, cancel_schedule_internal, cancel_schedule_user_action: 이전과 동일
-    # execute_actions: 이전과 동일 (키보드 조합키 처리는 여전히 TODO)
-    # closeEvent: 이전과 동일
-
-    # 복사/붙여넣기 할 이전 메서드들 (MacroApp의 set_hotkey_dialog 부터 closeEvent 까지)
-    # ... (이전 답변의 MacroApp 코드에서 해당 부분 복사) ...
+        current_row = self.current_action_row()
+        if current_row >= 0 and self.action_model.move_action(current_row, current_row + 1):
+            self.on_actions_edited(); self.select_action_row(current_row + 1)
+            action = self.actions_list[current_row + 1]
+            self.update_status(f"액션 '{action.display_name()}' 아래로 이동됨.")
+
+    def toggle_recording(self): # 녹화 시작/중지. 녹화된 액션은 선택한 행 다음(없으면 끝)에 삽입
+        if self.recorder_thread is not None: self.recorder_thread.stop_listener(); return
+        if self.is_macro_running(): QMessageBox.warning(self, "녹화 불가", "매크로 실행 중에는 녹화할 수 없습니다."); return
+        from macro_input_listeners import MacroRecorderThread
+        self.recorder_thread = MacroRecorderThread(self.pynput_mouse, self.pynput_keyboard, MacroRecorder(self.pynput_keyboard), self)
+        self.recorder_thread.recording_finished_signal.connect(self.on_recording_finished)
+        self.recorder_thread.capture_failed_signal.connect(self.update_status)
+        self.recorder_thread.start(); self.record_status_timer.start()
+        self.record_button.setText(f"⏹ 녹화 중지 ({RECORD_STOP_KEY})")
+        self.update_status(f"녹화 중... 클릭과 키 입력이 액션으로 기록됩니다. '{RECORD_STOP_KEY}' 키나 '녹화 중지' 버튼으로 끝냅니다.")
+
+    def update_recording_status(self): # 로그에 남기지 않고 상태 표시만 갱신
+        if self.recorder_thread is not None:
+            recorder = self.recorder_thread.recorder
+            self.status_label.setText(f"녹화 중... 입력 이벤트 {recorder.raw_events}개 -> 액션 {len(recorder)}개")
+
+    def on_recording_finished(self, actions):
+        thread = self.recorder_thread; self.recorder_thread = None
+        if thread is None: return # 창을 닫으며 중지한 녹화
+        self.record_status_timer.stop(); self.record_button.setText("⏺ 녹화")
+        thread.wait(1000)
+        # '녹화 중지' 버튼을 누른 클릭(과 그 앞 딜레이)은 녹화에서 뺌
+        if not thread.stopped_by_key and actions and type(actions[-1]) is ClickAction and self.frameGeometry().contains(actions[-1].x, actions[-1].y):
+            actions.pop()
+            if actions and type(actions[-1]) is DelayAction: actions.pop()
+        recorder = thread.recorder
+        if not actions: self.update_status(f"녹화 종료: 기록된 액션이 없습니다 (입력 이벤트 {recorder.raw_events}개)."); return
+        current_row = self.current_action_row(); row = current_row + 1 if current_row >= 0 else len(self.actions_list)
+        self.action_model.insert_actions(row, actions); self.on_actions_edited()
+        self.select_action_row(row + len(actions) - 1)
+        self.update_status(f"녹화 완료: 입력 이벤트 {recorder.raw_events}개 -> 액션 {len(actions)}개 (마우스 이동 {recorder.dropped_moves}개 생략).")
+
+    def on_actions_edited(self): # 모델을 통한 행 단위 편집 후 호출: 실행 계획 무효화 + 저장 예약 (목록 크기와 무관한 비용)
+        self.invalidate_execution_plan()
+        if not self._loading_macro: self.mark_current_macro_dirty()
+
+    def update_action_list_widget(self): # 목록 전체가 바뀐 경우 (매크로 전환, 목록 교체, 일괄 변경): 모델을 새 목록으로 리셋
+        self.action_model.set_actions(self.actions_list)
+        self.on_actions_edited()
+
+    # set_hotkey_dialog, get_pynput_hotkey_str, on_hotkey_activated, clear_hotkey_internal_logic,
+    # clear_hotkey_user_action: 매크로별 단축키 (HotkeyDispatcher 하나로 모든 매크로 처리)
+    # set_schedule, on_schedule_timer, arm_schedule_timer, cancel_schedule_user_action: 여러 예약을 힙 + 단발 타이머 하나로 처리
     def set_hotkey_dialog(self):
         dialog = QDialog(self); dialog.setWindowTitle("단축키 설정")
-        layout = QVBoxLayout(dialog); label = QLabel("새로운 단축키를 누르세요 (예: Ctrl+Shift+F1):")
+        layout = QVBoxLayout(dialog); label = QLabel(f"매크로 '{self.current_macro.name}'의 새로운 단축키를 누르세요 (예: Ctrl+Shift+F1):")
         key_sequence_edit = QKeySequenceEdit()
         if self.hotkey and not self.hotkey.isEmpty(): key_sequence_edit.setKeySequence(self.hotkey)
         layout.addWidget(label); layout.addWidget(key_sequence_edit)
@@ -333,189 +528,286 @@ class MacroApp(QWidget):
             sequence = key_sequence_edit.keySequence()
             if not sequence.isEmpty() and sequence != self.hotkey : 
                 self.update_status(f"사용자 선택 단축키: {sequence.toString(QKeySequence.NativeText)}")
-                self.hotkey = sequence 
-                self.hotkey_display.setText(self.hotkey.toString(QKeySequence.NativeText))
-                if self.setup_hotkey_listener(): self.update_status(f"단축키 '{self.hotkey_display.text()}' 설정 및 리스너 시작됨.")
-                else: self.update_status(f"단축키 '{self.hotkey_display.text()}' 리스너 설정 실패."); self.clear_hotkey_internal_logic()
-                dialog.accept()
+                if self.bind_current_macro_hotkey(sequence): dialog.accept()
             elif sequence.isEmpty(): QMessageBox.warning(dialog, "오류", "단축키를 입력해주세요.")
             else: dialog.accept() 
         ok_button.clicked.connect(on_ok); layout.addWidget(ok_button)
         dialog.exec_()
 
-    def get_pynput_hotkey_str(self):
-        if not self.hotkey or self.hotkey.isEmpty(): return None
-        portable_str = self.hotkey.toString(QKeySequence.PortableText); q_parts = portable_str.split('+'); pynput_parts = []
+    def get_pynput_hotkey_str(self, sequence=None): # QKeySequence -> pynput HotKey.parse 형식 ('<ctrl>+<shift>+a')
+        sequence = self.hotkey if sequence is None else sequence
+        if not sequence or sequence.isEmpty(): return None
+        portable_str = sequence.toString(QKeySequence.PortableText); q_parts = portable_str.split('+'); pynput_parts = []
         for part_name in q_parts:
             part_lower = part_name.lower(); processed_part = None
-            if part_lower == "ctrl": processed_part = "<control>"
+            if part_lower == "ctrl": processed_part = "<ctrl>"
             elif part_lower == "shift": processed_part = "<shift>"
             elif part_lower == "alt": processed_part = "<alt>"
-            elif part_lower == "meta": processed_part = "<cmd>" if sys.platform == "darwin" else "<super>"
+            elif part_lower == "meta": processed_part = "<cmd>" # pynput의 Key.cmd = Windows/Super/Command 키
             elif len(part_name) == 1: processed_part = part_lower
             else: 
-                key_map = { "esc": "escape", "return": "enter", "enter": "enter", "del": "delete", "pgup": "page_up", 
+                key_map = { "esc": "esc", "return": "enter", "enter": "enter", "del": "delete", "pgup": "page_up", 
                             "pagedown": "page_down", "pgdn": "page_down", "backspace": "backspace", "tab": "tab", 
                             "space": "space", "home": "home", "end": "end", "left": "left", "up": "up", 
-                            "right": "right", "down": "down",}
+                            "right": "right", "down": "down", "ins": "insert"}
                 effective_key_name = key_map.get(part_lower, part_lower)
                 processed_part = f"<{effective_key_name}>"
             if processed_part: pynput_parts.append(processed_part)
         if not pynput_parts: return None
-        MODIFIERS_PYNPUT = {"<control>", "<shift>", "<alt>", "<cmd>", "<super>"}
+        MODIFIERS_PYNPUT = {"<ctrl>", "<shift>", "<alt>", "<cmd>"}
         final_modifiers = sorted([p for p in pynput_parts if p in MODIFIERS_PYNPUT])
         final_keys = sorted([p for p in pynput_parts if p not in MODIFIERS_PYNPUT])
         if not final_keys and final_modifiers : self.update_status(f"[경고] 단축키가 모디파이어로만 구성됨: {final_modifiers}.")
         final_pynput_parts_ordered = final_modifiers + final_keys
         return "+".join(final_pynput_parts_ordered)
 
-    def stop_existing_hotkey_listener(self):
-        if self.hotkey_listener_thread:
+    def register_macro_hotkeys(self): # 시작 시 라이브러리 색인의 모든 단축키를 디스패처에 등록 (매크로 본문은 읽지 않음)
+        registered = 0
+        for macro_id in self.macro_library.ids():
+            hotkey_str = self.macro_library.hotkey(macro_id)
+            if not hotkey_str: continue
+            combo = self.get_pynput_hotkey_str(QKeySequence.fromString(hotkey_str, QKeySequence.PortableText))
             try:
-                if hasattr(self.hotkey_listener_thread, 'is_alive') and self.hotkey_listener_thread.is_alive():
-                     self.hotkey_listener_thread.stop()
-            except Exception as e: self.update_status(f"기존 단축키 리스너 중지 중 오류: {type(e).__name__}: {e}")
-            finally: self.hotkey_listener_thread = None; self.hotkey_id_str = None
-
-    def setup_hotkey_listener(self):
-        self.stop_existing_hotkey_listener()
-        if not self.hotkey or self.hotkey.isEmpty(): return False
-        self.hotkey_id_str = self.get_pynput_hotkey_str()
-        if not self.hotkey_id_str:
-            self.update_status(f"단축키 문자열 변환 실패 ({self.hotkey.toString(QKeySequence.NativeText)}).")
-            return False
+                if not combo: raise ValueError(hotkey_str)
+                self.hotkey_dispatcher.bind(macro_id, combo); registered += 1
+            except Exception as e: self.update_status(f"매크로 '{self.macro_library.name_of(macro_id)}'의 단축키 '{hotkey_str}' 등록 실패: {type(e).__name__}: {e}")
+        if registered: self.update_status(f"저장된 단축키 {registered}개 등록됨.")
+
+    def show_current_macro_binding(self):
+        macro_id = self.current_macro.macro_id
+        hotkey_str = self.macro_library.hotkey(macro_id)
+        self.hotkey = QKeySequence.fromString(hotkey_str, QKeySequence.PortableText) if hotkey_str else None
+        if macro_id in self.hotkey_dispatcher.bindings(): self.hotkey_display.setText(self.hotkey.toString(QKeySequence.NativeText))
+        else: self.hotkey = None; self.hotkey_display.clear(); self.hotkey_display.setPlaceholderText("설정되지 않음")
+        self.run_policy_combo.blockSignals(True)
+        self.run_policy_combo.setCurrentIndex(self.run_policy_combo.findData(self.macro_library.run_policy(macro_id) or DEFAULT_RUN_POLICY))
+        self.run_policy_combo.blockSignals(False)
+        self.input_priority_combo.blockSignals(True)
+        self.input_priority_combo.setCurrentIndex(self.input_priority_combo.findData(self.macro_library.input_priority(macro_id) or DEFAULT_INPUT_PRIORITY))
+        self.input_priority_combo.blockSignals(False)
+
+    def bind_current_macro_hotkey(self, sequence): # 디스패처의 조회 테이블만 바꿈 (리스너는 그대로)
+        macro_id = self.current_macro.macro_id
+        combo = self.get_pynput_hotkey_str(sequence)
+        if not combo: self.update_status(f"단축키 문자열 변환 실패 ({sequence.toString(QKeySequence.NativeText)})."); return False
         try:
-            hotkey_map = {self.hotkey_id_str: self.on_hotkey_activated}
-            self.hotkey_listener_thread = self.pynput_keyboard.GlobalHotKeys(hotkey_map)
-            self.hotkey_listener_thread.start()
-            return True
+            owner = self.hotkey_dispatcher.owner(combo)
+            if owner is not None and owner != macro_id:
+                QMessageBox.warning(self, "단축키 중복", f"'{sequence.toString(QKeySequence.NativeText)}'은(는) 이미 매크로 '{self.macro_library.name_of(owner)}'에 지정되어 있습니다.")
+                return False
+            self.hotkey_dispatcher.bind(macro_id, combo)
         except Exception as e:
-            error_message = f"단축키 리스너 설정 중 오류 ('{self.hotkey_id_str}'):\n{type(e).__name__}: {e}"
+            error_message = f"단축키 리스너 설정 중 오류 ('{combo}'):\n{type(e).__name__}: {e}"
             self.update_status(error_message); QMessageBox.critical(self, "핫키 설정 오류", error_message)
             return False
-
-    def on_hotkey_activated(self):
-        self.update_status(f"단축키 '{self.hotkey_display.text()}' 감지됨. 액션 실행...")
-        self.execute_actions()
-
-    def _clear_hotkey_state_variables_no_ui_change(self):
-        self.hotkey = None; self.hotkey_id_str = None
+        self.hotkey = sequence; self.hotkey_display.setText(self.hotkey.toString(QKeySequence.NativeText))
+        self.macro_library.set_binding(macro_id, sequence.toString(QKeySequence.PortableText), self.macro_library.run_policy(macro_id))
+        self.update_status(f"매크로 '{self.current_macro.name}'에 단축키 '{self.hotkey_display.text()}' 설정됨.")
+        return True
+
+    def on_run_policy_changed(self, index):
+        macro_id = self.current_macro.macro_id; policy = self.run_policy_combo.itemData(index)
+        self.macro_library.set_binding(macro_id, self.macro_library.hotkey(macro_id), policy)
+        self.update_run_buttons()
+        self.update_status(f"매크로 '{self.current_macro.name}'이(가) 실행 중일 때 다시 요청되면: {RUN_POLICY_LABELS[policy]}")
+
+    def on_input_priority_changed(self, index):
+        priority = self.input_priority_combo.itemData(index)
+        self.macro_library.set_input_priority(self.current_macro.macro_id, priority) # 다음 실행부터 적용
+        self.update_status(f"매크로 '{self.current_macro.name}'의 입력 우선순위: {INPUT_PRIORITY_LABELS[priority]}")
+
+    def on_hotkey_activated(self, macro_id): # pynput 리스너 스레드에서 호출됨: 위젯을 직접 건드리지 않고 시그널만 보냄
+        self.hotkey_triggered_signal.emit(macro_id)
+
+    def on_hotkey_triggered_in_gui_thread(self, macro_id):
+        if macro_id not in self.macro_library.ids(): return # 그 사이 삭제된 매크로
+        self.update_status(f"단축키 감지됨. 매크로 '{self.macro_library.name_of(macro_id)}' 실행...")
+        self.request_macro_run(macro_id)
 
     def clear_hotkey_internal_logic(self):
-        self.stop_existing_hotkey_listener()
-        self._clear_hotkey_state_variables_no_ui_change()
+        macro_id = self.current_macro.macro_id
+        self.hotkey_dispatcher.unbind(macro_id)
+        if macro_id is not None: self.macro_library.set_binding(macro_id, None, self.macro_library.run_policy(macro_id))
+        self.hotkey = None
         self.hotkey_display.clear(); self.hotkey_display.setPlaceholderText("설정되지 않음")
 
     def clear_hotkey_user_action(self):
         self.clear_hotkey_internal_logic()
         self.update_status("사용자에 의해 단축키가 해제되었습니다.")
 
-    def set_schedule(self):
-        selected_dt = self.schedule_datetime_edit.dateTime(); current_dt = QDateTime.currentDateTime()
-        if not self.actions_list: QMessageBox.warning(self, "예약 불가", "실행할 액션이 없습니다."); self.update_status("예약 시도 실패: 액션 목록 비어있음."); return
-        if selected_dt <= current_dt: QMessageBox.warning(self, "시간 오류", "예약 시간은 현재 시간 이후여야 합니다."); self.update_status("예약 시간 설정 오류: 과거/현재 시간 선택."); return
-        self.scheduled_datetime = selected_dt; self.is_schedule_active = True
-        self.schedule_timer.start(1000)
-        self.schedule_status_label.setText(f"예약됨: {self.scheduled_datetime.toString('yyyy-MM-dd HH:mm:ss')}")
-        self.set_schedule_button.setEnabled(False); self.cancel_schedule_button.setEnabled(True); self.schedule_datetime_edit.setEnabled(False)
-        self.update_status(f"매크로가 {self.scheduled_datetime.toString('yyyy-MM-dd HH:mm:ss')}에 실행되도록 예약되었습니다.")
-
-    def check_schedule_and_execute(self):
-        if not self.is_schedule_active or not self.scheduled_datetime: return
-        current_dt = QDateTime.currentDateTime()
-        if current_dt >= self.scheduled_datetime:
-            self.update_status(f"예약된 시간({self.scheduled_datetime.toString('yyyy-MM-dd HH:mm:ss')}) 도달. 매크로 실행...")
-            self.schedule_timer.stop(); scheduled_time_str_for_log = self.scheduled_datetime.toString('yyyy-MM-dd HH:mm:ss')
-            self.is_schedule_active = False; self.scheduled_datetime = None
-            self.schedule_status_label.setText("실행 완료 후 예약 해제됨")
-            self.set_schedule_button.setEnabled(True); self.cancel_schedule_button.setEnabled(False); self.schedule_datetime_edit.setEnabled(True)
-            self.schedule_datetime_edit.setDateTime(QDateTime.currentDateTime().addSecs(300))
-            self.execute_actions()
-            self.update_status(f"매크로가 예약된 시간({scheduled_time_str_for_log})에 실행 완료. 예약이 해제되었습니다.")
-
-    def cancel_schedule_internal(self, reason_message="예약이 취소되었습니다."):
-        if not self.is_schedule_active and not self.schedule_timer.isActive(): self.update_status("취소할 활성 예약이 없습니다."); return
-        self.schedule_timer.stop(); self.is_schedule_active = False
-        cancelled_time_str = self.scheduled_datetime.toString('yyyy-MM-dd HH:mm:ss') if self.scheduled_datetime else "알 수 없음"
-        self.update_status(f"'{cancelled_time_str}'의 예약 취소: {reason_message}")
-        self.scheduled_datetime = None; self.schedule_status_label.setText("예약 없음")
-        self.set_schedule_button.setEnabled(True); self.cancel_schedule_button.setEnabled(False); self.schedule_datetime_edit.setEnabled(True)
-        self.schedule_datetime_edit.setDateTime(QDateTime.currentDateTime().addSecs(300))
+    def update_schedule_inputs(self): # 예약 종류에 따라 필요한 입력만 활성화
+        kind = self.schedule_kind_combo.currentData()
+        self.schedule_datetime_edit.setEnabled(kind != SCHEDULE_CRON)
+        self.schedule_interval_input.setEnabled(kind == SCHEDULE_INTERVAL)
+        self.schedule_cron_input.setEnabled(kind == SCHEDULE_CRON)
 
-    def cancel_schedule_user_action(self):
-        self.cancel_schedule_internal(reason_message="사용자에 의해 취소됨")
-
-    def execute_actions(self):
-        if not self.actions_list: self.update_status("실행할 액션이 없습니다."); QMessageBox.information(self, "알림", "실행할 액션 목록 없음."); return
-        self.update_status(f"액션 실행 시작 (총 {len(self.actions_list)}개)..."); QApplication.processEvents()
-        mouse_ctrl, keyboard_ctrl = None, None
+    def set_schedule(self): # 현재 매크로에 예약 추가
+        if not self.actions_list: QMessageBox.warning(self, "예약 불가", "실행할 액션이 없습니다."); self.update_status("예약 시도 실패: 액션 목록 비어있음."); return
+        kind = self.schedule_kind_combo.currentData()
+        start_at = self.schedule_datetime_edit.dateTime().toMSecsSinceEpoch() / 1000.0
+        if kind == SCHEDULE_ONCE and start_at <= time.time():
+            QMessageBox.warning(self, "시간 오류", "예약 시간은 현재 시간 이후여야 합니다."); self.update_status("예약 시간 설정 오류: 과거/현재 시간 선택."); return
         try:
-            mouse_ctrl = self.pynput_mouse.Controller(); keyboard_ctrl = self.pynput_keyboard.Controller()
-        except Exception as e: self.update_status(f"pynput 컨트롤러 생성 실패: {e}"); QMessageBox.critical(self, "실행 오류", f"제어기 생성 실패: {e}"); return
-        
-        for i, action in enumerate(self.actions_list):
-            self.update_status(f"실행 ({i+1}/{len(self.actions_list)}): {action.get('user_given_name') or action['details']}") # 이름 표시
-            QApplication.processEvents(); time.sleep(0.01)
-            try:
-                if action['type'] == '마우스 클릭':
-                    mouse_ctrl.position = (action['x'], action['y']); time.sleep(0.03)
-                    button_to_click = getattr(self.pynput_mouse.Button, action['button'])
-                    mouse_ctrl.click(button_to_click, 1)
-                elif action['type'] == '키보드 입력':
-                    key_str_to_execute = action['key_str']
-                    parts = key_str_to_execute.split('+'); modifiers_to_press_pynput_keys = []; main_key_action_parts = []
-                    mod_display_to_pynput_key_map = {
-                        "Ctrl": self.pynput_keyboard.Key.ctrl, "Shift": self.pynput_keyboard.Key.shift,
-                        "Alt": self.pynput_keyboard.Key.alt, 
-                        "Meta": self.pynput_keyboard.Key.cmd if sys.platform == "darwin" 
-                                else getattr(self.pynput_keyboard.Key, 'super', getattr(self.pynput_keyboard.Key, 'win_l', self.pynput_keyboard.Key.cmd))}
-                    for part in parts:
-                        if part in mod_display_to_pynput_key_map: modifiers_to_press_pynput_keys.append(mod_display_to_pynput_key_map[part])
-                        else: main_key_action_parts.append(part)
-                    main_key_action_str = "".join(main_key_action_parts)
-                    if not main_key_action_str and modifiers_to_press_pynput_keys:
-                        for mod_key in modifiers_to_press_pynput_keys: keyboard_ctrl.press(mod_key); keyboard_ctrl.release(mod_key); time.sleep(0.01)
-                        continue
-                    pynput_special_key_obj = getattr(self.pynput_keyboard.Key, main_key_action_str.lower(), None)
-                    with keyboard_ctrl.pressed(*modifiers_to_press_pynput_keys):
-                        if pynput_special_key_obj and isinstance(pynput_special_key_obj, self.pynput_keyboard.Key):
-                            keyboard_ctrl.press(pynput_special_key_obj); keyboard_ctrl.release(pynput_special_key_obj)
-                        elif len(main_key_action_str) == 1: keyboard_ctrl.tap(main_key_action_str.lower())
-                        else: 
-                            if modifiers_to_press_pynput_keys: self.update_status(f"경고: 모디파이어와 문자열 '{main_key_action_str}' 동시 입력 미지원.")
-                            keyboard_ctrl.type(main_key_action_str)
-                elif action['type'] == '딜레이': time.sleep(action['duration_ms'] / 1000.0)
-                elif action['type'] == '색 찾기 후 클릭':
-                    if ImageGrab is None: self.update_status("오류: Pillow 라이브러리 없어 '색 찾기' 액션 실행 불가."); QMessageBox.warning(self, "실행 오류", "Pillow 라이브러리 필요."); continue
-                    target_color = tuple(action['target_color']); search_area = tuple(action['search_area'])
-                    if not (len(search_area) == 4 and search_area[0] < search_area[2] and search_area[1] < search_area[3]): self.update_status(f"오류: '색 찾기' 검색 범위 잘못됨 {search_area}."); continue
-                    self.update_status(f"색상 RGB{target_color} 검색 중 (범위: {search_area})..."); QApplication.processEvents()
-                    try:
-                        img = ImageGrab.grab(bbox=search_area, all_screens=True); found_at = None
-                        for x_offset in range(img.width):
-                            for y_offset in range(img.height):
-                                pixel_color = img.getpixel((x_offset, y_offset))
-                                if pixel_color[:3] == target_color:
-                                    abs_x = search_area[0] + x_offset; abs_y = search_area[1] + y_offset
-                                    found_at = (abs_x, abs_y); break
-                            if found_at: break
-                        if found_at:
-                            self.update_status(f"색상 {target_color} 발견 위치: {found_at}. 클릭합니다.")
-                            mouse_ctrl.position = found_at; time.sleep(0.05)
-                            mouse_ctrl.click(self.pynput_mouse.Button.left, 1)
-                        else: self.update_status(f"색상 {target_color}을(를) 범위 {search_area} 내에서 찾지 못했습니다.")
-                    except Exception as e_color_find: self.update_status(f"'색 찾기' 액션 중 오류: {e_color_find}")
-                    try: ImageGrab.grab(all_screens=True).save("debug_color_find_error_fullscreen.png")
-                    except: pass
-                time.sleep(0.05) 
-            except Exception as e_action:
-                error_msg = f"액션 '{action.get('user_given_name') or action['details']}' 실행 중 오류: {type(e_action).__name__}: {e_action}"
-                self.update_status(error_msg); QMessageBox.warning(self, "액션 실행 오류", error_msg); break 
-        self.update_status("모든 액션 실행 완료."); QApplication.processEvents()
+            schedule = Schedule(self.current_macro.macro_id, kind, start_at, self.schedule_interval_input.value(), self.schedule_cron_input.text())
+            self.schedules.add(schedule)
+        except ValueError as e: QMessageBox.warning(self, "예약 오류", str(e)); self.update_status(f"예약 설정 오류: {e}"); return
+        self.arm_schedule_timer(); self.save_config()
+        self.update_status(f"매크로 '{self.current_macro.name}' 예약됨: {schedule.describe()} (다음 실행 {self.format_schedule_time(schedule.next_run)}).")
+
+    def load_schedules(self, items):
+        loaded, dropped = self.schedules.load(items, macro_ids=set(self.macro_library.ids()))
+        if loaded or dropped: self.update_status(f"예약 {loaded}개 불러옴" + (f", 지났거나 잘못된 예약 {dropped}개 제외." if dropped else "."))
+        self.arm_schedule_timer()
+
+    def arm_schedule_timer(self):
+        # 가장 이른 예약 시각에 맞춰 단발 타이머를 다시 검 (ms 올림: 일찍 깨어나지 않도록). 너무 먼 예약은 MAX_TIMER_WAIT_S 뒤에 다시 계산
+        deadline = self.schedules.next_deadline()
+        if deadline is None: self.schedule_timer.stop()
+        else: self.schedule_timer.start(math.ceil(min(max(0.0, deadline - time.time()), MAX_TIMER_WAIT_S) * 1000))
+        self.refresh_schedule_list()
+
+    def on_schedule_timer(self):
+        now = time.time(); finished_once = False
+        for schedule, deadline in self.schedules.pop_due(now):
+            finished_once |= schedule.kind == SCHEDULE_ONCE
+            if schedule.macro_id not in self.macro_library.ids(): continue
+            self.update_status(f"예약 실행: 매크로 '{self.macro_library.name_of(schedule.macro_id)}' ({schedule.describe()}, 지연 {(now - deadline) * 1000:.0f}ms)")
+            self.request_macro_run(schedule.macro_id)
+        self.arm_schedule_timer()
+        if finished_once: self.save_config() # 끝난 한 번 예약을 설정에서 제거
+
+    def format_schedule_time(self, ts):
+        return QDateTime.fromMSecsSinceEpoch(int(ts * 1000)).toString('yyyy-MM-dd HH:mm:ss')
+
+    def refresh_schedule_list(self):
+        self.schedule_list_widget.clear()
+        for schedule in sorted(self.schedules, key=lambda s: s.next_run):
+            name = self.macro_library.name_of(schedule.macro_id) if schedule.macro_id in self.macro_library.ids() else "(삭제된 매크로)"
+            item = QListWidgetItem(f"{self.format_schedule_time(schedule.next_run)}  {name} - {schedule.describe()}")
+            item.setData(Qt.UserRole, schedule.schedule_id); self.schedule_list_widget.addItem(item)
+        deadline = self.schedules.next_deadline()
+        self.schedule_status_label.setText(self.format_schedule_time(deadline) if deadline is not None else "예약 없음")
+        self.cancel_schedule_button.setEnabled(bool(self.schedule_list_widget.selectedItems()))
+
+    def cancel_schedule_user_action(self): # 선택한 예약 삭제
+        removed = [self.schedules.remove(item.data(Qt.UserRole)) for item in self.schedule_list_widget.selectedItems()]
+        removed = [schedule for schedule in removed if schedule is not None]
+        if not removed: self.update_status("취소할 예약을 선택하세요."); return
+        self.arm_schedule_timer(); self.save_config()
+        self.update_status(f"예약 {len(removed)}개 취소됨: " + ", ".join(schedule.describe() for schedule in removed))
+
+    def invalidate_execution_plan(self):
+        # 목록 변경 후 호출됨: 캐시를 버리고, 다음 실행(단축키 등)이 바로 시작되도록 편집이 멈춘 뒤 미리 컴파일
+        self.execution_plans.pop(self.current_macro.macro_id, None)
+        self.plan_precompile_timer.start()
+
+    def precompile_execution_plan(self):
+        if len(self.actions_list) <= self.PRECOMPILE_MAX_ACTIONS: self.get_execution_plan()
+
+    def get_execution_plan(self, macro=None):
+        # 매크로별로 캐시. 액션 목록 자체가 다른 리스트로 교체된 경우에도 다시 컴파일
+        macro = self.current_macro if macro is None else macro
+        cached = self.execution_plans.get(macro.macro_id)
+        if cached is None or cached[0] is not macro.actions:
+            cached = (macro.actions, compile_plan(macro.actions, self.pynput_mouse, self.pynput_keyboard, self.CONFIG_FILE))
+            self.execution_plans[macro.macro_id] = cached
+        return cached[1]
+
+    def get_input_controllers(self):
+        if self.input_controllers is None:
+            try: self.input_controllers = (self.pynput_mouse.Controller(), self.pynput_keyboard.Controller())
+            except Exception as e: self.update_status(f"pynput 컨트롤러 생성 실패: {e}"); return None
+        return self.input_controllers
+
+    def is_macro_running(self, macro_id=None): # macro_id가 없으면 어떤 매크로든 실행 중인지
+        if macro_id is None: return any(self.macro_runs.values())
+        return bool(self.macro_runs.get(macro_id))
+
+    def update_run_buttons(self):
+        macro_id = self.current_macro.macro_id
+        policy = (self.macro_library.run_policy(macro_id) if macro_id in self.macro_library.ids() else None) or DEFAULT_RUN_POLICY
+        self.run_now_button.setEnabled(not (self.is_macro_running(macro_id) and policy == POLICY_IGNORE))
+        self.stop_run_button.setEnabled(self.is_macro_running())
+
+    def execute_actions(self): # 현재 매크로 실행 (지금 실행 버튼, 예약 실행)
+        if not self.actions_list: self.update_status("실행할 액션이 없습니다."); QMessageBox.information(self, "알림", "실행할 액션 목록 없음."); return
+        self.request_macro_run(self.current_macro.macro_id)
+
+    def request_macro_run(self, macro_id):
+        # 같은 매크로가 이미 실행 중이면 매크로별 실행 정책에 따라 처리 (다른 매크로의 실행과는 무관)
+        name = self.macro_library.name_of(macro_id)
+        if self.is_macro_running(macro_id):
+            policy = self.macro_library.run_policy(macro_id) or DEFAULT_RUN_POLICY
+            if policy == POLICY_IGNORE: self.update_status(f"매크로 '{name}'이(가) 이미 실행 중입니다. 새 실행 요청을 무시합니다."); return
+            if policy == POLICY_QUEUE:
+                queued = min(self.queued_runs.get(macro_id, 0) + 1, MAX_QUEUED_RUNS); self.queued_runs[macro_id] = queued
+                self.update_status(f"매크로 '{name}' 실행 대기열에 추가됨 (대기 {queued}회)."); return
+            if policy == POLICY_RESTART:
+                for runner in self.macro_runs[macro_id]: runner.request_stop()
+                self.queued_runs[macro_id] = 1 # 중지된 실행이 끝나면 다시 시작 (입력이 겹치지 않도록)
+                self.update_status(f"매크로 '{name}' 실행을 중지하고 다시 시작합니다..."); return
+        self.start_macro_run(macro_id)
+
+    def start_macro_run(self, macro_id):
+        try: macro = self.macro_library.get(macro_id) # 단축키로 처음 실행될 때 매크로 본문을 읽음
+        except (OSError, ValueError, KeyError) as e: self.update_status(f"매크로 로드 실패: {e}"); return None
+        if not macro.actions: self.update_status(f"매크로 '{macro.name}'에 실행할 액션이 없습니다."); return None
+        timing = self.timing_profile if macro is self.current_macro else TimingProfile.from_settings(macro.timing)
+        self.update_status(f"매크로 '{macro.name}' 액션 실행 시작 (총 {len(macro.actions)}개)...")
+        runner = MacroRunnerThread(self.get_execution_plan(macro), self.pynput_mouse, self.pynput_keyboard, self, diagnostics=self.color_find_diagnostics,
+                                   config_file=self.CONFIG_FILE, controllers=self.get_input_controllers(), timing=timing,
+                                   tracer=self.execution_tracer, input_priority=self.macro_library.input_priority(macro_id) or DEFAULT_INPUT_PRIORITY)
+        runner.status_signal.connect(self.update_status)
+        runner.progress_signal.connect(self.on_macro_progress)
+        runner.warning_signal.connect(self.on_macro_warning)
+        runner.action_failed_signal.connect(self.on_macro_action_failed)
+        runner.run_finished_signal.connect(lambda completed, runner=runner: self.on_macro_run_finished(macro_id, runner, completed))
+        runner.finished.connect(runner.deleteLater)
+        self.macro_runs.setdefault(macro_id, []).append(runner)
+        self.update_run_buttons()
+        runner.start()
+        return runner
+
+    def stop_running_macro(self): # 실행 중인 모든 매크로 중지 (대기열도 비움)
+        if self.is_macro_running():
+            self.queued_runs.clear()
+            for runners in self.macro_runs.values():
+                for runner in runners: runner.request_stop()
+            self.update_status("매크로 실행 중지 요청됨...")
+
+    def on_macro_progress(self, index, total, action_name):
+        self.update_status(f"실행 ({index}/{total}): {action_name}")
+
+    def on_macro_warning(self, title, message):
+        QMessageBox.warning(self, title, message)
+
+    def on_macro_action_failed(self, error_msg):
+        self.update_status(error_msg); QMessageBox.warning(self, "액션 실행 오류", error_msg)
+
+    def on_macro_run_finished(self, macro_id, runner, completed):
+        runners = self.macro_runs.get(macro_id, [])
+        if runner in runners: runners.remove(runner)
+        if not runners: self.macro_runs.pop(macro_id, None)
+        self.update_status("모든 액션 실행 완료." if completed else "매크로 실행이 중단되었습니다.")
+        if not runners and self.queued_runs.get(macro_id) and macro_id in self.macro_library.ids(): # 대기열/다시 시작 정책의 다음 실행
+            self.queued_runs[macro_id] -= 1
+            if not self.queued_runs[macro_id]: del self.queued_runs[macro_id]
+            self.start_macro_run(macro_id)
+        self.update_run_buttons()
 
     def closeEvent(self, event):
+        # 새 실행이 시작되지 않게 단축키/예약부터 멈추고, 녹화와 실행 중인 매크로를 중지
+        self.hotkey_dispatcher.stop()
+        if self.schedule_timer.isActive(): self.schedule_timer.stop(); self.update_status("예약 타이머 중지됨 (예약은 다음 실행 시 다시 적용됨).")
+        if self.recorder_thread is not None: self.recorder_thread.stop_listener(); self.recorder_thread = None
+        self.stop_running_macro()
+        pending = [thread for thread in self.findChildren(QThread) if not thread.wait(2000)]
+        if pending: # 창의 자식인 스레드가 실행 중인 채 창과 함께 파괴되지 않게, 닫기를 미루고 그 스레드가 끝나면 다시 닫기
+            self.setEnabled(False); self.update_status(f"실행 중인 작업 {len(pending)}개가 멈추기를 기다리는 중... 멈추면 창이 닫힙니다.")
+            pending[0].finished.connect(self.close); event.ignore(); return
         self.update_status("자동 입력기 종료 중... 설정 저장 및 리소스 정리.")
         self.save_config()
-        self.stop_existing_hotkey_listener()
-        if self.schedule_timer.isActive(): self.schedule_timer.stop(); self.update_status("활성 예약 타이머 중지됨.")
+        if self.macro_library.flush(timeout=5) and self.macro_library.writer.last_error is None: self.update_status("설정과 매크로가 저장되었습니다.")
+        else: self.update_status(f"설정/매크로 저장 실패: {self.macro_library.writer.last_error}")
+        self.color_find_diagnostics.flush(timeout=5) # 예약된 진단 기록 저장 마무리
         super().closeEvent(event)
\ No newline at end of file
@@ -0,0 +1,484 @@
+# macro_benchmark.py
+# 핫패스 성능 측정 스크립트 (실제 화면/입력 장치 없이 합성 이미지와 가짜 pynput 컨트롤러 사용)
+# 사용법: python macro_benchmark.py [--no-legacy] [--quick] [--only 이름,...] [--json] [--output 결과.json]
+# Qt가 필요한 항목은 화면 없는 리눅스에서도 돌도록 기본으로 offscreen 플랫폼을 사용
+import argparse
+import contextlib
+import enum
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+import types
+
+from PIL import Image
+
+from macro_color_search import ColorMatcher, TOLERANCE_MODE_EUCLIDEAN, find_color_first, find_color_first_legacy, find_nearest_progressive
+from macro_capture import FakeCaptureBackend
+import macro_templates
+
+
+def _time_call(func, *args, repeat=3):
+    best = None; result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter(); result = func(*args); elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _make_search_frame(width, height, target_color, target_xy):
+    # 단색 배경 + 목표 색상 픽셀 하나 (최악에 가까운 경우: 우하단 근처에 배치)
+    img = Image.new('RGB', (width, height), (40, 40, 40))
+    img.putpixel(target_xy, target_color)
+    return img
+
+
+def bench_color_search(sizes=((200, 200), (640, 480), (1920, 1080)), include_legacy=True):
+    target_color = (255, 0, 128); results = []
+    for width, height in sizes:
+        img = _make_search_frame(width, height, target_color, (width - 2, height - 2))
+        vec_time, vec_result = _time_call(find_color_first, img, target_color)
+        row = {'name': 'color_search', 'size': f"{width}x{height}", 'vectorized_s': vec_time}
+        multi_matcher = ColorMatcher([target_color, (0, 200, 0), (10, 10, 250)], tolerance=12, mode=TOLERANCE_MODE_EUCLIDEAN)
+        multi_time, multi_result = _time_call(multi_matcher.find_first, img)
+        if multi_result != vec_result: raise AssertionError(f"결과 불일치: multi={multi_result}, vectorized={vec_result}")
+        row['tolerance_multi_s'] = multi_time
+        # 가까운 순 검색: 대상이 initial_xy 근처에 그대로 있는 경우 (가짜 백엔드로 창만 잘라 캡처)
+        backend = FakeCaptureBackend(img); target_xy = (width - 2, height - 2)
+        nearest_time, (nearest_result, _) = _time_call(find_nearest_progressive, backend.grab, (0, 0, width, height), (target_xy[0] - 3, target_xy[1] - 3), multi_matcher)
+        if nearest_result != target_xy: raise AssertionError(f"결과 불일치: nearest={nearest_result}, expected={target_xy}")
+        row['nearest_s'] = nearest_time
+        if include_legacy:
+            legacy_time, legacy_result = _time_call(find_color_first_legacy, img, target_color, repeat=1)
+            if legacy_result != vec_result: raise AssertionError(f"결과 불일치: legacy={legacy_result}, vectorized={vec_result}")
+            row.update({'legacy_s': legacy_time, 'speedup': legacy_time / vec_time if vec_time else None})
+        results.append(row)
+    return results
+
+
+def bench_template_search(sizes=((640, 480), (1920, 1080)), template_size=(80, 40)):
+    import numpy as np
+    rng = np.random.default_rng(0); results = []
+    for width, height in sizes:
+        # 8px 블록 노이즈 화면 (실제 UI처럼 평탄한 영역 + 경계가 섞인 합성 화면)
+        blocks = (rng.random((height // 8 + 1, width // 8 + 1, 3)) * 255).astype(np.uint8)
+        screen = np.kron(blocks, np.ones((8, 8, 1), np.uint8))[:height, :width]
+        tw, th = template_size; tx, ty = width - tw - 7, height - th - 5
+        template = macro_templates.TemplateImage(macro_templates._to_gray(screen[ty:ty + th, tx:tx + tw]))
+        elapsed, (pos, score) = _time_call(macro_templates.find_template, screen, template)
+        if pos != (tx, ty): raise AssertionError(f"템플릿 위치 불일치: {pos} != {(tx, ty)} (점수 {score:.3f})")
+        results.append({'name': 'template_search', 'size': f"{width}x{height}", 'template': f"{tw}x{th}", 'pyramid_s': elapsed})
+        # 단색 배경 화면에 아이콘 하나 (일반적인 데스크톱). 평탄한 창이 후보를 차지하면 찾지 못함
+        flat = np.full((height, width, 3), 245, np.uint8)
+        yy, xx = np.indices((48, 48)) - 23.5 # 밝은 회색 바탕에 어두운 원 (버튼/아이콘 모양)
+        icon = np.where((yy * yy + xx * xx)[..., None] < 400, np.uint8(40), np.uint8(200)).repeat(3, axis=2)
+        ix, iy = width * 5 // 8, height * 5 // 9; flat[iy:iy + 48, ix:ix + 48] = icon
+        template = macro_templates.TemplateImage(macro_templates._to_gray(icon))
+        elapsed, (pos, score) = _time_call(macro_templates.find_template, flat, template)
+        if pos != (ix, iy): raise AssertionError(f"단색 배경 템플릿 위치 불일치: {pos} != {(ix, iy)} (점수 {score:.3f})")
+        results.append({'name': 'template_search', 'size': f"{width}x{height} flat", 'template': "48x48", 'pyramid_s': elapsed})
+    return results
+
+
+class _FakeButton(enum.Enum):
+    left = 1; middle = 2; right = 3
+
+
+class _FakeKey(enum.Enum):
+    alt = 1; alt_l = 2; alt_r = 3; alt_gr = 4; backspace = 5; cmd = 6; cmd_l = 7; cmd_r = 8; ctrl = 9; ctrl_l = 10; ctrl_r = 11
+    delete = 12; down = 13; end = 14; enter = 15; esc = 16; f1 = 17; home = 18; left = 19; page_down = 20; page_up = 21
+    right = 22; shift = 23; shift_l = 24; shift_r = 25; space = 26; tab = 27; up = 28
+
+
+class _FakeKeyCode:
+    def __init__(self, char=None, vk=None):
+        self.char = char; self.vk = vk
+
+
+class _FakeMouseController:
+    """입력 대신 호출 횟수만 세는 pynput.mouse.Controller 대역"""
+
+    def __init__(self):
+        self.position = (0, 0); self.events = 0
+
+    def click(self, button, count=1): self.events += 1
+    def press(self, button): self.events += 1
+    def release(self, button): self.events += 1
+    def move(self, dx, dy): self.position = (self.position[0] + dx, self.position[1] + dy)
+
+
+class _FakeKeyboardController:
+    def __init__(self):
+        self.events = 0
+
+    def press(self, key): self.events += 1
+    def release(self, key): self.events += 1
+    def tap(self, key): self.events += 2
+    def type(self, text): self.events += 2 * len(text)
+
+    @contextlib.contextmanager
+    def pressed(self, *keys):
+        for key in keys: self.press(key)
+        try: yield
+        finally:
+            for key in reversed(keys): self.release(key)
+
+
+class _FakeHotKey:
+    @staticmethod
+    def parse(keys):
+        parts = [part.lower() for part in keys.split('+')]
+        if not all(parts): raise ValueError(keys)
+        return parts
+
+
+class _FakeListener:
+    def __init__(self, *args, **kwargs): self._alive = False
+    def start(self): self._alive = True
+    def stop(self): self._alive = False
+    def is_alive(self): return self._alive
+    def join(self, timeout=None): pass
+
+
+def fake_pynput_modules():
+    """MacroApp/ActionInputDialog/MacroRunnerThread 생성자에 넘길 가짜 (mouse, keyboard) 모듈"""
+    mouse = types.SimpleNamespace(Button=_FakeButton, Controller=_FakeMouseController, Listener=_FakeListener)
+    keyboard = types.SimpleNamespace(Key=_FakeKey, KeyCode=_FakeKeyCode, Controller=_FakeKeyboardController,
+                                     Listener=_FakeListener, GlobalHotKeys=_FakeListener, HotKey=_FakeHotKey)
+    return mouse, keyboard
+
+
+def generate_action_dicts(count, screen_size=(640, 480)):
+    """클릭/키 입력/0ms 딜레이/색 찾기가 섞인 합성 매크로 (예전 설정 JSON 형식: 'details' 표시 문자열 포함)"""
+    width, height = screen_size; actions = []
+    for i in range(count):
+        kind = i % 4
+        if kind == 0: actions.append({'type': '마우스 클릭', 'x': i % width, 'y': i % height, 'button': 'left', 'details': f"클릭 {i}"})
+        elif kind == 1: actions.append({'type': '키보드 입력', 'key_str': 'Ctrl+Shift+a' if i % 8 == 1 else 'Enter', 'details': f"키 {i}"})
+        elif kind == 2: actions.append({'type': '딜레이', 'duration_ms': 0, 'details': f"딜레이 {i}"})
+        else:
+            actions.append({'type': '색 찾기 후 클릭', 'target_color': [255, 0, 128], 'initial_xy': [width - 10, height - 10],
+                            'search_area': [0, 0, width, height], 'search_order': 'nearest' if i % 8 == 3 else 'scan', 'details': f"색 찾기 {i}"})
+    return actions
+
+
+def generate_actions(count, screen_size=(640, 480)):
+    """generate_action_dicts와 같은 매크로 (MacroApp.actions_list 형식: macro_actions 객체)"""
+    from macro_actions import actions_from_dicts
+    return actions_from_dicts(generate_action_dicts(count, screen_size))
+
+
+_qt_app = None
+
+
+def _ensure_qt_app():
+    global _qt_app
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    _qt_app = QApplication.instance() or QApplication([sys.argv[0]])
+    return _qt_app
+
+
+def _bench_app(config_file):
+    """임시 설정 파일을 쓰는 MacroApp (사용자 macro_config.json은 건드리지 않음)"""
+    _ensure_qt_app()
+    from macro_app_widget import MacroApp
+    app_class = type('BenchMacroApp', (MacroApp,), {'CONFIG_FILE': config_file})
+    mouse, keyboard = fake_pynput_modules()
+    return app_class(mouse, keyboard)
+
+
+def bench_execute_actions(counts=(100, 1000), screen_size=(640, 480)):
+    """MacroApp.execute_actions를 가짜 입력 + 합성 화면으로 실행 (패딩 0). 실행 스레드 종료까지와 GUI 시그널 처리 시간을 분리 측정"""
+    from macro_capture import set_default_backend, close_default_backends
+    from macro_timing import TimingProfile
+    width, height = screen_size
+    set_default_backend(FakeCaptureBackend(_make_search_frame(width, height, (255, 0, 128), (width - 12, height - 12))))
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            app = _bench_app(os.path.join(tmp, "bench_config.json"))
+            app.update_status = lambda message: None # 상태 표시줄 갱신 비용 제외
+            app.apply_timing_settings(TimingProfile(0, 0, 0, 0).to_settings())
+            for count in counts:
+                app.actions_list = generate_actions(count, screen_size); app.update_action_list_widget()
+                t0 = time.perf_counter(); app.get_execution_plan(); compile_s = time.perf_counter() - t0
+                t0 = time.perf_counter(); app.execute_actions(); runner = app.macro_runs[app.current_macro.macro_id][0]
+                runner.wait(); run_s = time.perf_counter() - t0
+                t0 = time.perf_counter(); _qt_app.processEvents(); drain_s = time.perf_counter() - t0
+                results.append({'name': 'execute_actions', 'actions': count, 'compile_s': compile_s, 'run_s': run_s, 'gui_drain_s': drain_s,
+                                'per_action_us': run_s / count * 1e6})
+            app.close()
+    finally: close_default_backends()
+    return results
+
+
+def bench_magnifier(frames=200, zoom=10, sample_size=31):
+    """eyedropper.Magnifier.update_preview 프레임당 비용 (합성 화면). 커서가 계속 움직이는 경우와 멈춰 있는 경우(변화 없는 프레임은 건너뜀),
+    그리고 멈춰 있을 때 돋보기가 늘려 잡는 갱신 간격"""
+    _ensure_qt_app()
+    import numpy as np
+    from PyQt5.QtCore import QPoint
+    from eyedropper import Magnifier
+    rng = np.random.default_rng(0)
+    backend = FakeCaptureBackend((rng.random((600, 800, 3)) * 255).astype(np.uint8))
+    magnifier = Magnifier(zoom=zoom, sample_size=sample_size, capture_backend=backend)
+    scenarios = (('moving', [QPoint(50 + (i * 7) % 700, 50 + (i * 3) % 500) for i in range(frames)]), ('still', [QPoint(400, 300)] * frames))
+    results = []
+    for motion, points in scenarios:
+        magnifier.update_preview(points[0]) # 첫 프레임(초기화 비용) 제외
+        magnifier.drawn_frames = magnifier.skipped_frames = 0
+        t0 = time.perf_counter()
+        for point in points: magnifier.update_preview(point)
+        elapsed = time.perf_counter() - t0
+        results.append({'name': 'magnifier_update_preview', 'motion': motion, 'frames': frames, 'zoom': zoom, 'sample_size': sample_size,
+                        'total_s': elapsed, 'per_frame_ms': elapsed / frames * 1000, 'drawn': magnifier.drawn_frames,
+                        'skipped': magnifier.skipped_frames, 'interval_ms': magnifier.refresh_interval_ms()})
+    magnifier.close()
+    return results
+
+
+def bench_config_io(counts=(1000, 10000)):
+    """큰 매크로의 저장 / 로드 (편집 시 GUI 스레드 비용, 백그라운드 원자적 기록, 색인 + 매크로 지연 로드)"""
+    from macro_library import MacroLibrary
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        config_file = os.path.join(tmp, "bench_config.json")
+        app = _bench_app(config_file); app.update_status = lambda message: None
+        library = app.macro_library
+        for count in counts:
+            app.actions_list = generate_actions(count)
+            edit_s, _ = _time_call(app.update_action_list_widget) # 목록 갱신 + 저장 예약 (GUI 스레드가 막히는 시간)
+            mark_s, _ = _time_call(app.mark_current_macro_dirty)
+            save_s, _ = _time_call(lambda: (app.mark_current_macro_dirty(), library.flush())) # 예약 직후 즉시 기록 (디바운스 대기 제외)
+            index_s, reloaded = _time_call(lambda: MacroLibrary(library.root_dir).load_index())
+            load_s, macro = _time_call(lambda: MacroLibrary(library.root_dir).load_index().get(app.current_macro.macro_id))
+            if len(macro.actions) != count: raise AssertionError(f"로드된 액션 수 불일치: {len(macro.actions)} != {count}")
+            file_bytes = os.path.getsize(os.path.join(library.root_dir, reloaded.entry_file(macro.macro_id)))
+            results.append({'name': 'config_io', 'actions': count, 'file_bytes': file_bytes, 'edit_s': edit_s, 'mark_dirty_s': mark_s,
+                            'save_s': save_s, 'index_load_s': index_s, 'load_s': load_s})
+        app.close()
+    return results
+
+
+def bench_action_list_edit(counts=(10000, 100000), edits=20):
+    """큰 매크로에서 액션 하나 추가/이동/수정/삭제 (모델 행 단위 시그널 + 보이는 행 다시 그리기까지, GUI 스레드 비용)"""
+    from macro_actions import DelayAction
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        app = _bench_app(os.path.join(tmp, "bench_config.json")); app.update_status = lambda message: None
+        app.show(); model = app.action_model
+        for count in counts:
+            app.actions_list = generate_actions(count)
+            t0 = time.perf_counter(); app.update_action_list_widget(); _qt_app.processEvents(); reset_s = time.perf_counter() - t0
+            row = count // 2; app.select_action_row(row); _qt_app.processEvents()
+            operations = {'insert': lambda: model.insert_action(row, DelayAction(duration_ms=0)),
+                          'move': lambda: model.move_action(row, row + 1),
+                          'replace': lambda: model.replace_action(row, DelayAction(duration_ms=1)),
+                          'remove': lambda: model.remove_action(row)}
+            result = {'name': 'action_list_edit', 'actions': count, 'reset_s': reset_s}
+            for op_name, operation in operations.items():
+                t0 = time.perf_counter()
+                for _ in range(edits): operation(); app.on_actions_edited(); _qt_app.processEvents()
+                result[f"{op_name}_s"] = (time.perf_counter() - t0) / edits
+            results.append(result)
+        app.close()
+    return results
+
+
+def bench_inter_delay_toggle(counts=(1000, 10000)):
+    """'모든 액션 사이 딜레이' 정책 켜기/끄기 (목록은 그대로) + 예전 자동 삽입 딜레이가 든 목록을 정책으로 바꾸는 로드 시 변환"""
+    from macro_timing import fold_auto_inserted_delays
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        app = _bench_app(os.path.join(tmp, "bench_config.json")); app.update_status = lambda message: None
+        for count in counts:
+            app.actions_list = generate_actions(count); app.update_action_list_widget()
+            t0 = time.perf_counter(); app.inter_delay_checkbox.setChecked(True); on_s = time.perf_counter() - t0
+            enabled = app.timing_profile.inter_action_wait_s
+            t0 = time.perf_counter(); app.inter_delay_checkbox.setChecked(False); off_s = time.perf_counter() - t0
+            if len(app.actions_list) != count or not enabled or app.timing_profile.inter_action_wait_s: raise AssertionError("딜레이 정책 전환 결과 불일치")
+            legacy = []
+            for action in generate_action_dicts(count):
+                if legacy: legacy.append({'type': '딜레이', 'duration_ms': 600, 'details': '자동 삽입된 600ms 대기', 'auto_inserted': True})
+                legacy.append(action)
+            fold_s, (folded, settings) = _time_call(fold_auto_inserted_delays, legacy, None)
+            if len(folded) != count or settings['inter_action_ms'] != 600: raise AssertionError("자동 딜레이 변환 결과 불일치")
+            results.append({'name': 'inter_delay_toggle', 'actions': count, 'enable_s': on_s, 'disable_s': off_s, 'fold_s': fold_s})
+        app.close()
+    return results
+
+
+def bench_action_memory(counts=(50000,)):
+    """긴 녹화의 액션 목록 메모리: 예전 dict 형식(표시 문자열 포함) vs 액션 객체, 그리고 JSON dict <-> 객체 변환 시간"""
+    import tracemalloc
+    from macro_actions import actions_from_dicts, actions_to_dicts
+    results = []
+    for count in counts:
+        def measure(build):
+            tracemalloc.start()
+            try: items = build(); return tracemalloc.get_traced_memory()[0], items
+            finally: tracemalloc.stop()
+        dict_bytes, dicts = measure(lambda: json.loads(json.dumps(generate_action_dicts(count), ensure_ascii=False))) # 파일에서 읽은 것과 같은 객체 구성
+        typed_bytes, actions = measure(lambda: actions_from_dicts(dicts))
+        load_s, _ = _time_call(actions_from_dicts, dicts); dump_s, _ = _time_call(actions_to_dicts, actions)
+        describe_s, _ = _time_call(lambda: [action.describe() for action in actions[:50]]) # 한 화면 분량의 표시 문자열
+        if len(actions) != count or actions_from_dicts(actions_to_dicts(actions)) != actions: raise AssertionError("액션 변환 결과 불일치")
+        results.append({'name': 'action_memory', 'actions': count, 'dict_bytes': dict_bytes, 'typed_bytes': typed_bytes,
+                        'ratio': typed_bytes / dict_bytes, 'load_s': load_s, 'dump_s': dump_s, 'describe_page_s': describe_s})
+    return results
+
+
+def bench_recorder(minutes=(10,)):
+    """녹화: 합성 입력 이벤트 흐름(주로 마우스 이동 + 타이핑 + 가끔 클릭/Enter)을 받는 즉시 합친 결과 액션 수와 이벤트당 처리 시간"""
+    import random
+    from macro_recorder import MacroRecorder
+    _, keyboard = fake_pynput_modules()
+    results = []
+    for minute_count in minutes:
+        recorder = MacroRecorder(keyboard); rng = random.Random(1); t = 0.0; end = minute_count * 60.0
+        t0 = time.perf_counter()
+        while t < end:
+            x = rng.random()
+            if x < 0.9: t += 0.008; recorder.move(int(x * 1000), int(x * 500), t)
+            elif x < 0.97: t += 0.12; recorder.key(rng.choice('abcdefghij '), (), t)
+            elif x < 0.99: t += 0.3; recorder.click(5, 5, 'left', t)
+            else: t += 0.4; recorder.key('Enter', (), t)
+        actions = recorder.finish(); elapsed = time.perf_counter() - t0
+        results.append({'name': 'recorder', 'minutes': minute_count, 'raw_events': recorder.raw_events, 'actions': len(actions),
+                        'per_event_us': elapsed / recorder.raw_events * 1e6})
+    return results
+
+
+class _SlowMouseController(_FakeMouseController):
+    """커서 이동마다 inject_s만큼 걸리는 마우스 컨트롤러 (주입 비용이 큰 환경 흉내). 이동 횟수를 셈"""
+
+    def __init__(self, inject_s):
+        self.inject_s = 0; self.moves = 0; super().__init__(); self.inject_s = inject_s; self.moves = 0
+
+    @property
+    def position(self): return self._position
+
+    @position.setter
+    def position(self, xy):
+        self._position = xy; self.moves += 1
+        if self.inject_s: time.sleep(self.inject_s)
+
+
+def bench_mouse_path(duration_ms=2000, rates=(120, 1000), inject_ms=(0, 5)):
+    """경로 드래그: 베지어 드래그 하나를 실행해 실제 걸린 시간과 정해진 시간의 차이, 주입한 점 수 (주입 비용이 있어도 전체 시간은 그대로여야 함)"""
+    from macro_actions import MouseDragAction
+    from macro_executor import MacroExecutor
+    from macro_mouse_path import PATH_BEZIER
+    from macro_timing import TimingProfile
+    mouse, keyboard = fake_pynput_modules()
+    results = []
+    for rate_hz in rates:
+        for inject in inject_ms:
+            action = MouseDragAction(path_kind=PATH_BEZIER, points=[[100, 500], [300, 100], [700, 900], [900, 500]], duration_ms=duration_ms, rate_hz=rate_hz)
+            mouse_ctrl = _SlowMouseController(inject / 1000.0)
+            executor = MacroExecutor([action], mouse, keyboard, capture_backend=FakeCaptureBackend(_make_search_frame(8, 8, (0, 0, 0), (0, 0))),
+                                     controllers=(mouse_ctrl, _FakeKeyboardController()), timing=TimingProfile(0, 0, 0, 0))
+            t0 = time.perf_counter(); executor.run(); elapsed = time.perf_counter() - t0
+            results.append({'name': 'mouse_path', 'duration_ms': duration_ms, 'rate_hz': rate_hz, 'inject_ms': inject, 'elapsed_ms': elapsed * 1000,
+                            'error_ms': elapsed * 1000 - duration_ms, 'moves': mouse_ctrl.moves, 'planned_points': math.ceil(duration_ms / 1000 * rate_hz)})
+    return results
+
+
+def _format_row(row):
+    name = row['name']
+    if name == 'color_search':
+        line = f"[color_search] {row['size']:>10}  vectorized {row['vectorized_s'] * 1000:9.2f} ms  tolerance/multi {row['tolerance_multi_s'] * 1000:9.2f} ms  nearest {row['nearest_s'] * 1000:7.3f} ms"
+        if 'legacy_s' in row: line += f"  legacy {row['legacy_s'] * 1000:10.2f} ms  x{row['speedup']:.1f}"
+        return line
+    if name == 'template_search':
+        return f"[template_search] {row['size']:>10}  template {row['template']}  pyramid {row['pyramid_s'] * 1000:9.2f} ms"
+    if name == 'execute_actions':
+        return (f"[execute_actions] {row['actions']:>6} actions  compile {row['compile_s'] * 1000:8.2f} ms  run {row['run_s'] * 1000:9.2f} ms"
+                f"  ({row['per_action_us']:.1f} us/action)  gui drain {row['gui_drain_s'] * 1000:8.2f} ms")
+    if name == 'magnifier_update_preview':
+        return (f"[magnifier] {row['motion']:>6} {row['frames']} frames  {row['per_frame_ms']:.3f} ms/frame (zoom {row['zoom']}, sample {row['sample_size']})"
+                f"  drawn {row['drawn']}  skipped {row['skipped']}  next refresh {row['interval_ms']} ms")
+    if name == 'config_io':
+        return (f"[config_io] {row['actions']:>6} actions  {row['file_bytes'] / 1024:8.1f} KiB  mark dirty {row['mark_dirty_s'] * 1e6:7.1f} us"
+                f"  save (background) {row['save_s'] * 1000:8.2f} ms  index {row['index_load_s'] * 1000:6.2f} ms  index + macro load {row['load_s'] * 1000:8.2f} ms")
+    if name == 'action_list_edit':
+        return (f"[action_list_edit] {row['actions']:>6} actions  reset {row['reset_s'] * 1000:8.2f} ms  insert {row['insert_s'] * 1000:6.2f} ms"
+                f"  move {row['move_s'] * 1000:6.2f} ms  replace {row['replace_s'] * 1000:6.2f} ms  remove {row['remove_s'] * 1000:6.2f} ms")
+    if name == 'action_memory':
+        return (f"[action_memory] {row['actions']:>6} actions  dicts {row['dict_bytes'] / 2**20:7.2f} MiB  typed {row['typed_bytes'] / 2**20:7.2f} MiB"
+                f"  ({row['ratio'] * 100:.0f}%)  load {row['load_s'] * 1000:8.2f} ms  dump {row['dump_s'] * 1000:8.2f} ms  describe page {row['describe_page_s'] * 1e6:7.1f} us")
+    if name == 'recorder':
+        return (f"[recorder] {row['minutes']} min  {row['raw_events']:>8} raw events -> {row['actions']:>6} actions"
+                f"  ({row['actions'] / row['raw_events'] * 100:.1f}%)  {row['per_event_us']:.2f} us/event")
+    if name == 'mouse_path':
+        return (f"[mouse_path] {row['duration_ms']} ms @ {row['rate_hz']:>4} Hz  inject {row['inject_ms']} ms  elapsed {row['elapsed_ms']:8.2f} ms"
+                f"  (error {row['error_ms']:+6.2f} ms)  moves {row['moves']:>5} / {row['planned_points']} points")
+    if name == 'inter_delay_toggle':
+        return (f"[inter_delay_toggle] {row['actions']:>6} actions  enable {row['enable_s'] * 1000:8.2f} ms  disable {row['disable_s'] * 1000:8.2f} ms"
+                f"  fold legacy delays {row['fold_s'] * 1000:8.2f} ms")
+    return f"[{name}] {row}"
+
+
+def _benches(quick, include_legacy):
+    """(이름, 실행 함수) 목록. --quick이면 작은 크기로"""
+    return [
+        ('color_search', lambda: bench_color_search(((200, 200), (640, 480)) if quick else ((200, 200), (640, 480), (1920, 1080)), include_legacy)),
+        ('template_search', lambda: bench_template_search(((640, 480),) if quick else ((640, 480), (1920, 1080)))),
+        ('execute_actions', lambda: bench_execute_actions((100,) if quick else (100, 1000))),
+        ('magnifier', lambda: bench_magnifier(50 if quick else 200)),
+        ('config_io', lambda: bench_config_io((1000,) if quick else (1000, 10000))),
+        ('action_list_edit', lambda: bench_action_list_edit((10000,) if quick else (10000, 100000))),
+        ('inter_delay_toggle', lambda: bench_inter_delay_toggle((1000,) if quick else (1000, 10000))),
+        ('action_memory', lambda: bench_action_memory((10000,) if quick else (50000,))),
+        ('recorder', lambda: bench_recorder((1,) if quick else (10,))),
+        ('mouse_path', lambda: bench_mouse_path(500 if quick else 2000)),
+    ]
+
+
+BENCH_NAMES = tuple(name for name, _ in _benches(False, True))
+
+
+def _bench_names(text):
+    # --only 값: 쉼표로 구분한 벤치마크 이름. 모르는 이름이 있으면 사용법 오류 (오타로 아무것도 실행하지 않고 성공하지 않게)
+    names = [name.strip() for name in text.split(',') if name.strip()]
+    unknown = [name for name in names if name not in BENCH_NAMES]
+    if unknown or not names: raise argparse.ArgumentTypeError(f"알 수 없는 벤치마크: {', '.join(unknown) or text!r} (선택: {', '.join(BENCH_NAMES)})")
+    return names
+
+
+def _build_parser():
+    parser = argparse.ArgumentParser(description="매크로 앱 성능 벤치마크 (합성 화면/가짜 입력 사용)")
+    parser.add_argument('--quick', action='store_true', help="작은 크기로만 실행")
+    parser.add_argument('--no-legacy', dest='include_legacy', action='store_false', help="color_search에서 예전 구현 비교 생략")
+    parser.add_argument('--only', type=_bench_names, metavar='NAME[,NAME...]', help=f"실행할 벤치마크 ({', '.join(BENCH_NAMES)})")
+    parser.add_argument('--json', dest='as_json', action='store_true', help="결과를 JSON으로 stdout에 출력 (앱 메시지는 stderr)")
+    parser.add_argument('--output', help="결과 JSON을 저장할 파일 경로")
+    return parser
+
+
+def main(argv=None):
+    args = _build_parser().parse_args(argv)
+    as_json = args.as_json; output_path = args.output
+    benches = _benches(args.quick, args.include_legacy)
+    selected = set(args.only) if args.only else None
+    results = []
+    for name, bench in benches:
+        if selected is not None and name not in selected: continue
+        # JSON 모드에서는 stdout에 결과만 나가도록 앱 상태 메시지를 stderr로 돌림
+        with contextlib.redirect_stdout(sys.stderr) if as_json else contextlib.nullcontext(): rows = bench()
+        for row in rows:
+            results.append(row)
+            if not as_json: print(_format_row(row))
+    report = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(), 'platform': platform.platform(), 'results': results}
+    if as_json: print(json.dumps(report, ensure_ascii=False, indent=2))
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f: json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
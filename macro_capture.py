@@ -0,0 +1,257 @@
+# macro_capture.py
+# 화면 캡처 백엔드 계층: mss / Pillow(ImageGrab) / Qt(QScreen) 구현과 테스트용 메모리 백엔드
+# 모든 백엔드는 grab(bbox) -> CapturedFrame 을 제공하며, bbox는 (x1, y1, x2, y2) 가상 데스크톱 좌표 (x2, y2 미포함)
+import threading
+
+from macro_lazy import lazy_import
+
+# 선택적 라이브러리는 첫 캡처 때 로드 (없으면 None)
+np = lazy_import('numpy')
+mss_module = lazy_import('mss')
+Image = lazy_import('PIL.Image')
+ImageGrab = lazy_import('PIL.ImageGrab')
+
+
+class CapturedFrame:
+    """캡처된 한 장의 화면 영역. 원본 버퍼(BGRA 배열, PIL 이미지, QImage 중 하나)를 그대로 들고 있고
+    필요한 형식으로의 변환은 요청 시에만 수행함"""
+    __slots__ = ('left', 'top', 'width', 'height', '_bgra', '_image', '_qimage', '_keepalive')
+
+    def __init__(self, left, top, width, height, bgra=None, image=None, qimage=None, keepalive=None):
+        self.left, self.top, self.width, self.height = left, top, width, height
+        self._bgra = bgra         # (높이, 너비, 4) uint8 BGRA numpy 뷰 (복사 없음)
+        self._image = image       # PIL 이미지
+        self._qimage = qimage     # QImage (Format_RGB32)
+        self._keepalive = keepalive # _bgra가 참조하는 원본 버퍼 객체 (뷰가 살아있는 동안 유지)
+
+    @property
+    def bbox(self):
+        return (self.left, self.top, self.left + self.width, self.top + self.height)
+
+    def bgra_array(self):
+        """BGRA 배열 뷰 (mss/Qt 백엔드는 복사 없이 원본 버퍼를 가리킴). 없으면 None"""
+        return self._bgra
+
+    def rgb_array(self):
+        """(높이, 너비, 3) uint8 RGB 배열. BGRA 버퍼가 있으면 채널 순서만 뒤집은 뷰를 반환 (numpy 필요)"""
+        if self._bgra is not None: return self._bgra[..., 2::-1]
+        if self._image is not None:
+            img = self._image if self._image.mode == 'RGB' else self._image.convert('RGB')
+            return np.asarray(img)
+        self._bgra = _qimage_to_bgra(self._qimage)
+        return self._bgra[..., 2::-1]
+
+    def pixel(self, x, y):
+        """프레임 기준 (x, y) 픽셀의 (R, G, B)"""
+        if self._bgra is not None:
+            b, g, r = self._bgra[y, x, :3]; return (int(r), int(g), int(b))
+        if self._image is not None: return tuple(self._image.getpixel((x, y))[:3])
+        rgb = self._qimage.pixel(x, y)
+        return ((rgb >> 16) & 0xFF, (rgb >> 8) & 0xFF, rgb & 0xFF)
+
+    def to_pil(self):
+        if self._image is not None: return self._image
+        if self._bgra is not None:
+            return Image.frombuffer('RGB', (self.width, self.height), np.ascontiguousarray(self._bgra).tobytes(), 'raw', 'BGRX', 0, 1)
+        qimg = self._qimage.convertToFormat(self._qimage.Format_RGB888)
+        return Image.frombytes('RGB', (self.width, self.height), _qimage_bytes(qimg), 'raw', 'RGB', qimg.bytesPerLine(), 1)
+
+    def to_qimage(self):
+        """Qt 위젯 표시용 QImage (GUI 스레드에서 사용)"""
+        if self._qimage is not None: return self._qimage
+        from PyQt5.QtGui import QImage
+        if self._bgra is not None:
+            buf = np.ascontiguousarray(self._bgra)
+            return QImage(buf.data, self.width, self.height, buf.strides[0], QImage.Format_RGB32).copy()
+        img = self._image if self._image.mode == 'RGB' else self._image.convert('RGB')
+        return QImage(img.tobytes(), self.width, self.height, self.width * 3, QImage.Format_RGB888).copy()
+
+
+def _qimage_bytes(qimg):
+    ptr = qimg.constBits(); ptr.setsize(qimg.byteCount())
+    return ptr.asstring()
+
+
+def _qimage_to_bgra(qimg):
+    # Format_RGB32는 메모리상 BGRA(리틀 엔디언) 배열. 줄 끝 패딩을 고려해 너비만큼 잘라낸 뷰를 반환
+    ptr = qimg.constBits(); ptr.setsize(qimg.byteCount())
+    arr = np.frombuffer(ptr, dtype=np.uint8).reshape(qimg.height(), qimg.bytesPerLine() // 4, 4)
+    return arr[:, :qimg.width()]
+
+
+def _normalize_bbox(bbox):
+    x1, y1, x2, y2 = (int(v) for v in bbox)
+    if x1 >= x2 or y1 >= y2: raise ValueError(f"잘못된 캡처 영역: {bbox}")
+    return x1, y1, x2, y2
+
+
+class CaptureBackend:
+    """화면 캡처 백엔드 공통 인터페이스"""
+    name = "base"
+    thread_safe = True # False면 GUI 스레드에서만 사용 가능 (Qt)
+
+    @classmethod
+    def is_available(cls):
+        return False
+
+    def grab(self, bbox):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MssCaptureBackend(CaptureBackend):
+    """mss 백엔드: 스레드마다 하나의 mss 세션을 열어 계속 재사용하고,
+    캡처 결과의 raw BGRA 버퍼를 복사 없이 numpy 뷰로 노출함 (mss 세션은 만든 스레드에서만 사용 가능)"""
+    name = "mss"
+
+    def __init__(self):
+        self._local = threading.local()
+        self._sessions = []; self._sessions_lock = threading.Lock()
+
+    @classmethod
+    def is_available(cls):
+        return mss_module is not None and np is not None
+
+    def _session(self):
+        sct = getattr(self._local, 'sct', None)
+        if sct is None:
+            sct = mss_module.mss(); self._local.sct = sct
+            with self._sessions_lock: self._sessions.append(sct)
+        return sct
+
+    def grab(self, bbox):
+        x1, y1, x2, y2 = _normalize_bbox(bbox)
+        shot = self._session().grab({'left': x1, 'top': y1, 'width': x2 - x1, 'height': y2 - y1})
+        bgra = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        return CapturedFrame(x1, y1, shot.width, shot.height, bgra=bgra, keepalive=shot)
+
+    def close_thread_session(self):
+        """현재 스레드의 mss 세션을 닫음 (작업 스레드 종료 시 호출)"""
+        sct = getattr(self._local, 'sct', None)
+        if sct is None: return
+        self._local.sct = None
+        with self._sessions_lock:
+            if sct in self._sessions: self._sessions.remove(sct)
+        try: sct.close()
+        except Exception: pass
+
+    def close(self):
+        self.close_thread_session()
+        with self._sessions_lock: sessions, self._sessions = self._sessions, []
+        for sct in sessions: # 다른 스레드의 세션은 리소스만 정리 시도
+            try: sct.close()
+            except Exception: pass
+
+
+class PilCaptureBackend(CaptureBackend):
+    """Pillow ImageGrab 백엔드 (기존 '색 찾기' 방식)"""
+    name = "pil"
+
+    @classmethod
+    def is_available(cls):
+        return ImageGrab is not None
+
+    def grab(self, bbox):
+        x1, y1, x2, y2 = _normalize_bbox(bbox)
+        img = ImageGrab.grab(bbox=(x1, y1, x2, y2), all_screens=True)
+        return CapturedFrame(x1, y1, img.width, img.height, image=img)
+
+
+class QtCaptureBackend(CaptureBackend):
+    """Qt QScreen.grabWindow 백엔드 (기존 돋보기 방식). GUI 스레드 전용"""
+    name = "qt"
+    thread_safe = False
+
+    @classmethod
+    def is_available(cls):
+        try:
+            from PyQt5.QtGui import QGuiApplication
+        except ImportError:
+            return False
+        return QGuiApplication.instance() is not None
+
+    def grab(self, bbox):
+        from PyQt5.QtCore import QPoint
+        from PyQt5.QtGui import QGuiApplication, QImage
+        x1, y1, x2, y2 = _normalize_bbox(bbox)
+        center = QPoint((x1 + x2) // 2, (y1 + y2) // 2)
+        screen = QGuiApplication.screenAt(center) or QGuiApplication.primaryScreen()
+        qimg = screen.grabWindow(0, x1, y1, x2 - x1, y2 - y1).toImage().convertToFormat(QImage.Format_RGB32)
+        if qimg.isNull(): raise RuntimeError(f"Qt 화면 캡처 실패: {(x1, y1, x2, y2)}")
+        bgra = _qimage_to_bgra(qimg) if np is not None else None
+        return CapturedFrame(x1, y1, qimg.width(), qimg.height(), bgra=bgra, qimage=qimg, keepalive=qimg)
+
+
+class FakeCaptureBackend(CaptureBackend):
+    """테스트/벤치마크용 메모리 백엔드. 가상 데스크톱 PIL 이미지를 잘라서 반환함"""
+    name = "fake"
+
+    def __init__(self, screen_image=None, origin=(0, 0)):
+        self.origin = origin
+        self.grab_count = 0
+        self.screen_image = None
+        if screen_image is not None: self.set_screen(screen_image, origin)
+
+    @classmethod
+    def is_available(cls):
+        return Image is not None
+
+    def set_screen(self, screen_image, origin=None):
+        """가상 화면 교체 (PIL 이미지 또는 (높이, 너비, 3) RGB 배열)"""
+        if Image is not None and not isinstance(screen_image, Image.Image): screen_image = Image.fromarray(screen_image, 'RGB')
+        self.screen_image = screen_image if screen_image.mode == 'RGB' else screen_image.convert('RGB')
+        if origin is not None: self.origin = origin
+
+    def grab(self, bbox):
+        x1, y1, x2, y2 = _normalize_bbox(bbox)
+        self.grab_count += 1
+        ox, oy = self.origin
+        img = self.screen_image.crop((x1 - ox, y1 - oy, x2 - ox, y2 - oy)) # 화면 밖은 검은색으로 채워짐
+        return CapturedFrame(x1, y1, img.width, img.height, image=img)
+
+
+# 빠른 순서대로 나열 (선택 시 앞에서부터 사용 가능한 것을 고름)
+BACKEND_CLASSES = (MssCaptureBackend, QtCaptureBackend, PilCaptureBackend)
+_default_backends = {}
+
+
+def available_backend_names():
+    return [cls.name for cls in BACKEND_CLASSES if cls.is_available()]
+
+
+def create_backend(name):
+    for cls in BACKEND_CLASSES + (FakeCaptureBackend,):
+        if cls.name == name:
+            if not cls.is_available(): raise RuntimeError(f"캡처 백엔드 '{name}'을(를) 사용할 수 없습니다.")
+            return cls()
+    raise ValueError(f"알 수 없는 캡처 백엔드: {name}")
+
+
+def get_default_backend(gui_thread=False):
+    """사용 가능한 가장 빠른 백엔드를 골라 프로세스 전체에서 재사용. 없으면 None
+    gui_thread=False(작업 스레드용)이면 GUI 스레드 전용 백엔드(Qt)는 제외함"""
+    key = bool(gui_thread)
+    if key not in _default_backends:
+        _default_backends[key] = None
+        for cls in BACKEND_CLASSES:
+            if (gui_thread or cls.thread_safe) and cls.is_available():
+                # 같은 클래스가 선택되면 인스턴스를 공유 (mss 세션은 어차피 스레드별)
+                shared = _default_backends.get(not key)
+                _default_backends[key] = shared if isinstance(shared, cls) else cls()
+                break
+    return _default_backends[key]
+
+
+def set_default_backend(backend, gui_thread=None):
+    """기본 백엔드 교체 (테스트/벤치마크에서 FakeCaptureBackend 주입용). gui_thread=None이면 양쪽 모두"""
+    keys = (False, True) if gui_thread is None else (bool(gui_thread),)
+    for key in keys: _default_backends[key] = backend
+
+
+def close_default_backends():
+    for backend in set(b for b in _default_backends.values() if b is not None):
+        try: backend.close()
+        except Exception: pass
+    _default_backends.clear()
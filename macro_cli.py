@@ -0,0 +1,153 @@
+# macro_cli.py
+# 창 없이 명령줄에서 저장된 매크로를 실행 (배치/예약 작업용). Qt 위젯 모듈을 import하지 않음
+# 매크로는 설정 파일 옆 macros/ 폴더의 매크로 라이브러리에서 읽음 (macro_library 참고)
+# 사용법: python macro_cli.py [--config macro_config.json] [--macro 이름] [--repeat N] [--interval 초] [--at 시각] [--trace] [--quiet]
+# 종료 코드: 0 = 모든 실행 완료, 1 = 액션 오류/중단, 2 = 설정/환경 오류, 130 = Ctrl+C로 중지
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+
+from macro_library import MacroLibrary
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+
+def _print_err(message):
+    print(message, file=sys.stderr)
+
+
+def load_config_file(config_file):
+    with open(config_file, 'r', encoding='utf-8') as f: return json.load(f)
+
+
+def open_library(config_file, config_data):
+    """설정 파일 옆 매크로 라이브러리의 색인을 읽음. 예전 단일 매크로 설정이면 먼저 라이브러리로 옮김"""
+    library = MacroLibrary.for_config(config_file).load_index()
+    library.migrate_legacy_config(config_data)
+    return library
+
+
+def macro_from_library(library, config_data, name=None):
+    """실행할 Macro 반환. name이 없으면 앱에서 마지막으로 연 매크로 (없으면 첫 번째). 찾을 수 없으면 KeyError"""
+    if name: return library.get_by_name(name)
+    macro_id = config_data.get('active_macro')
+    if macro_id not in library.ids():
+        if not len(library): raise KeyError(name)
+        macro_id = library.ids()[0]
+    return library.get(macro_id)
+
+
+def parse_start_time(text, now=None):
+    """'HH:MM', 'HH:MM:SS' (오늘, 지났으면 내일) 또는 'YYYY-MM-DD HH:MM[:SS]'를 datetime으로"""
+    now = now or datetime.datetime.now()
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S'):
+        try: return datetime.datetime.strptime(text, fmt)
+        except ValueError: pass
+    for fmt in ('%H:%M:%S', '%H:%M'):
+        try: t = datetime.datetime.strptime(text, fmt).time()
+        except ValueError: continue
+        start = datetime.datetime.combine(now.date(), t)
+        return start if start > now else start + datetime.timedelta(days=1)
+    raise ValueError(f"시각 형식을 알 수 없음: {text}")
+
+
+def _load_pynput():
+    try:
+        from pynput import mouse, keyboard
+    except Exception as e: # ImportError 외에 디스플레이 없음 등 백엔드 초기화 오류도 포함
+        return None, None, e
+    return mouse, keyboard, None
+
+
+def _build_parser():
+    parser = argparse.ArgumentParser(description="저장된 매크로를 창 없이 실행합니다.")
+    parser.add_argument('--config', default="macro_config.json", help="설정 파일 경로 (기본: macro_config.json)")
+    parser.add_argument('--macro', help="실행할 매크로 이름 (생략 시 앱에서 마지막으로 연 매크로)")
+    parser.add_argument('--list', action='store_true', help="저장된 매크로 이름을 출력하고 종료")
+    parser.add_argument('--repeat', type=int, default=1, help="반복 횟수 (0 = 중지할 때까지 무한 반복)")
+    parser.add_argument('--interval', type=float, default=0.0, help="반복 시작 간격 (초). 실행이 더 오래 걸리면 바로 다음 실행")
+    parser.add_argument('--at', help="첫 실행 시각 ('HH:MM[:SS]' 또는 'YYYY-MM-DD HH:MM[:SS]')")
+    parser.add_argument('--trace', action='store_true', help="실행 추적을 켜고 종료 시 JSON/CSV로 저장")
+    parser.add_argument('--quiet', action='store_true', help="오류 외 메시지 출력 안 함")
+    parser.add_argument('--verbose', action='store_true', help="액션별 진행 상황 출력")
+    return parser
+
+
+def main(argv=None):
+    args = _build_parser().parse_args(argv)
+    try: config_data = load_config_file(args.config)
+    except (OSError, json.JSONDecodeError) as e: _print_err(f"설정 파일 '{args.config}' 로드 실패: {e}"); return EXIT_USAGE
+
+    try: library = open_library(args.config, config_data)
+    except (OSError, ValueError, KeyError) as e: _print_err(f"매크로 라이브러리 로드 실패: {e}"); return EXIT_USAGE
+
+    if args.list:
+        for macro_id in library.ids():
+            marker = "*" if macro_id == config_data.get('active_macro') else " "
+            print(f"{marker} {library.name_of(macro_id)} ({library.action_count(macro_id)}개 액션)")
+        return EXIT_OK
+    try: macro = macro_from_library(library, config_data, args.macro)
+    except KeyError: _print_err(f"매크로 '{args.macro or '(기본)'}'을(를) '{library.root_dir}'에서 찾을 수 없습니다."); return EXIT_USAGE
+    except (OSError, ValueError) as e: _print_err(f"매크로 로드 실패: {e}"); return EXIT_USAGE
+    actions, timing_settings = macro.actions, macro.timing
+    if not actions: _print_err(f"매크로 '{macro.name}'에 실행할 액션이 없습니다."); return EXIT_USAGE
+    if args.repeat < 0 or args.interval < 0: _print_err("--repeat / --interval 값은 0 이상이어야 합니다."); return EXIT_USAGE
+    try: start_at = parse_start_time(args.at) if args.at else None
+    except ValueError as e: _print_err(str(e)); return EXIT_USAGE
+
+    mouse, keyboard, error = _load_pynput()
+    if error is not None: _print_err(f"pynput 초기화 실패: {type(error).__name__}: {error}"); return EXIT_USAGE
+
+    from macro_plan import compile_plan
+    from macro_executor import MacroExecutor
+    from macro_timing import TimingProfile
+    from macro_diagnostics import ColorFindDiagnostics
+    from macro_trace import ExecutionTracer
+
+    say = (lambda message: None) if args.quiet else (lambda message: print(f"[{time.strftime('%H:%M:%S')}] {message}", flush=True))
+    config_file = os.path.abspath(args.config)
+    diagnostics = ColorFindDiagnostics.from_settings(config_data.get('diagnostics'))
+    tracer = ExecutionTracer.from_settings(config_data.get('tracing'))
+    if args.trace: tracer.enabled = True
+    try: controllers = (mouse.Controller(), keyboard.Controller())
+    except Exception as e: _print_err(f"pynput 컨트롤러 생성 실패: {e}"); return EXIT_USAGE
+    executor = MacroExecutor(compile_plan(actions, mouse, keyboard, config_file), mouse, keyboard, diagnostics=diagnostics,
+                             config_file=config_file, controllers=controllers, timing=TimingProfile.from_settings(timing_settings), tracer=tracer)
+    executor.on_status = say
+    executor.on_warning = lambda title, message: _print_err(f"{title}: {message}")
+    executor.on_action_failed = _print_err
+    if args.verbose and not args.quiet: executor.on_progress = lambda index, total, name: say(f"실행 ({index}/{total}): {name}")
+
+    exit_code = EXIT_OK; run_index = 0
+    try:
+        if start_at is not None:
+            say(f"{start_at:%Y-%m-%d %H:%M:%S}에 실행 예정...")
+            time.sleep(max(0.0, (start_at - datetime.datetime.now()).total_seconds()))
+        next_start = time.perf_counter()
+        while args.repeat == 0 or run_index < args.repeat:
+            run_index += 1
+            say(f"실행 {run_index}" + (f"/{args.repeat}" if args.repeat else "") + f" 시작 ({len(executor.plan)}개 액션)")
+            if not executor.run(): exit_code = EXIT_FAILED; break
+            if args.repeat and run_index >= args.repeat: break
+            next_start += args.interval # 시작 시각 기준 간격 (실행 시간만큼 밀리지 않음)
+            time.sleep(max(0.0, next_start - time.perf_counter()))
+            next_start = max(next_start, time.perf_counter())
+    except KeyboardInterrupt:
+        executor.request_stop(); exit_code = EXIT_INTERRUPTED; _print_err("사용자 요청으로 중지되었습니다.")
+    finally:
+        diagnostics.flush(timeout=5)
+        if tracer.enabled and tracer.runs():
+            json_path, csv_path = tracer.export(os.path.dirname(config_file))
+            say(f"실행 추적 저장: {json_path}, {csv_path}")
+    say("모든 실행 완료." if exit_code == EXIT_OK else f"종료 코드 {exit_code}")
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
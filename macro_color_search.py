@@ -0,0 +1,203 @@
+# macro_color_search.py
+# '색 찾기 후 클릭' 액션용 색상 검색 엔진
+# 캡처된 프레임을 NumPy 배열(없으면 bytes 버퍼)로 바꿔 한 번의 벡터 비교로 일치 픽셀을 찾음
+from functools import lru_cache
+
+from macro_lazy import lazy_import
+
+np = lazy_import('numpy') # 첫 검색 때 로드 (없으면 순수 파이썬 경로 사용)
+
+TOLERANCE_MODE_CHANNEL = "channel"     # 채널별 차이: |R-r|, |G-g|, |B-b| 모두 tolerance 이하
+TOLERANCE_MODE_EUCLIDEAN = "euclidean" # 유클리드 거리: sqrt(dR²+dG²+dB²) 이하
+TOLERANCE_MODES = (TOLERANCE_MODE_CHANNEL, TOLERANCE_MODE_EUCLIDEAN)
+MAX_TARGET_COLORS = 64 # 비트마스크 룩업 테이블(uint64) 한 장에 담을 수 있는 목표 색상 수
+
+SEARCH_ORDER_SCAN = "scan"       # 기존 방식: 좌상단부터 열 우선 스캔의 첫 일치
+SEARCH_ORDER_NEAREST = "nearest" # initial_xy(색상을 캡처한 위치)에서 가장 가까운 일치
+SEARCH_ORDERS = (SEARCH_ORDER_SCAN, SEARCH_ORDER_NEAREST)
+NEAREST_INITIAL_RADIUS = 8       # 가까운 순 검색의 첫 창 반경 (픽셀)
+NEAREST_GROWTH = 4               # 창에서 못 찾으면 반경을 이 배율로 키움
+
+
+def frame_to_array(img):
+    """PIL 이미지를 (높이, 너비, 3) uint8 RGB 배열로 변환 (numpy 필요)"""
+    if img.mode != 'RGB': img = img.convert('RGB')
+    return np.asarray(img)
+
+
+def _first_in_mask(mask):
+    # 기존 스캔 순서(열 우선: x 먼저, 그 안에서 y)대로 첫 True 위치 선택
+    cols_with_match = mask.any(axis=0)
+    x = int(cols_with_match.argmax())
+    if not cols_with_match[x]: return None
+    return (x, int(mask[:, x].argmax()))
+
+
+def _nearest_in_mask(mask, ax, ay):
+    # 마스크의 True 중 (ax, ay)에 가장 가까운 위치와 거리 제곱
+    ys, xs = np.nonzero(mask)
+    if ys.size == 0: return None, None
+    dist_sq = (xs - ax) ** 2 + (ys - ay) ** 2
+    i = int(dist_sq.argmin())
+    return (int(xs[i]), int(ys[i])), int(dist_sq[i])
+
+
+def _find_first_in_bytes(img, target_color):
+    # numpy 없을 때: RGB bytes 버퍼에서 bytes.find로 후보를 찾고, 열 우선 순서상 가장 앞선 위치 선택
+    if img.mode != 'RGB': img = img.convert('RGB')
+    buf = img.tobytes(); needle = bytes(target_color); width = img.width
+    best = None; idx = buf.find(needle)
+    while idx != -1:
+        if idx % 3: idx = buf.find(needle, idx + 1); continue # 픽셀 경계에 맞지 않는 일치는 무시
+        pixel_index = idx // 3
+        x, y = pixel_index % width, pixel_index // width
+        if best is None or (x, y) < best:
+            best = (x, y)
+            if x == 0: break # 첫 열의 첫 일치보다 앞설 수 없음
+        idx = buf.find(needle, idx + 3)
+    return best
+
+
+class ColorMatcher:
+    """여러 목표 색상 + 허용 오차를 미리 계산된 룩업 테이블로 한 번에 판정하는 매처
+
+    채널별로 256칸짜리 uint64 테이블을 만들고, 각 칸의 k번째 비트는 '이 채널 값이 k번째 목표 색상의
+    허용 범위 안인가'를 뜻함. 픽셀 판정은 lut_r[R] & lut_g[G] & lut_b[B] != 0 한 번으로 끝남.
+    유클리드 모드는 같은 테이블(채널 차이 <= tolerance는 필요조건)로 후보를 거른 뒤,
+    후보 픽셀에 대해서만 제곱 거리 테이블로 정확히 판정함."""
+
+    def __init__(self, target_colors, tolerance=0, mode=TOLERANCE_MODE_CHANNEL):
+        colors = []
+        for color in target_colors:
+            rgb = tuple(int(c) for c in color[:3])
+            if rgb not in colors: colors.append(rgb)
+        if not colors: raise ValueError("목표 색상이 없습니다.")
+        if len(colors) > MAX_TARGET_COLORS: raise ValueError(f"목표 색상은 최대 {MAX_TARGET_COLORS}개까지 지원합니다.")
+        if mode not in TOLERANCE_MODES: raise ValueError(f"알 수 없는 허용 오차 방식: {mode}")
+        self.target_colors = tuple(colors)
+        self.tolerance = max(0, int(tolerance))
+        self.mode = mode
+        self._is_exact_single = self.tolerance == 0 and len(colors) == 1
+        self._channel_luts = None; self._sq_luts = None
+        if np is not None: self._build_tables()
+
+    def _build_tables(self):
+        values = np.arange(256, dtype=np.int32)
+        targets = np.asarray(self.target_colors, dtype=np.int32) # (k, 3)
+        bits = np.left_shift(np.uint64(1), np.arange(len(self.target_colors), dtype=np.uint64)) # (k,)
+        diff = np.abs(values[None, None, :] - targets[:, :, None]) # (k, 3, 256)
+        within = diff <= self.tolerance
+        # (3, 256) uint64: 각 채널 값별로 허용되는 목표 색상 비트 집합
+        self._channel_luts = np.bitwise_or.reduce(np.where(within, bits[:, None, None], np.uint64(0)), axis=0)
+        if self.mode == TOLERANCE_MODE_EUCLIDEAN:
+            self._sq_luts = (diff * diff).astype(np.int32) # (k, 3, 256)
+
+    def match_mask(self, rgb):
+        """(높이, 너비, 3) uint8 배열에 대해 목표 색상 중 하나에 일치하는 픽셀의 bool 마스크를 반환"""
+        luts = self._channel_luts
+        candidate_bits = luts[0][rgb[..., 0]] & luts[1][rgb[..., 1]] & luts[2][rgb[..., 2]]
+        mask = candidate_bits != 0
+        if self.mode != TOLERANCE_MODE_EUCLIDEAN or self.tolerance == 0: return mask
+        ys, xs = np.nonzero(mask)
+        if ys.size == 0: return mask
+        cand = rgb[ys, xs].astype(np.intp) # (n, 3)
+        sq = self._sq_luts
+        dist_sq = sq[:, 0, cand[:, 0]] + sq[:, 1, cand[:, 1]] + sq[:, 2, cand[:, 2]] # (k, n)
+        mask[ys, xs] = (dist_sq <= self.tolerance * self.tolerance).any(axis=0)
+        return mask
+
+    def _matches_pixel(self, rgb):
+        # numpy 없을 때의 순수 파이썬 판정
+        for target in self.target_colors:
+            if self.mode == TOLERANCE_MODE_EUCLIDEAN:
+                if sum((a - b) * (a - b) for a, b in zip(rgb, target)) <= self.tolerance * self.tolerance: return True
+            elif all(abs(a - b) <= self.tolerance for a, b in zip(rgb, target)): return True
+        return False
+
+    def find_first(self, img):
+        """이미지에서 첫 일치 픽셀의 (x, y) 오프셋을 반환 (기존 열 우선 스캔 순서), 없으면 None"""
+        if np is not None: return _first_in_mask(self.match_mask(frame_to_array(img)))
+        if self._is_exact_single: return _find_first_in_bytes(img, self.target_colors[0])
+        if img.mode != 'RGB': img = img.convert('RGB')
+        buf = img.tobytes(); width, height = img.width, img.height
+        for x in range(width):
+            for y in range(height):
+                i = (y * width + x) * 3
+                if self._matches_pixel((buf[i], buf[i + 1], buf[i + 2])): return (x, y)
+        return None
+
+    def find_nearest_in_frame(self, frame, anchor_offset):
+        """프레임에서 anchor_offset(프레임 기준 x, y)에 가장 가까운 일치 픽셀의 (x, y) 오프셋, 없으면 None"""
+        ax, ay = anchor_offset
+        if np is not None: return _nearest_in_mask(self.match_mask(frame.rgb_array()), ax, ay)[0]
+        img = frame.to_pil().convert('RGB'); buf = img.tobytes(); width = img.width; best = None; best_d = None
+        for y in range(img.height):
+            for x in range(width):
+                i = (y * width + x) * 3
+                if self._matches_pixel((buf[i], buf[i + 1], buf[i + 2])):
+                    d = (x - ax) ** 2 + (y - ay) ** 2
+                    if best_d is None or d < best_d: best, best_d = (x, y), d
+        return best
+
+    def find_first_in_frame(self, frame):
+        """macro_capture.CapturedFrame에서 첫 일치 픽셀의 (x, y) 오프셋을 반환 (BGRA 버퍼는 복사 없이 사용)"""
+        if np is not None: return _first_in_mask(self.match_mask(frame.rgb_array()))
+        return self.find_first(frame.to_pil())
+
+
+@lru_cache(maxsize=128)
+def _cached_matcher(target_colors, tolerance, mode):
+    return ColorMatcher(target_colors, tolerance, mode)
+
+
+def get_color_matcher(target_colors, tolerance=0, mode=TOLERANCE_MODE_CHANNEL):
+    """같은 설정의 매처(룩업 테이블 포함)를 재사용하도록 캐시된 ColorMatcher 반환"""
+    key = tuple(tuple(int(c) for c in color[:3]) for color in target_colors)
+    return _cached_matcher(key, int(tolerance), mode)
+
+
+def matcher_for_action(action):
+    """색 조건 액션(macro_actions의 색 찾기/색 대기/반복/조건)에서 매처 생성 (추가 필드가 없는 기존 설정은 정확히 일치 검색)"""
+    return get_color_matcher((action.target_color,) + tuple(action.extra_target_colors), action.color_tolerance, action.tolerance_mode)
+
+
+def find_nearest_progressive(grab, search_area, anchor, matcher, initial_radius=NEAREST_INITIAL_RADIUS):
+    """anchor(절대 좌표) 주변의 작은 창부터 캡처/검색하며 반경을 키워, search_area 안에서 anchor에 가장 가까운 일치를 찾음
+    grab(bbox) -> CapturedFrame. 반환: (절대 좌표 또는 None, 마지막으로 검사한 프레임)
+
+    창(반경 r) 안에서 거리 d <= r 인 일치를 찾으면 창 밖의 픽셀은 모두 r보다 멀기 때문에 그것이 전체 최근접임.
+    d > r 이면 반경을 ceil(d)로 넓혀 한 번 더 확인함. 대상이 움직이지 않았다면 첫 창에서 끝남
+    anchor가 범위 밖이면 창은 범위 안으로 옮긴 점 c를 중심으로 잡되 거리는 실제 anchor에서 잼. c는 anchor의 범위 위 사영이므로
+    범위 안 모든 점 p에 대해 |p-anchor|^2 >= |p-c|^2 + e^2 (e = |anchor-c|) -> 창 밖 픽셀은 sqrt(r^2 + e^2)보다 멂"""
+    x1, y1, x2, y2 = search_area
+    px, py = anchor[0], anchor[1]
+    ax = min(max(int(px), x1), x2 - 1); ay = min(max(int(py), y1), y2 - 1) # 창 중심: 범위 밖 anchor는 범위 안으로
+    e_sq = (px - ax) ** 2 + (py - ay) ** 2
+    r = max(1, int(initial_radius)); frame = None
+    while True:
+        window = (max(x1, ax - r), max(y1, ay - r), min(x2, ax + r + 1), min(y2, ay + r + 1))
+        is_full = window == (x1, y1, x2, y2)
+        frame = grab(window)
+        offset = matcher.find_nearest_in_frame(frame, (px - window[0], py - window[1]))
+        if offset is not None:
+            found_at = (window[0] + offset[0], window[1] + offset[1])
+            dist_sq = (found_at[0] - px) ** 2 + (found_at[1] - py) ** 2
+            if dist_sq <= r * r + e_sq or is_full: return found_at, frame
+            r = int(max(0, dist_sq - e_sq) ** 0.5) + 1; continue
+        if is_full: return None, frame
+        r *= NEAREST_GROWTH
+
+
+def find_color_first(img, target_color):
+    """이미지에서 target_color(RGB)와 정확히 일치하는 첫 픽셀의 (x, y) 오프셋을 반환, 없으면 None
+    기존 '열 우선' 이중 루프(x 바깥, y 안쪽)와 동일한 첫 일치 위치를 반환함"""
+    return get_color_matcher([target_color]).find_first(img)
+
+
+def find_color_first_legacy(img, target_color):
+    """기존 execute_actions의 getpixel 이중 루프 (벤치마크/비교용)"""
+    target_color = tuple(target_color)
+    for x_offset in range(img.width):
+        for y_offset in range(img.height):
+            if img.getpixel((x_offset, y_offset))[:3] == target_color: return (x_offset, y_offset)
+    return None
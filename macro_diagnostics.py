@@ -0,0 +1,115 @@
+# macro_diagnostics.py
+# '색 찾기' 진단 기록: 최근 N개의 검색 영역 프레임과 결과를 메모리 링 버퍼에 보관하고,
+# 실패 시 또는 요청 시에만 별도 스레드에서 PNG/JSON으로 저장 (실행 경로에서는 인코딩하지 않음)
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+DEFAULT_DIAGNOSTICS_SETTINGS = {'enabled': False, 'capacity': 20, 'dump_on_failure': True, 'output_dir': 'diagnostics'}
+
+
+class DiagnosticRecord:
+    __slots__ = ('timestamp', 'action_name', 'search_area', 'target_colors', 'found_at', 'frame')
+
+    def __init__(self, timestamp, action_name, search_area, target_colors, found_at, frame):
+        self.timestamp = timestamp; self.action_name = action_name
+        self.search_area = search_area; self.target_colors = target_colors
+        self.found_at = found_at; self.frame = frame # macro_capture.CapturedFrame (복사 없이 참조만 보관)
+
+    def to_dict(self):
+        return {'timestamp': self.timestamp, 'action_name': self.action_name, 'search_area': list(self.search_area),
+                'target_colors': [list(c) for c in self.target_colors],
+                'found_at': list(self.found_at) if self.found_at else None}
+
+
+class ColorFindDiagnostics:
+    """색 찾기 진단용 링 버퍼 + 백그라운드 저장기 (기본 비활성)"""
+
+    def __init__(self, enabled=False, capacity=20, dump_on_failure=True, output_dir='diagnostics'):
+        self._lock = threading.Lock()
+        self._records = deque(maxlen=max(1, int(capacity)))
+        self.enabled = bool(enabled)
+        self.dump_on_failure = bool(dump_on_failure)
+        self.output_dir = output_dir
+        self._write_queue = queue.Queue()
+        self._writer_thread = None
+        self._dump_seq = 0
+
+    @classmethod
+    def from_settings(cls, settings):
+        merged = dict(DEFAULT_DIAGNOSTICS_SETTINGS); merged.update(settings or {})
+        return cls(merged['enabled'], merged['capacity'], merged['dump_on_failure'], merged['output_dir'])
+
+    def to_settings(self):
+        return {'enabled': self.enabled, 'capacity': self._records.maxlen,
+                'dump_on_failure': self.dump_on_failure, 'output_dir': self.output_dir}
+
+    @property
+    def capacity(self):
+        return self._records.maxlen
+
+    def set_capacity(self, capacity):
+        with self._lock: self._records = deque(self._records, maxlen=max(1, int(capacity)))
+
+    def __len__(self):
+        return len(self._records)
+
+    def record(self, action_name, search_area, target_colors, found_at, frame):
+        """검색 결과 1건 기록 (비활성 시 아무 일도 하지 않음). 실패 + dump_on_failure면 저장 예약"""
+        if not self.enabled: return
+        rec = DiagnosticRecord(time.time(), action_name, tuple(search_area), tuple(tuple(c) for c in target_colors), found_at, frame)
+        with self._lock: self._records.append(rec)
+        if found_at is None and self.dump_on_failure: self.dump(reason="failure", clear=True)
+
+    def snapshot(self):
+        with self._lock: return list(self._records)
+
+    def clear(self):
+        with self._lock: self._records.clear()
+
+    def dump(self, reason="request", clear=False):
+        """현재 링 버퍼 내용을 디스크에 쓰도록 백그라운드 스레드에 예약. 예약된 기록 수를 반환
+        clear=True면 예약한 기록을 버퍼에서 비워 다음 실패 때 중복 저장되지 않게 함"""
+        with self._lock:
+            records = list(self._records)
+            if not records: return 0
+            if clear: self._records.clear()
+            self._dump_seq += 1; seq = self._dump_seq
+        self._write_queue.put((reason, seq, records))
+        self._ensure_writer()
+        return len(records)
+
+    def flush(self, timeout=None):
+        """예약된 저장이 모두 끝날 때까지 대기 (종료 시 사용)"""
+        if self._writer_thread is None: return True
+        done = threading.Event(); self._write_queue.put(done)
+        return done.wait(timeout)
+
+    def _ensure_writer(self):
+        if self._writer_thread is not None and self._writer_thread.is_alive(): return
+        self._writer_thread = threading.Thread(target=self._writer_loop, name="ColorFindDiagnosticsWriter", daemon=True)
+        self._writer_thread.start()
+
+    def _writer_loop(self):
+        while True:
+            item = self._write_queue.get()
+            if isinstance(item, threading.Event): item.set(); continue
+            try: self._write_dump(*item)
+            except Exception as e: print(f"[진단] 기록 저장 실패: {type(e).__name__}: {e}")
+
+    def _write_dump(self, reason, seq, records):
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = f"{time.strftime('%Y%m%d_%H%M%S')}_{seq:03d}_{reason}"
+        summary = []
+        for i, rec in enumerate(records):
+            entry = rec.to_dict()
+            if rec.frame is not None:
+                file_name = f"{prefix}_{i:02d}_{'found' if rec.found_at else 'miss'}.png"
+                rec.frame.to_pil().save(os.path.join(self.output_dir, file_name))
+                entry['image'] = file_name
+            summary.append(entry)
+        with open(os.path.join(self.output_dir, f"{prefix}.json"), 'w', encoding='utf-8') as f:
+            json.dump({'reason': reason, 'records': summary}, f, ensure_ascii=False, indent=4)
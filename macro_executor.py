@@ -0,0 +1,348 @@
+# macro_executor.py
+# 실행 계획(macro_plan.ExecutionPlan)을 실제로 실행하는 엔진. Qt에 의존하지 않음
+# GUI에서는 macro_runner.MacroRunnerThread가 작업 스레드에서 감싸 실행하고, 명령줄 실행(macro_cli)은 직접 사용
+# 진행 상황/오류는 on_status 등 콜백으로 알림 (콜백은 실행 스레드에서 호출됨)
+# 반복/조건/라벨 이동은 처리 함수가 다음 실행 위치를 반환하는 방식으로 직접 해석 (목록을 펼치지 않음)
+# 입력 주입(이동+클릭, 키 입력)은 macro_input_arbiter의 공용 잠금을 잡고 하므로 동시에 실행 중인 다른 매크로와 섞이지 않음
+import contextlib
+import threading
+import time
+
+from macro_capture import get_default_backend
+from macro_color_search import find_nearest_progressive
+from macro_input_arbiter import get_default_arbiter, DEFAULT_INPUT_PRIORITY
+from macro_plan import (ExecutionPlan, compile_plan, ClickOp, KeyComboOp, KeyModifiersOnlyOp, KeyTypeOp, DelayOp,
+                        ColorFindOp, ColorWaitOp, ImageFindOp, InvalidOp, LoopStartOp, LoopEndOp, IfColorOp, ElseOp, EndIfOp,
+                        LabelOp, GotoOp, MousePathOp, CONTROL_OPS)
+from macro_mouse_path import path_points
+from macro_timing import TimingProfile, DeadlineClock
+import macro_templates
+
+
+def _ignore(*args):
+    pass
+
+
+class MacroExecutor:
+    WAIT_POLL_MIN_S = 0.015   # '색 대기' 첫 폴링 간격
+    WAIT_POLL_MAX_S = 0.25    # '색 대기' 최대 폴링 간격
+    WAIT_POLL_BACKOFF = 1.5   # 조건 불충족 시 간격 증가 배율
+    IDLE_CYCLE_WAIT_S = 0.015 # 입력/딜레이 없이 흐름 제어만으로 뒤로 점프할 때의 최소 대기 (라벨<->이동 순환이 스레드를 점유하지 않게)
+    CONTROL_PROGRESS_INTERVAL_S = 0.05 # 흐름 제어 단계의 진행 알림 최소 간격 (GUI 이벤트 큐가 넘치지 않게)
+
+    def __init__(self, plan, pynput_mouse_module, pynput_keyboard_module, capture_backend=None, diagnostics=None,
+                 config_file="macro_config.json", controllers=None, timing=None, tracer=None, arbiter=None,
+                 input_priority=DEFAULT_INPUT_PRIORITY):
+        # 알림 콜백 (실행 스레드에서 호출됨). 기본은 아무 일도 하지 않음
+        self.on_status = _ignore             # (메시지)
+        self.on_progress = _ignore           # (현재 인덱스 1-based, 전체 개수, 액션 표시 이름)
+        self.on_warning = _ignore            # (제목, 메시지): 실행은 계속되는 경고
+        self.on_action_failed = _ignore      # (메시지): 액션 오류로 실행 중단
+        self.config_file = config_file # 템플릿 이미지 상대 경로의 기준
+        self.diagnostics = diagnostics # macro_diagnostics.ColorFindDiagnostics (None이면 기록 안 함)
+        self.capture_backend = capture_backend if capture_backend is not None else get_default_backend()
+        if not isinstance(plan, ExecutionPlan): plan = compile_plan(plan, pynput_mouse_module, pynput_keyboard_module, config_file) # 액션 dict 목록도 허용
+        self.plan = plan # 불변이므로 실행 중 목록 편집의 영향을 받지 않음
+        self.mouse_module = pynput_mouse_module
+        self.keyboard_module = pynput_keyboard_module
+        self.controllers = controllers # (마우스, 키보드) 컨트롤러. None이면 실행 시 생성
+        self.timing = timing if timing is not None else TimingProfile() # 액션 사이 패딩과 액션 사이 딜레이 정책 (기본값은 기존 고정 대기와 동일)
+        self._stop_event = threading.Event()
+        self._clock = DeadlineClock(self._stop_event)
+        self.timing_report = None # 실행 후 지터 요약 (macro_timing.DeadlineClock.report)
+        self.tracer = tracer # macro_trace.ExecutionTracer (None이거나 비활성이면 추적 안 함)
+        self._phases = None  # 추적 중인 액션의 단계별 시간 {'capture'/'search'/'inject'/'input_wait': 초}. 추적하지 않으면 None
+        self.arbiter = arbiter if arbiter is not None else get_default_arbiter() # 입력 주입 잠금 (동시 실행 중인 매크로와 공유)
+        self.input_priority = input_priority # 여러 매크로가 입력을 기다릴 때 먼저 차례를 받는 순서 (클수록 먼저)
+        self._loop_counts = {} # 진행 중인 반복: 반복 종료 위치(exit_index) -> 완료한 횟수
+        self._handlers = {ClickOp: self._run_click, KeyComboOp: self._run_key_combo, KeyModifiersOnlyOp: self._run_key_modifiers_only,
+                          KeyTypeOp: self._run_key_type, DelayOp: self._run_delay, ColorFindOp: self._execute_color_find_action,
+                          ColorWaitOp: self._execute_color_wait_action, ImageFindOp: self._execute_image_find_action,
+                          InvalidOp: self._run_invalid, LoopStartOp: self._run_loop_start, LoopEndOp: self._run_loop_end,
+                          IfColorOp: self._run_if_color, ElseOp: self._run_jump_to_end, EndIfOp: self._run_marker, LabelOp: self._run_marker,
+                          GotoOp: self._run_goto, MousePathOp: self._run_mouse_path}
+
+    def request_stop(self):
+        """실행 중지를 요청 (현재 액션 또는 대기가 끝나는 즉시 중단)"""
+        self._stop_event.set()
+        self.arbiter.wake() # 입력 차례를 기다리는 중이면 깨움
+
+    def is_stop_requested(self):
+        return self._stop_event.is_set()
+
+    def _sleep(self, seconds):
+        # 중지 요청 시 바로 깨어나는 대기. 중지되었으면 True 반환
+        return self._stop_event.wait(seconds)
+
+    def run(self):
+        """계획을 처음부터 끝까지 실행 (호출한 스레드에서). 끝까지 실행했으면 True, 오류/중지로 중단되면 False"""
+        completed = False
+        try: completed = self._run_actions()
+        except Exception as e: self.on_action_failed(f"매크로 실행 중 예기치 못한 오류: {type(e).__name__}: {e}")
+        finally:
+            close_session = getattr(self.capture_backend, 'close_thread_session', None)
+            if close_session: close_session() # 이 스레드에서 연 캡처 세션 정리
+        return completed
+
+    def _run_actions(self):
+        steps = self.plan.steps; total = len(steps)
+        if self.controllers is not None: mouse_ctrl, keyboard_ctrl = self.controllers
+        else:
+            try:
+                mouse_ctrl = self.mouse_module.Controller(); keyboard_ctrl = self.keyboard_module.Controller()
+            except Exception as e: self.on_action_failed(f"pynput 컨트롤러 생성 실패: {e}"); return False
+        self._mouse_ctrl = mouse_ctrl; self._keyboard_ctrl = keyboard_ctrl
+        handlers = self._handlers; clock = self._clock; timing = self.timing
+        inter_action_s = timing.inter_action_wait_s; between_s = 0.0 # 액션 사이 딜레이 정책: 첫 액션 전에는 기다리지 않음
+        tracer = self.tracer if self.tracer is not None and self.tracer.enabled else None # 실행 중에는 다시 확인하지 않음
+        run_trace = tracer.begin_run(total) if tracer is not None else None
+        completed = False; self._loop_counts = {}
+        worked = False; progress_t = 0.0 # 마지막 뒤로 점프 이후 입력/딜레이 단계를 실행했는지, 마지막 진행 알림 시각
+        clock.start()
+        try:
+            i = 0
+            while i < total:
+                if self.is_stop_requested(): self.on_status("사용자 요청으로 실행이 중지되었습니다."); return False
+                step = steps[i]; kind = type(step.op); padded = kind not in CONTROL_OPS
+                if padded: self.on_progress(i + 1, total, step.name); worked = True
+                else:
+                    now = time.perf_counter()
+                    if now - progress_t >= self.CONTROL_PROGRESS_INTERVAL_S: self.on_progress(i + 1, total, step.name); progress_t = now
+                if padded and clock.advance(between_s + timing.pre_action_s): continue
+                try:
+                    if run_trace is None: next_index = handlers[kind](step.name, step.op)
+                    else: next_index = self._run_traced(tracer, run_trace, i, step)
+                    if padded: clock.advance(timing.post_action_s); between_s = inter_action_s
+                except Exception as e_action:
+                    self.on_action_failed(f"액션 '{step.name}' 실행 중 오류: {type(e_action).__name__}: {e_action}")
+                    return False
+                if next_index is not None and next_index <= i: # 반복/이동으로 뒤로 점프
+                    if not worked: clock.rebase(); clock.advance(max(between_s, self.IDLE_CYCLE_WAIT_S))
+                    worked = False
+                i = i + 1 if next_index is None else next_index
+            completed = not self.is_stop_requested()
+            return completed
+        finally:
+            self._report_timing()
+            if run_trace is not None: tracer.end_run(run_trace, completed, self.timing_report)
+
+    def _run_traced(self, tracer, run_trace, index, step):
+        self._phases = phases = {}; error = None
+        start = time.perf_counter()
+        try: return self._handlers[type(step.op)](step.name, step.op)
+        except Exception as e: error = f"{type(e).__name__}: {e}"; raise
+        finally:
+            end = time.perf_counter(); self._phases = None
+            tracer.record_action(run_trace, index, step.name, type(step.op).__name__, run_trace.offset(start), end - start, phases, error)
+
+    def _report_timing(self):
+        self.timing_report = report = self._clock.report()
+        if report['waits']:
+            self.on_status(f"타이밍 지터: 평균 {report['mean_ms']:.2f}ms, p95 {report['p95_ms']:.2f}ms, 최대 {report['max_ms']:.2f}ms "
+                                    f"({report['waits']}회 대기, 총 {report['elapsed_s']:.2f}초)")
+
+    @contextlib.contextmanager
+    def _input(self):
+        """입력 주입 구간. 다른 매크로가 입력 중이면 끝날 때까지 기다림. 중지 요청으로 포기했으면 False를 줌
+        기다린 시간만큼 시간축을 다시 맞춰 이후 패딩이 밀린 시간을 한꺼번에 건너뛰지 않게 함"""
+        t0 = time.perf_counter()
+        with self.arbiter.hold(self.input_priority, self._stop_event) as acquired:
+            waited = time.perf_counter() - t0
+            if waited > self._clock.spin_threshold_s:
+                self._clock.rebase()
+                if self._phases is not None: self._phases['input_wait'] = self._phases.get('input_wait', 0.0) + waited
+            yield acquired
+
+    def _click_at(self, xy, button):
+        # 이동 -> 이동 후 패딩 -> 클릭을 한 입력 묶음으로. 추적 중이면 입력 주입 시간(패딩 제외)을 'inject' 단계로 기록
+        with self._input() as acquired:
+            if not acquired: return
+            t0 = time.perf_counter(); self._mouse_ctrl.position = xy; t1 = time.perf_counter()
+            self._clock.advance(self.timing.post_move_s)
+            t2 = time.perf_counter(); self._mouse_ctrl.click(button, 1)
+        if self._phases is not None: self._phases['inject'] = self._phases.get('inject', 0.0) + (t1 - t0) + (time.perf_counter() - t2)
+
+    def _run_click(self, name, op):
+        self._click_at((op.x, op.y), op.button)
+
+    def _run_mouse_path(self, name, op):
+        # 경로 점은 생성기가 재생 중에 하나씩 만들고, 각 점은 '경로 시작 시각 + 경과 시각' 데드라인에 주입
+        # 지금까지의 평균 주입 시간만큼 일찍 주입해 점이 데드라인에 놓이게 하고, 그래도 다음 점의 시각까지 넘겼으면 그 점은 건너뜀 (끝 점은 항상 주입)
+        # 따라서 주입이 느려도 전체 시간은 duration 그대로. 드래그는 첫 점에서 누르고 끝 점에서 뗌 (중지/오류로 끝나도 누른 버튼은 뗌)
+        with self._input() as acquired:
+            if not acquired: return
+            mouse = self._mouse_ctrl; clock = self._clock; period = 1.0 / op.rate_hz; pressed = False
+            injected = move_s = 0.0; moves = 0 # 전체 주입 시간 / 커서 이동에 걸린 시간과 횟수 (평균을 앞당김 폭으로)
+            clock.rebase(); base = clock.deadline; lead_in = self.timing.post_move_s if op.button is not None else 0.0
+            try:
+                t0 = time.perf_counter(); mouse.position = tuple(op.points[0][:2]); move_s += time.perf_counter() - t0; moves += 1
+                if op.button is not None:
+                    if clock.wait_until(base + lead_in): return
+                    t0 = time.perf_counter(); mouse.press(op.button); pressed = True; injected += time.perf_counter() - t0
+                base += lead_in
+                for elapsed, x, y in path_points(op.kind, op.points, op.duration_s, op.rate_hz):
+                    deadline = base + elapsed - move_s / moves
+                    if elapsed < op.duration_s and time.perf_counter() > deadline + period: continue
+                    if clock.wait_until(deadline): return
+                    t0 = time.perf_counter(); mouse.position = (x, y); move_s += time.perf_counter() - t0; moves += 1
+                clock.advance(lead_in + op.duration_s) # 시간축을 경로 끝으로
+                if pressed: clock.advance(self.timing.post_move_s)
+            finally:
+                if pressed: t0 = time.perf_counter(); mouse.release(op.button); injected += time.perf_counter() - t0
+                if self._phases is not None: self._phases['inject'] = self._phases.get('inject', 0.0) + injected + move_s
+
+    def _run_key_combo(self, name, op):
+        with self._input() as acquired:
+            if not acquired: return
+            with self._keyboard_ctrl.pressed(*op.modifiers): self._keyboard_ctrl.tap(op.key)
+
+    def _run_key_modifiers_only(self, name, op):
+        with self._input() as acquired:
+            if not acquired: return
+            for mod_key in op.modifiers: self._keyboard_ctrl.press(mod_key); self._keyboard_ctrl.release(mod_key); self._clock.advance(self.timing.modifier_tap_s)
+
+    def _run_key_type(self, name, op):
+        with self._input() as acquired:
+            if not acquired: return
+            with self._keyboard_ctrl.pressed(*op.modifiers):
+                if op.modifiers: self.on_status(f"경고: 모디파이어와 문자열 '{op.text}' 동시 입력 미지원.")
+                self._keyboard_ctrl.type(op.text)
+
+    def _run_delay(self, name, op):
+        self._clock.advance(op.seconds)
+
+    def _run_invalid(self, name, op):
+        if op.fatal: raise ValueError(op.message)
+        self.on_status(op.message)
+
+    def _run_marker(self, name, op):
+        pass # 라벨/조건 끝: 위치 표시만
+
+    def _run_goto(self, name, op):
+        return op.target_index
+
+    def _run_jump_to_end(self, name, op):
+        return op.end_index # 참 분기를 끝까지 실행했으면 '아니면' 분기를 건너뜀
+
+    def _check_condition(self, name, condition):
+        if not self._capture_available(): raise RuntimeError("화면 캡처를 사용할 수 없어 색 조건을 확인할 수 없습니다.")
+        return self._search_color(name, condition) is not None
+
+    def _run_if_color(self, name, op):
+        found = self._check_condition(name, op.condition)
+        self.on_status(f"조건: 색상 {op.condition.target_color} {'있음' if found else '없음'}.")
+        return None if found == op.when_found else op.else_index
+
+    def _run_loop_start(self, name, op):
+        self._loop_counts.pop(op.exit_index, None) # 반복에 새로 들어옴 (안쪽 반복은 바깥 반복마다 다시 셈)
+        if op.condition is None and op.count <= 0: return op.exit_index
+        return None
+
+    def _run_loop_end(self, name, op):
+        # 본문을 한 번 실행한 뒤 확인 (횟수 또는 색 조건). 끝나지 않았으면 본문 처음으로
+        start = self.plan.steps[op.start_index].op; done = self._loop_counts.get(op.exit_index, 0) + 1
+        if start.condition is None: finished = done >= start.count
+        elif self._check_condition(name, start.condition) == start.until_found:
+            finished = True; self.on_status(f"반복 종료 조건 충족 ({done}회 실행).")
+        elif start.max_iterations and done >= start.max_iterations:
+            finished = True; self.on_status(f"반복 최대 횟수({start.max_iterations}회)에 도달해 반복을 끝냅니다.")
+        else: finished = False
+        if finished: self._loop_counts.pop(op.exit_index, None); return None
+        self._loop_counts[op.exit_index] = done
+        return op.start_index + 1
+
+    def _capture_available(self):
+        # 캡처 액션 공통 사전 검사
+        if self.capture_backend is not None: return True
+        self.on_status("오류: 화면 캡처 라이브러리(mss 또는 Pillow)가 없어 '색 찾기' 액션 실행 불가.")
+        self.on_warning("실행 오류", "mss 또는 Pillow 라이브러리 필요.")
+        return False
+
+    def _search_color(self, name, op, record=True):
+        """검색 범위만 캡처해 색상을 찾음 ('색 찾기 후 클릭'과 '색 대기'가 공유). 절대 좌표 또는 None 반환"""
+        search_area = op.search_area; matcher = op.matcher; found_at = None
+        phases = self._phases
+        if phases is not None: start = time.perf_counter(); capture_before = phases.get('capture', 0.0); grab = self._timed_grab
+        else: grab = self.capture_backend.grab
+        if op.anchor is not None:
+            # initial_xy 주변 작은 창부터 캡처해 가장 가까운 일치를 찾음 (대상이 그대로면 첫 창에서 종료)
+            found_at, frame = find_nearest_progressive(grab, search_area, op.anchor, matcher)
+        else:
+            frame = grab(search_area)
+            found_offset = matcher.find_first_in_frame(frame) # 룩업 테이블 기반 벡터화 색상 검색 (허용 오차/다중 색상)
+            if found_offset: found_at = (search_area[0] + found_offset[0], search_area[1] + found_offset[1])
+        if phases is not None: # 캡처를 뺀 나머지가 검색 시간
+            phases['search'] = phases.get('search', 0.0) + (time.perf_counter() - start) - (phases['capture'] - capture_before)
+        if record and self.diagnostics is not None and self.diagnostics.enabled:
+            self.diagnostics.record(name, frame.bbox, matcher.target_colors, found_at, frame)
+        self._clock.rebase() # 검색 시간은 가변적이므로 이후 대기는 지금부터 계산
+        return found_at
+
+    def _timed_grab(self, bbox):
+        t0 = time.perf_counter(); frame = self.capture_backend.grab(bbox)
+        self._phases['capture'] = self._phases.get('capture', 0.0) + (time.perf_counter() - t0)
+        return frame
+
+    def _execute_color_find_action(self, name, op):
+        if not self._capture_available(): return
+        target_color = op.target_color; search_area = op.search_area
+        self.on_status(f"색상 RGB{target_color} 검색 중 (범위: {search_area})...")
+        try:
+            found_at = self._search_color(name, op)
+            if found_at:
+                self.on_status(f"색상 {target_color} 발견 위치: {found_at}. 클릭합니다.")
+                self._click_at(found_at, self.mouse_module.Button.left)
+            else: self.on_status(f"색상 {target_color}을(를) 범위 {search_area} 내에서 찾지 못했습니다.")
+        except Exception as e_color_find: self.on_status(f"'색 찾기' 액션 중 오류: {e_color_find}")
+
+    def _execute_color_wait_action(self, name, op):
+        """색상이 나타날 때(또는 사라질 때)까지 검색 범위만 반복 캡처. 조건 충족 즉시 반환
+        폴링 간격은 WAIT_POLL_MIN_S에서 시작해 조건이 안 맞을수록 WAIT_POLL_MAX_S까지 늘어나며,
+        캡처+검색 자체가 오래 걸리면 그 시간만큼은 쉬어 CPU를 독점하지 않음"""
+        if not self._capture_available(): return
+        target_color = op.target_color; wait_for_appear = op.wait_for_appear; timeout_s = op.timeout_s
+        condition_text = "나타날" if wait_for_appear else "사라질"
+        self.on_status(f"색상 RGB{target_color}이(가) {condition_text} 때까지 대기 (최대 {timeout_s:.1f}초)...")
+        start = time.perf_counter(); deadline = start + timeout_s; interval = self.WAIT_POLL_MIN_S; polls = 0
+        while True:
+            poll_start = time.perf_counter()
+            found_at = self._search_color(name, op, record=False); polls += 1
+            now = time.perf_counter()
+            if (found_at is not None) == wait_for_appear:
+                self.on_status(f"색상 {target_color} {'발견' if wait_for_appear else '사라짐'} ({(now - start) * 1000:.0f}ms, {polls}회 확인).")
+                return
+            remaining = deadline - now
+            if remaining <= 0: break
+            interval = max(interval, now - poll_start) # 캡처 비용보다 짧게 폴링하지 않음
+            if self._sleep(min(interval, remaining)): return # 중지 요청
+            interval = min(interval * self.WAIT_POLL_BACKOFF, self.WAIT_POLL_MAX_S)
+        if self.diagnostics is not None and self.diagnostics.enabled: # 시간 초과 시 마지막 화면 기록
+            self._search_color(name, op)
+        message = f"색상 {target_color} 대기 시간 초과 ({timeout_s:.1f}초, {polls}회 확인)."
+        if op.continue_on_timeout: self.on_status(message + " 다음 액션으로 진행합니다."); return
+        raise TimeoutError(message)
+
+    def _execute_image_find_action(self, name, op):
+        if not macro_templates.is_available():
+            self.on_status("오류: numpy/Pillow 라이브러리가 없어 '이미지 찾기' 액션 실행 불가.")
+            self.on_warning("실행 오류", "numpy 및 Pillow 라이브러리 필요."); return
+        if not self._capture_available(): return
+        search_area = op.search_area; template_path = op.template_path; threshold = op.threshold
+        self.on_status(f"이미지 '{op.display_path}' 검색 중 (범위: {search_area})...")
+        try:
+            template = macro_templates.get_template_cache().get(template_path) # 세션당 한 번만 디코딩
+            if self._phases is None:
+                frame = self.capture_backend.grab(search_area)
+                top_left, score = macro_templates.find_template(frame.rgb_array(), template, threshold)
+            else:
+                frame = self._timed_grab(search_area); t0 = time.perf_counter()
+                top_left, score = macro_templates.find_template(frame.rgb_array(), template, threshold)
+                self._phases['search'] = self._phases.get('search', 0.0) + (time.perf_counter() - t0)
+            self._clock.rebase()
+            if top_left:
+                found_at = (search_area[0] + top_left[0] + template.width // 2, search_area[1] + top_left[1] + template.height // 2)
+                self.on_status(f"이미지 발견 위치: {found_at} (유사도 {score:.3f}). 클릭합니다.")
+                self._click_at(found_at, self.mouse_module.Button.left)
+            else: self.on_status(f"이미지를 범위 {search_area} 내에서 찾지 못했습니다 (최고 유사도 {score:.3f} < {threshold}).")
+        except FileNotFoundError: self.on_status(f"오류: 템플릿 이미지 파일 없음 '{template_path}'.")
+        except Exception as e_image_find: self.on_status(f"'이미지 찾기' 액션 중 오류: {e_image_find}")
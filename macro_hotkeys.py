@@ -0,0 +1,89 @@
+# macro_hotkeys.py
+# 여러 매크로의 전역 단축키를 키보드 리스너 하나로 처리하는 디스패처 (Qt 위젯 모듈을 import하지 않음)
+# 눌린 키 집합(frozenset)을 dict에서 바로 찾으므로 바인딩 수와 관계없이 키 이벤트당 비용이 일정하고,
+# 바인딩 추가/변경/해제는 dict만 바꾸므로 리스너(OS 키보드 훅)를 다시 만들지 않음
+import threading
+
+# 같은 매크로가 이미 실행 중일 때 단축키가 다시 눌리면
+POLICY_IGNORE = 'ignore'     # 무시
+POLICY_QUEUE = 'queue'       # 실행이 끝난 뒤 이어서 실행 (누른 횟수만큼, 최대 MAX_QUEUED_RUNS)
+POLICY_RESTART = 'restart'   # 실행 중인 것을 중지하고 처음부터 다시 실행
+POLICY_PARALLEL = 'parallel' # 별도 실행으로 동시에 실행
+RUN_POLICIES = (POLICY_IGNORE, POLICY_QUEUE, POLICY_RESTART, POLICY_PARALLEL)
+DEFAULT_RUN_POLICY = POLICY_IGNORE
+RUN_POLICY_LABELS = {POLICY_IGNORE: "무시", POLICY_QUEUE: "대기열에 추가", POLICY_RESTART: "중지 후 다시 시작", POLICY_PARALLEL: "동시에 실행"}
+MAX_QUEUED_RUNS = 10
+
+
+class HotkeyDispatcher:
+    """pynput 키보드 리스너 하나로 여러 단축키를 감시. on_trigger(binding_id)는 리스너 스레드에서 호출됨
+    단축키 문자열은 pynput.keyboard.HotKey.parse 형식 ('<ctrl>+<shift>+a', '<f1>', '6')"""
+
+    def __init__(self, keyboard_module, on_trigger):
+        self.keyboard = keyboard_module
+        self.on_trigger = on_trigger
+        self._bindings = {}  # frozenset(정규화된 키) -> 바인딩 id
+        self._combos = {}    # 바인딩 id -> frozenset (해제/변경용 역방향 조회)
+        self._pressed = set()
+        self._fired = None   # 이미 실행한 조합 (키를 누르고 있는 동안 자동 반복으로 다시 실행하지 않음)
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def parse(self, combo):
+        """단축키 문자열을 키 집합으로. 형식이 잘못되었으면 ValueError"""
+        return frozenset(self.keyboard.HotKey.parse(combo))
+
+    def owner(self, combo):
+        """combo가 이미 지정된 바인딩 id (없으면 None)"""
+        return self._bindings.get(self.parse(combo))
+
+    def bind(self, binding_id, combo):
+        """binding_id의 단축키를 combo로 지정 (기존 지정은 대체). 다른 바인딩이 쓰는 조합이면 ValueError"""
+        keys = self.parse(combo)
+        with self._lock:
+            owner = self._bindings.get(keys)
+            if owner is not None and owner != binding_id: raise ValueError(f"'{combo}'은(는) 이미 다른 매크로에 지정되어 있습니다.")
+            old_keys = self._combos.pop(binding_id, None)
+            if old_keys is not None: self._bindings.pop(old_keys, None)
+            self._bindings[keys] = binding_id; self._combos[binding_id] = keys
+        self.start()
+
+    def unbind(self, binding_id):
+        with self._lock:
+            keys = self._combos.pop(binding_id, None)
+            if keys is not None: self._bindings.pop(keys, None)
+
+    def bindings(self):
+        with self._lock: return dict(self._combos)
+
+    def start(self):
+        """리스너는 처음 바인딩될 때 한 번만 만들고 종료 시까지 유지"""
+        if self._listener is not None: return
+        self._listener = self.keyboard.Listener(on_press=self._on_press, on_release=self._on_release)
+        self._listener.start()
+
+    def stop(self):
+        if self._listener is None: return
+        try: self._listener.stop()
+        finally: self._listener = None; self._pressed.clear(); self._fired = None
+
+    def is_running(self):
+        return self._listener is not None
+
+    def _canonical(self, key):
+        canonical = getattr(self._listener, 'canonical', None) # 좌/우 보조키, 대소문자 등을 단축키 형식으로 정규화
+        return canonical(key) if canonical is not None else key
+
+    def _on_press(self, key, injected=False):
+        if injected: return # 매크로가 보낸 입력으로는 단축키를 실행하지 않음
+        key = self._canonical(key); self._pressed.add(key)
+        keys = frozenset(self._pressed)
+        if keys == self._fired: return
+        binding_id = self._bindings.get(keys)
+        if binding_id is None: return
+        self._fired = keys
+        self.on_trigger(binding_id)
+
+    def _on_release(self, key, injected=False):
+        if injected: return
+        self._pressed.discard(self._canonical(key)); self._fired = None
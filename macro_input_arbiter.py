@@ -0,0 +1,87 @@
+# macro_input_arbiter.py
+# 여러 매크로를 동시에 실행할 때 마우스/키보드 입력 주입을 한 번에 한 매크로만 하도록 조정하는 우선순위 잠금 (Qt에 의존하지 않음)
+# 화면 캡처/색 검색은 잠그지 않으므로 병렬로 진행되고, 이동 -> 대기 -> 클릭 같은 입력 묶음만 하나의 단위로 직렬화됨
+# 잠금이 풀리면 기다리는 매크로 중 우선순위가 가장 높은 것(같으면 먼저 기다린 것)이 다음 차례를 받음. 실행 중인 입력 묶음을 가로채지는 않음
+import contextlib
+import heapq
+import itertools
+import threading
+import time
+
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 50
+PRIORITY_HIGH = 100
+INPUT_PRIORITIES = (PRIORITY_LOW, PRIORITY_NORMAL, PRIORITY_HIGH)
+DEFAULT_INPUT_PRIORITY = PRIORITY_NORMAL
+INPUT_PRIORITY_LABELS = {PRIORITY_LOW: "낮음", PRIORITY_NORMAL: "보통", PRIORITY_HIGH: "높음"}
+
+
+class InputArbiter:
+    """우선순위 잠금. 같은 스레드에서 다시 잡을 수 있음 (중첩된 입력 묶음)
+    대기 중 stop_event가 설정되면 wake()로 깨워 잡지 않고 반환"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._owner = None   # 잠금을 가진 스레드 id
+        self._depth = 0
+        self._waiters = []   # 힙: (-우선순위, 도착 순번, 스레드 id)
+        self._seq = itertools.count()
+        self.contended = 0   # 다른 매크로가 입력 중이라 기다린 횟수
+        self.wait_s = 0.0    # 기다린 시간 합계
+
+    def acquire(self, priority=DEFAULT_INPUT_PRIORITY, stop_event=None):
+        """차례가 오면 잡고 True. 기다리는 동안 stop_event가 설정되면 False"""
+        me = threading.get_ident()
+        with self._cond:
+            if self._owner == me: self._depth += 1; return True
+            if self._owner is None and not self._waiters: self._owner = me; self._depth = 1; return True
+            entry = (-priority, next(self._seq), me); heapq.heappush(self._waiters, entry)
+            start = time.perf_counter(); self.contended += 1
+            try:
+                while self._owner is not None or self._waiters[0] is not entry:
+                    if stop_event is not None and stop_event.is_set(): return False
+                    self._cond.wait()
+                heapq.heappop(self._waiters)
+                self._owner = me; self._depth = 1
+                return True
+            finally:
+                if self._owner != me: # 포기: 대기열에서 빼고, 뒤에 있던 대기자가 맨 앞이 되었을 수 있으므로 깨움
+                    self._waiters.remove(entry); heapq.heapify(self._waiters); self._cond.notify_all()
+                self.wait_s += time.perf_counter() - start
+
+    def release(self):
+        with self._cond:
+            if self._owner != threading.get_ident(): raise RuntimeError("입력 잠금을 가진 스레드가 아닙니다.")
+            self._depth -= 1
+            if self._depth == 0: self._owner = None; self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def hold(self, priority=DEFAULT_INPUT_PRIORITY, stop_event=None):
+        """with arbiter.hold(...) as acquired: acquired가 False면 (중지 요청) 입력하지 말 것"""
+        acquired = self.acquire(priority, stop_event)
+        try: yield acquired
+        finally:
+            if acquired: self.release()
+
+    def wake(self):
+        """기다리는 스레드들이 중지 요청을 확인하도록 깨움"""
+        with self._cond: self._cond.notify_all()
+
+    def is_held(self):
+        with self._cond: return self._owner is not None
+
+    def waiting_count(self):
+        with self._cond: return len(self._waiters)
+
+
+_default_arbiter = None
+_default_lock = threading.Lock()
+
+
+def get_default_arbiter():
+    """프로세스 공용 입력 잠금 (같은 프로세스의 모든 실행기가 공유해야 서로의 입력을 막을 수 있음)"""
+    global _default_arbiter
+    if _default_arbiter is None:
+        with _default_lock:
+            if _default_arbiter is None: _default_arbiter = InputArbiter()
+    return _default_arbiter
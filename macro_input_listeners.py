@@ -1,7 +1,42 @@
 # macro_input_listeners.py
+import threading
+
 from PyQt5.QtCore import QThread, pyqtSignal
+from macro_recorder import RECORD_STOP_KEY
 # pynput 모듈은 생성자에서 주입받음
 
+def key_display_name(key, keyboard_module):
+    """pynput 키 -> 키 캡처/녹화에서 쓰는 표시 이름 ('a', 'Enter', 'F5' ...). 알 수 없으면 None"""
+    if isinstance(key, keyboard_module.Key):
+        name = key.name
+        display_map = { "space": "Space", "enter": "Enter", "backspace": "Backspace", "tab": "Tab",
+                        "escape": "Esc", "delete": "Del", "ctrl": "Ctrl", "ctrl_l": "Ctrl", 
+                        "ctrl_r": "Ctrl", "shift": "Shift", "shift_l": "Shift", "shift_r": "Shift",
+                        "alt": "Alt", "alt_l": "Alt", "alt_r": "Alt", "alt_gr": "Alt",
+                        "cmd": "Cmd", "cmd_l": "Cmd", "cmd_r": "Cmd", "win_l": "Win", 
+                        "win_r": "Win", "super": "Super", "up": "Up", "down": "Down", 
+                        "left": "Left", "right": "Right", "home": "Home", "end": "End", 
+                        "page_up": "PageUp", "page_down": "PageDown",}
+        if name.startswith('f') and name[1:].isdigit() and 1 <= int(name[1:]) <= 24: return name.upper()
+        return display_map.get(name, name.capitalize())
+    elif isinstance(key, keyboard_module.KeyCode):
+        char = key.char
+        # Ctrl을 누른 채 입력한 글자는 윈도우에서 제어 문자('\x03' 등)로 오므로 가상 키 코드로 되돌림
+        if char and ord(char) < 32 and getattr(key, 'vk', None) and 65 <= key.vk <= 90: char = chr(key.vk).lower()
+        return char if char else f"[vk={key.vk}]"
+    return None
+
+
+def modifier_name(key, keyboard_module):
+    """모디파이어 키면 'Ctrl'/'Shift'/'Alt'/'Meta', 아니면 None (좌우 구분 없음)"""
+    Key = keyboard_module.Key
+    if key in [Key.ctrl_l, Key.ctrl_r]: return "Ctrl"
+    if key in [Key.shift_l, Key.shift_r]: return "Shift"
+    if key in [Key.alt_l, Key.alt_r, Key.alt_gr]: return "Alt"
+    if key in [Key.cmd_l, Key.cmd_r] or (hasattr(Key, 'win_l') and key in [Key.win_l, Key.win_r]) or (hasattr(Key, 'super') and key == Key.super): return "Meta"
+    return None
+
+
 class MouseCoordListenerThread(QThread):
     coords_captured_signal = pyqtSignal(int, int)
     capture_failed_signal = pyqtSignal(str)
@@ -35,32 +70,12 @@ class KeyboardKeyListenerThread(QThread):
         self.pressed_modifiers = set()
         self._captured_key_combo_str = None
     def _key_to_display_name(self, key):
-        if isinstance(key, self.keyboard_module.Key):
-            name = key.name
-            display_map = { "space": "Space", "enter": "Enter", "backspace": "Backspace", "tab": "Tab",
-                            "escape": "Esc", "delete": "Del", "ctrl": "Ctrl", "ctrl_l": "Ctrl", 
-                            "ctrl_r": "Ctrl", "shift": "Shift", "shift_l": "Shift", "shift_r": "Shift",
-                            "alt": "Alt", "alt_l": "Alt", "alt_r": "Alt", "alt_gr": "Alt",
-                            "cmd": "Cmd", "cmd_l": "Cmd", "cmd_r": "Cmd", "win_l": "Win", 
-                            "win_r": "Win", "super": "Super", "up": "Up", "down": "Down", 
-                            "left": "Left", "right": "Right", "home": "Home", "end": "End", 
-                            "page_up": "PageUp", "page_down": "PageDown",}
-            if name.startswith('f') and name[1:].isdigit() and 1 <= int(name[1:]) <= 24: return name.upper()
-            return display_map.get(name, name.capitalize())
-        elif isinstance(key, self.keyboard_module.KeyCode):
-            return key.char if key.char else f"[vk={key.vk}]"
-        return None
+        return key_display_name(key, self.keyboard_module)
     def run(self):
         self.pressed_modifiers.clear(); self._captured_key_combo_str = None
         def on_press(key):
-            nonlocal self; is_modifier_key = False; mod_name_for_set = None
-            if key in [self.keyboard_module.Key.ctrl_l, self.keyboard_module.Key.ctrl_r]: is_modifier_key = True; mod_name_for_set = "Ctrl"
-            elif key in [self.keyboard_module.Key.shift_l, self.keyboard_module.Key.shift_r]: is_modifier_key = True; mod_name_for_set = "Shift"
-            elif key in [self.keyboard_module.Key.alt_l, self.keyboard_module.Key.alt_r, self.keyboard_module.Key.alt_gr]: is_modifier_key = True; mod_name_for_set = "Alt"
-            elif key in [self.keyboard_module.Key.cmd_l, self.keyboard_module.Key.cmd_r] or \
-                 (hasattr(self.keyboard_module.Key, 'win_l') and key in [self.keyboard_module.Key.win_l, self.keyboard_module.Key.win_r]) or \
-                 (hasattr(self.keyboard_module.Key, 'super') and key == self.keyboard_module.Key.super): is_modifier_key = True; mod_name_for_set = "Meta"
-            if is_modifier_key and mod_name_for_set: self.pressed_modifiers.add(mod_name_for_set); return True
+            nonlocal self; mod_name_for_set = modifier_name(key, self.keyboard_module)
+            if mod_name_for_set: self.pressed_modifiers.add(mod_name_for_set); return True
             main_key_display_name = self._key_to_display_name(key)
             if not main_key_display_name: return True
             final_mods_display = []
@@ -72,13 +87,7 @@ class KeyboardKeyListenerThread(QThread):
             else: self._captured_key_combo_str = main_key_display_name
             self.key_captured_signal.emit(self._captured_key_combo_str); return False
         def on_release(key):
-            nonlocal self; mod_name_for_set = None
-            if key in [self.keyboard_module.Key.ctrl_l, self.keyboard_module.Key.ctrl_r]: mod_name_for_set = "Ctrl"
-            elif key in [self.keyboard_module.Key.shift_l, self.keyboard_module.Key.shift_r]: mod_name_for_set = "Shift"
-            elif key in [self.keyboard_module.Key.alt_l, self.keyboard_module.Key.alt_r, self.keyboard_module.Key.alt_gr]: mod_name_for_set = "Alt"
-            elif key in [self.keyboard_module.Key.cmd_l, self.keyboard_module.Key.cmd_r] or \
-                 (hasattr(self.keyboard_module.Key, 'win_l') and key in [self.keyboard_module.Key.win_l, self.keyboard_module.Key.win_r]) or \
-                 (hasattr(self.keyboard_module.Key, 'super') and key == self.keyboard_module.Key.super): mod_name_for_set = "Meta"
+            nonlocal self; mod_name_for_set = modifier_name(key, self.keyboard_module)
             if mod_name_for_set and mod_name_for_set in self.pressed_modifiers:
                 try: self.pressed_modifiers.remove(mod_name_for_set)
                 except KeyError: pass
@@ -91,4 +100,53 @@ class KeyboardKeyListenerThread(QThread):
     def stop_listener(self):
         if self.listener and hasattr(self.listener, 'stop') and self.listener.is_alive():
             try: self.listener.stop()
-            except: pass
\ No newline at end of file
+            except: pass
+
+class MacroRecorderThread(QThread):
+    """녹화 모드: 마우스/키보드 리스너를 함께 띄워 입력을 MacroRecorder에 넘기고, 중지되면 녹화된 액션 목록을 보냄
+    RECORD_STOP_KEY를 누르거나 stop_listener()를 부르면 끝남. 액션 합치기는 MacroRecorder가 이벤트를 받는 즉시 함"""
+    recording_finished_signal = pyqtSignal(list) # 액션 객체 목록
+    capture_failed_signal = pyqtSignal(str)
+    def __init__(self, pynput_mouse_module, pynput_keyboard_module, recorder, parent=None):
+        super().__init__(parent)
+        self.mouse_module = pynput_mouse_module; self.keyboard_module = pynput_keyboard_module
+        self.recorder = recorder
+        self.stopped_by_key = False
+        self._stop_event = threading.Event()
+        self._pressed_modifiers = set()
+        self._modifiers_only = None # 다른 키 없이 눌린 모디파이어들 (모두 떼면 모디파이어만 입력한 것으로 기록)
+    def run(self):
+        recorder = self.recorder; mouse_listener = keyboard_listener = None
+        def on_move(x, y): recorder.move(x, y)
+        def on_click(x, y, button, pressed):
+            if pressed: recorder.press(x, y, getattr(button, 'name', 'left'))
+            else: recorder.release(x, y, getattr(button, 'name', 'left'))
+        def on_press(key):
+            mod = modifier_name(key, self.keyboard_module)
+            if mod:
+                if not self._pressed_modifiers: self._modifiers_only = set()
+                if self._modifiers_only is not None: self._modifiers_only.add(mod)
+                self._pressed_modifiers.add(mod); recorder.ignore(); return
+            self._modifiers_only = None
+            name = key_display_name(key, self.keyboard_module)
+            if name is None: recorder.ignore(); return
+            if name == RECORD_STOP_KEY and not self._pressed_modifiers: self.stopped_by_key = True; self._stop_event.set(); return
+            recorder.key(name, self._pressed_modifiers)
+        def on_release(key):
+            mod = modifier_name(key, self.keyboard_module)
+            self._pressed_modifiers.discard(mod)
+            if mod and not self._pressed_modifiers and self._modifiers_only: recorder.modifiers_only(self._modifiers_only); self._modifiers_only = None
+            else: recorder.ignore()
+        try:
+            mouse_listener = self.mouse_module.Listener(on_move=on_move, on_click=on_click); mouse_listener.start()
+            keyboard_listener = self.keyboard_module.Listener(on_press=on_press, on_release=on_release, suppress=False); keyboard_listener.start()
+            self._stop_event.wait()
+        except Exception as e: self.capture_failed_signal.emit(f"녹화 리스너 오류: {e}")
+        finally:
+            for listener in (mouse_listener, keyboard_listener):
+                if listener is not None:
+                    try: listener.stop()
+                    except Exception: pass
+            self.recording_finished_signal.emit(recorder.finish())
+    def stop_listener(self):
+        self._stop_event.set()
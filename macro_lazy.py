@@ -0,0 +1,40 @@
+# macro_lazy.py
+# 무거운 선택적 라이브러리(numpy, Pillow, mss)를 처음 사용할 때 import하기 위한 대리 모듈
+# 설치 여부는 모듈을 실행하지 않고 find_spec으로만 확인하므로, 기존의 "없으면 None" 검사를 그대로 쓸 수 있음
+import importlib
+import importlib.machinery
+import importlib.util
+import sys
+import types
+
+
+class _LazyModule(types.ModuleType):
+    """첫 속성 접근 시 실제 모듈을 import하고 그 속성들을 자신에게 복사 (이후 접근은 일반 모듈과 같은 비용)"""
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+    def __repr__(self):
+        loaded = self.__name__ in sys.modules
+        return f"<lazy module '{self.__name__}' ({'loaded' if loaded else 'not loaded'})>"
+
+
+def _find_spec_without_import(name):
+    # find_spec('a.b')는 부모 패키지 a를 실행하므로, 최상위 패키지부터 부모의 검색 경로만으로 하위 모듈을 찾아 내려감 (어느 모듈도 실행하지 않음)
+    parts = name.split('.')
+    spec = importlib.util.find_spec(parts[0])
+    for depth in range(1, len(parts)):
+        if spec is None or not spec.submodule_search_locations: return None
+        spec = importlib.machinery.PathFinder.find_spec('.'.join(parts[:depth + 1]), spec.submodule_search_locations)
+    return spec
+
+
+def lazy_import(name):
+    """name 모듈의 지연 로딩 대리 객체. 설치되어 있지 않으면 None (이미 로드된 모듈이면 그 모듈)"""
+    if name in sys.modules: return sys.modules[name]
+    try: spec = _find_spec_without_import(name)
+    except (ImportError, ValueError): spec = None
+    if spec is None: return None
+    return _LazyModule(name)
@@ -0,0 +1,271 @@
+# macro_library.py
+# 이름 있는 매크로 여러 개를 보관하는 매크로 라이브러리
+# 설정 파일 옆 macros/ 폴더에 목록용 색인(index.json)과 매크로별 파일(<id>.json)을 둠
+# 색인만 시작 시 읽고, 매크로 본문은 열거나 실행할 때 읽음. 저장은 변경된 파일만, 디바운스 후 백그라운드 스레드에서
+# 단축키, 실행 정책, 입력 우선순위는 매크로 본문을 읽지 않고 바로 쓸 수 있도록 색인에 둠
+# 임시 파일에 쓰고 이름을 바꾸는 방식(원자적 교체)으로 수행해 중간에 종료되어도 기존 파일이 깨지지 않음
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+from macro_timing import fold_auto_inserted_delays
+from macro_actions import actions_from_dicts, actions_to_dicts
+
+LIBRARY_DIR_NAME = "macros"
+INDEX_FILE_NAME = "index.json"
+INDEX_VERSION = 1
+DEFAULT_MACRO_NAME = "기본 매크로"
+SAVE_DEBOUNCE_S = 0.5 # 마지막 편집 후 이 시간 동안 추가 편집이 없으면 저장
+
+
+def atomic_write_json(path, data, indent=None):
+    """같은 폴더의 임시 파일에 쓰고 fsync 후 os.replace로 교체 (읽는 쪽은 항상 완전한 이전/새 파일만 봄)"""
+    directory = os.path.dirname(os.path.abspath(path)); os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent, separators=None if indent else (',', ':'))
+            f.flush(); os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try: os.remove(tmp_path)
+        except OSError: pass
+        raise
+
+
+class DebouncedWriter:
+    """경로별 저장 예약을 모아 두었다가 마지막 예약 후 delay_s가 지나면 백그라운드 스레드에서 기록
+    producer()는 기록 직전에 (작업 스레드에서) 호출되어 저장할 데이터를 만듦"""
+
+    def __init__(self, delay_s=SAVE_DEBOUNCE_S):
+        self.delay_s = delay_s
+        self.last_error = None
+        self._pending = {}  # 경로 -> (기한, producer, indent)
+        self._writing = 0
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def schedule(self, path, producer, indent=None, delay_s=None):
+        due = time.monotonic() + (self.delay_s if delay_s is None else delay_s)
+        with self._cond:
+            self._pending[path] = (due, producer, indent)
+            self._cond.notify_all()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="MacroLibraryWriter", daemon=True); self._thread.start()
+
+    def cancel(self, path):
+        with self._cond: self._pending.pop(path, None)
+
+    def has_pending(self):
+        with self._cond: return bool(self._pending) or self._writing > 0
+
+    def flush(self, timeout=None):
+        """예약된 저장을 기다리지 않고 즉시 수행하도록 하고 모두 끝날 때까지 대기. 시간 안에 끝나면 True"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            for path, (due, producer, indent) in list(self._pending.items()): self._pending[path] = (0.0, producer, indent)
+            self._cond.notify_all()
+            while self._pending or self._writing:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0: return False
+                self._cond.wait(remaining)
+        return True
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._pending: self._cond.wait(); continue
+                    path, (due, producer, indent) = min(self._pending.items(), key=lambda item: item[1][0])
+                    wait_s = due - time.monotonic()
+                    if wait_s <= 0: break
+                    self._cond.wait(wait_s)
+                del self._pending[path]; self._writing += 1
+            try: atomic_write_json(path, producer(), indent)
+            except Exception as e:
+                self.last_error = e; print(f"[매크로 라이브러리] '{path}' 저장 실패: {type(e).__name__}: {e}")
+            finally:
+                with self._cond: self._writing -= 1; self._cond.notify_all()
+
+
+class Macro:
+    """라이브러리의 매크로 하나. actions는 MacroApp.actions_list와 같은 액션 객체(macro_actions) 목록, timing은 macro_timing 설정(ms) dict"""
+    __slots__ = ('macro_id', 'name', 'actions', 'timing')
+
+    def __init__(self, macro_id, name, actions=None, timing=None):
+        self.macro_id = macro_id; self.name = name
+        self.actions = actions if actions is not None else []
+        self.timing = timing
+
+    def to_dict(self):
+        # 목록 자체를 복사해 두면 저장 중 GUI 스레드의 편집(목록 교체/항목 교체)과 충돌하지 않음
+        return {'name': self.name, 'actions': actions_to_dicts(list(self.actions)), 'timing': self.timing}
+
+
+class MacroLibrary:
+    def __init__(self, root_dir, writer=None):
+        self.root_dir = root_dir
+        self.index_path = os.path.join(root_dir, INDEX_FILE_NAME)
+        self.writer = writer if writer is not None else DebouncedWriter()
+        self._entries = {}  # id -> {'name', 'file', 'action_count', 'hotkey', 'run_policy', 'input_priority'} (색인 순서 유지)
+        self._macros = {}   # 읽어 들인 매크로 캐시: id -> Macro
+
+    @classmethod
+    def for_config(cls, config_file, writer=None):
+        return cls(os.path.join(os.path.dirname(os.path.abspath(config_file)), LIBRARY_DIR_NAME), writer)
+
+    def exists(self):
+        return os.path.exists(self.index_path)
+
+    def load_index(self):
+        """색인만 읽음 (매크로 본문은 읽지 않음). 색인이 없으면 빈 라이브러리"""
+        self._entries = {}; self._macros = {}
+        if not self.exists(): return self
+        with open(self.index_path, 'r', encoding='utf-8') as f: index = json.load(f)
+        for entry in index.get('macros', []):
+            self._entries[entry['id']] = {'name': entry['name'], 'file': entry['file'], 'action_count': entry.get('action_count', 0),
+                                          'hotkey': entry.get('hotkey'), 'run_policy': entry.get('run_policy'),
+                                          'input_priority': entry.get('input_priority')}
+        return self
+
+    def rebuild_index(self):
+        """색인이 손상된 경우 폴더의 매크로 파일들로 색인을 다시 만듦 (읽을 수 없는 파일은 건너뜀)"""
+        self._entries = {}; self._macros = {}
+        file_names = sorted(os.listdir(self.root_dir)) if os.path.isdir(self.root_dir) else []
+        for file_name in file_names:
+            if file_name == INDEX_FILE_NAME or file_name.startswith('.') or not file_name.endswith('.json'): continue
+            try:
+                with open(os.path.join(self.root_dir, file_name), 'r', encoding='utf-8') as f: data = json.load(f)
+            except (OSError, ValueError): continue
+            macro_id = file_name[:-len('.json')]
+            self._entries[macro_id] = {'name': self.unique_name(data.get('name') or macro_id), 'file': file_name,
+                                       'action_count': len(data.get('actions', [])), 'hotkey': None, 'run_policy': None,
+                                       'input_priority': None}
+        self._schedule_index_save()
+        return self
+
+    def __len__(self):
+        return len(self._entries)
+
+    def ids(self):
+        return list(self._entries)
+
+    def name_of(self, macro_id):
+        return self._entries[macro_id]['name']
+
+    def entry_file(self, macro_id):
+        return self._entries[macro_id]['file']
+
+    def action_count(self, macro_id):
+        macro = self._macros.get(macro_id)
+        return len(macro.actions) if macro is not None else self._entries[macro_id]['action_count']
+
+    def hotkey(self, macro_id):
+        """매크로의 단축키 (QKeySequence PortableText 문자열, 없으면 None)"""
+        return self._entries[macro_id]['hotkey']
+
+    def run_policy(self, macro_id):
+        """이미 실행 중일 때 단축키/실행 요청 처리 방식 (macro_hotkeys.RUN_POLICIES 중 하나, 지정 안 했으면 None)"""
+        return self._entries[macro_id]['run_policy']
+
+    def set_binding(self, macro_id, hotkey, run_policy):
+        entry = self._entries[macro_id]
+        if (entry['hotkey'], entry['run_policy']) == (hotkey, run_policy): return
+        entry['hotkey'] = hotkey; entry['run_policy'] = run_policy
+        self._schedule_index_save()
+
+    def input_priority(self, macro_id):
+        """동시에 실행 중인 매크로들이 입력 차례를 기다릴 때의 우선순위 (macro_input_arbiter.INPUT_PRIORITIES 중 하나, 지정 안 했으면 None)"""
+        return self._entries[macro_id]['input_priority']
+
+    def set_input_priority(self, macro_id, priority):
+        entry = self._entries[macro_id]
+        if entry['input_priority'] == priority: return
+        entry['input_priority'] = priority
+        self._schedule_index_save()
+
+    def find_id(self, name):
+        for macro_id, entry in self._entries.items():
+            if entry['name'] == name: return macro_id
+        return None
+
+    def is_loaded(self, macro_id):
+        return macro_id in self._macros
+
+    def get(self, macro_id):
+        """매크로 본문을 (처음 요청될 때) 읽어 반환. 없는 id면 KeyError"""
+        macro = self._macros.get(macro_id)
+        if macro is not None: return macro
+        entry = self._entries[macro_id]
+        with open(os.path.join(self.root_dir, entry['file']), 'r', encoding='utf-8') as f: data = json.load(f)
+        actions = data.get('actions', [])
+        folded_actions, timing = fold_auto_inserted_delays(actions, data.get('timing'))
+        macro = Macro(macro_id, entry['name'], actions_from_dicts(folded_actions), timing)
+        self._macros[macro_id] = macro
+        if folded_actions is not actions: self.mark_dirty(macro) # 예전 자동 딜레이를 정책으로 바꾼 내용을 저장
+        return macro
+
+    def get_by_name(self, name):
+        macro_id = self.find_id(name)
+        if macro_id is None: raise KeyError(name)
+        return self.get(macro_id)
+
+    def unique_name(self, base_name):
+        names = {entry['name'] for entry in self._entries.values()}
+        if base_name not in names: return base_name
+        n = 2
+        while f"{base_name} ({n})" in names: n += 1
+        return f"{base_name} ({n})"
+
+    def create(self, name, actions=None, timing=None):
+        macro_id = uuid.uuid4().hex[:12]
+        macro = Macro(macro_id, self.unique_name(name), actions, timing)
+        self._entries[macro_id] = {'name': macro.name, 'file': f"{macro_id}.json", 'action_count': len(macro.actions), 'hotkey': None, 'run_policy': None,
+                                  'input_priority': None}
+        self._macros[macro_id] = macro
+        self.mark_dirty(macro)
+        return macro
+
+    def rename(self, macro_id, new_name):
+        new_name = new_name if new_name == self.name_of(macro_id) else self.unique_name(new_name)
+        self._entries[macro_id]['name'] = new_name
+        macro = self.get(macro_id); macro.name = new_name
+        self.mark_dirty(macro)
+        return new_name
+
+    def delete(self, macro_id):
+        entry = self._entries.pop(macro_id); self._macros.pop(macro_id, None)
+        path = os.path.join(self.root_dir, entry['file'])
+        self.writer.cancel(path)
+        try: os.remove(path)
+        except FileNotFoundError: pass
+        self._schedule_index_save()
+
+    def mark_dirty(self, macro):
+        """매크로 편집 후 호출: 해당 매크로 파일과 색인만 디바운스 저장 예약"""
+        self._entries[macro.macro_id]['action_count'] = len(macro.actions)
+        self.writer.schedule(os.path.join(self.root_dir, self._entries[macro.macro_id]['file']), macro.to_dict)
+        self._schedule_index_save()
+
+    def _index_data(self):
+        return {'version': INDEX_VERSION,
+                'macros': [{'id': macro_id, 'name': e['name'], 'file': e['file'], 'action_count': e['action_count'],
+                            'hotkey': e['hotkey'], 'run_policy': e['run_policy'], 'input_priority': e['input_priority']} for macro_id, e in list(self._entries.items())]}
+
+    def _schedule_index_save(self):
+        self.writer.schedule(self.index_path, self._index_data, indent=4)
+
+    def flush(self, timeout=None):
+        return self.writer.flush(timeout)
+
+    def migrate_legacy_config(self, config_data):
+        """예전 단일 매크로 설정('actions'/'timing' 키)을 라이브러리의 기본 매크로로 옮김
+        색인이 이미 있거나 옮길 내용이 없으면 None. 옮겼으면 만든 Macro (디스크에 즉시 기록)"""
+        if self.exists() or 'actions' not in config_data: return None
+        actions, timing = fold_auto_inserted_delays(config_data.get('actions') or [], config_data.get('timing'))
+        macro = self.create(DEFAULT_MACRO_NAME, actions_from_dicts(actions), timing)
+        self.flush()
+        return macro
@@ -1,12 +1,27 @@
 # macro_main.py
+import os
 import sys
+import time
+
+_startup_t0 = time.perf_counter() # 시작 시간 예산 측정 기준
+
+if __name__ == '__main__' and '--cli' in sys.argv[1:]: # 창 없이 명령줄 실행: Qt를 로드하기 전에 분기
+    from macro_cli import main as cli_main
+    sys.exit(cli_main([arg for arg in sys.argv[1:] if arg != '--cli']))
+
+# 모듈별 import 시간 보고서 (python macro_main.py --import-report 또는 MACRO_IMPORT_REPORT=1)
+import_timer = None
+if __name__ == '__main__' and ('--import-report' in sys.argv[1:] or os.environ.get('MACRO_IMPORT_REPORT') == '1'):
+    from macro_startup import ImportTimer
+    import_timer = ImportTimer().install()
+
 from PyQt5.QtWidgets import QApplication, QMessageBox
+from PyQt5.QtCore import QTimer
 
-# pynput 및 Pillow, mss 로드 시도
+# pynput 로드 시도 (단축키 리스너가 시작 시 필요하므로 즉시 로드)
+# 화면 캡처 라이브러리(mss, Pillow, numpy)와 돋보기/대화상자는 처음 사용할 때 로드됨 (macro_lazy, macro_capture 참고)
 pynput_mouse_module_loaded = None
 pynput_keyboard_module_loaded = None
-pillow_loaded = False 
-mss_loaded = False 
 
 try:
     from pynput import mouse as pynput_mouse_mod
@@ -14,22 +29,22 @@ try:
     pynput_mouse_module_loaded = pynput_mouse_mod
     pynput_keyboard_module_loaded = pynput_keyboard_mod
 except ImportError:
-    pass 
+    pass
 
-try:
-    from PIL import ImageGrab 
-    pillow_loaded = True
-except ImportError:
-    pass 
+# MacroApp은 모든 import 시도 후에 import
+from macro_app_widget import MacroApp
 
-try:
-    import mss 
-    mss_loaded = True
-except ImportError:
-    pass 
 
-# MacroApp은 모든 import 시도 후에 import
-from macro_app_widget import MacroApp 
+def report_startup_time(main_window):
+    # 첫 이벤트 루프 진입 시점(창이 실제로 표시된 직후)에 호출
+    from macro_startup import check_startup_budget, STARTUP_BUDGET_S
+    elapsed, over_budget = check_startup_budget(_startup_t0)
+    if import_timer is not None:
+        import_timer.uninstall()
+        print("\n".join(import_timer.report_lines()))
+    if over_budget: main_window.update_status(f"경고: 시작에 {elapsed * 1000:.0f}ms 소요 (목표 {STARTUP_BUDGET_S * 1000:.0f}ms 초과).")
+    elif import_timer is not None: main_window.update_status(f"시작 시간: {elapsed * 1000:.0f}ms")
+
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
@@ -40,16 +55,10 @@ if __name__ == '__main__':
                              "'pip install pynput'으로 설치 후 다시 실행해주세요.\n"
                              "프로그램을 종료합니다.")
         sys.exit(1)
-    
-    # Pillow / mss 상태에 따른 알림 (선택적)
-    # if not pillow_loaded and not mss_loaded: 
-    #     QMessageBox.warning(None, "라이브러리 누락 경고", ...)
-    # elif not mss_loaded and pillow_loaded:
-    #      QMessageBox.information(None, "성능 알림", ...)
-    # elif mss_loaded:
-    #     print("mss 라이브러리가 로드되어 색상 미리보기에 사용됩니다.") # 상태바에서 확인 가능
 
+    # 화면 캡처 라이브러리 상태는 MacroApp 시작 시 상태바에 표시됨 (report_capture_backend)
 
     main_window = MacroApp(pynput_mouse_module_loaded, pynput_keyboard_module_loaded)
     main_window.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    QTimer.singleShot(0, lambda: report_startup_time(main_window))
+    sys.exit(app.exec_())
@@ -0,0 +1,85 @@
+# macro_mouse_path.py
+# 마우스 이동/드래그 경로 (Qt/pynput에 의존하지 않음)
+# 경로 점은 목록으로 만들어 두지 않고, 재생할 때 생성기가 rate_hz 간격의 (경과 초, x, y)를 하나씩 만들어 줌 (긴 경로도 메모리 일정)
+# 실행기는 각 점을 '경로 시작 시각 + 경과 초' 데드라인에 주입하므로 주입이 느려도 전체 재생 시간은 duration 그대로
+import math
+
+PATH_LINEAR = 'linear'     # 점들을 잇는 꺾은선 (일정한 속도)
+PATH_BEZIER = 'bezier'     # 첫 점/끝 점과 제어점으로 만든 베지어 곡선
+PATH_RECORDED = 'recorded' # 녹화된 (x, y, ms) 표본 사이를 보간 (표본의 시간 간격 비율을 유지한 채 duration에 맞춤)
+PATH_KINDS = (PATH_LINEAR, PATH_BEZIER, PATH_RECORDED)
+PATH_KIND_LABELS = {PATH_LINEAR: "직선", PATH_BEZIER: "베지어 곡선", PATH_RECORDED: "녹화된 경로"}
+DEFAULT_PATH_DURATION_MS = 500
+DEFAULT_PATH_RATE_HZ = 120
+MAX_PATH_RATE_HZ = 1000
+MAX_BEZIER_POINTS = 8
+
+
+def validate_path(kind, points):
+    """경로 점 검사. 문제가 있으면 오류 메시지, 없으면 None"""
+    if kind not in PATH_KINDS: return f"알 수 없는 경로 종류: {kind}"
+    if len(points) < 2: return "경로에는 점이 2개 이상 필요합니다."
+    if kind == PATH_BEZIER and len(points) > MAX_BEZIER_POINTS: return f"베지어 곡선의 점은 최대 {MAX_BEZIER_POINTS}개입니다."
+    if kind == PATH_RECORDED:
+        if any(len(p) != 3 for p in points): return "녹화된 경로의 점은 (x, y, ms) 형식이어야 합니다."
+        if any(b[2] < a[2] for a, b in zip(points, points[1:])): return "녹화된 경로의 시각이 거꾸로 되어 있습니다."
+    elif any(len(p) < 2 for p in points): return "경로의 점은 (x, y) 형식이어야 합니다."
+    return None
+
+
+def _polyline(points):
+    # 누적 길이를 한 번만 계산하고, u가 늘어나는 방향으로만 구간을 찾아감
+    points = [(p[0], p[1]) for p in points]
+    cumulative = [0.0]
+    for a, b in zip(points, points[1:]): cumulative.append(cumulative[-1] + math.hypot(b[0] - a[0], b[1] - a[1]))
+    total = cumulative[-1]; segment = 0
+    def at(u):
+        nonlocal segment
+        if total == 0: return points[-1]
+        distance = u * total
+        while segment < len(points) - 2 and cumulative[segment + 1] < distance: segment += 1
+        (x0, y0), (x1, y1) = points[segment], points[segment + 1]
+        length = cumulative[segment + 1] - cumulative[segment]
+        f = (distance - cumulative[segment]) / length if length else 1.0
+        return x0 + (x1 - x0) * f, y0 + (y1 - y0) * f
+    return at
+
+
+def _bezier(points):
+    # 번스타인 다항식 계수는 미리 계산
+    n = len(points) - 1; coefficients = [math.comb(n, i) for i in range(n + 1)]
+    xs = [p[0] for p in points]; ys = [p[1] for p in points]
+    def at(u):
+        v = 1.0 - u; x = y = 0.0
+        for i, c in enumerate(coefficients):
+            w = c * (u ** i) * (v ** (n - i)); x += w * xs[i]; y += w * ys[i]
+        return x, y
+    return at
+
+
+def _recorded(points):
+    # 표본 시각을 0..1로 정규화해 u에 맞는 두 표본 사이를 선형 보간
+    t0 = points[0][2]; span = points[-1][2] - t0; index = 0
+    if span <= 0: return lambda u: (points[-1][0], points[-1][1])
+    def at(u):
+        nonlocal index
+        t = t0 + u * span
+        while index < len(points) - 2 and points[index + 1][2] < t: index += 1
+        (x0, y0, s0), (x1, y1, s1) = points[index], points[index + 1]
+        f = (t - s0) / (s1 - s0) if s1 > s0 else 1.0
+        return x0 + (x1 - x0) * f, y0 + (y1 - y0) * f
+    return at
+
+
+_CURVES = {PATH_LINEAR: _polyline, PATH_BEZIER: _bezier, PATH_RECORDED: _recorded}
+
+
+def path_points(kind, points, duration_s, rate_hz=DEFAULT_PATH_RATE_HZ):
+    """(경과 초, x, y) 생성기. 시작점(경과 0)은 내지 않고, 정수 좌표가 직전과 같은 점은 건너뛰며, 마지막은 항상 끝점(경과 duration_s)"""
+    curve = _CURVES[kind](points)
+    count = max(1, math.ceil(duration_s * rate_hz)); last = (round(points[0][0]), round(points[0][1]))
+    for i in range(1, count + 1):
+        u = i / count; x, y = curve(u); xy = (round(x), round(y))
+        if xy == last and i < count: continue
+        last = xy
+        yield u * duration_s, xy[0], xy[1]
@@ -0,0 +1,231 @@
+# macro_plan.py
+# 액션 목록(macro_actions 객체 리스트)을 실행 직전에 해석하지 않도록, 미리 해석된 불변 실행 계획으로 컴파일
+# 키 객체/마우스 버튼 enum/검증된 검색 범위/색상 매처를 한 번만 만들어 두고 목록이 바뀔 때까지 재사용
+# 반복/조건/라벨 액션은 목록에 펼치지 않고, 컴파일 시 짝을 맞춰 점프할 인덱스만 계산해 둠 (실행기가 직접 해석)
+import sys
+from collections import namedtuple
+
+from macro_color_search import matcher_for_action, SEARCH_ORDER_NEAREST
+from macro_actions import (ClickAction, KeyAction, DelayAction, ColorClickAction, ColorWaitAction, ImageClickAction, LoopStartAction,
+                           LoopEndAction, IfColorAction, ElseAction, EndIfAction, LabelAction, GotoAction, MousePathAction, MouseDragAction, as_action,
+                           BLOCK_OPEN_CODES, BLOCK_MIDDLE_CODES, BLOCK_CLOSE_CODES, LOOP_MODE_COUNT, LOOP_MODE_UNTIL_DISAPPEAR)
+import macro_templates
+from macro_mouse_path import validate_path, MAX_PATH_RATE_HZ
+
+# 각 연산은 불변 namedtuple. 러너는 type(op)로 처리 함수를 찾음 (문자열 비교 if/elif 없음)
+ClickOp = namedtuple('ClickOp', 'x y button')
+KeyComboOp = namedtuple('KeyComboOp', 'modifiers key')        # key: pynput Key 객체 또는 한 글자 문자열 (modifiers를 누른 채 탭)
+KeyModifiersOnlyOp = namedtuple('KeyModifiersOnlyOp', 'modifiers') # 모디파이어만 있는 입력: 하나씩 눌렀다 뗌
+KeyTypeOp = namedtuple('KeyTypeOp', 'modifiers text')         # 여러 글자 문자열 입력
+DelayOp = namedtuple('DelayOp', 'seconds')
+ColorFindOp = namedtuple('ColorFindOp', 'search_area matcher anchor target_color')  # anchor가 None이면 좌상단부터 스캔
+ColorWaitOp = namedtuple('ColorWaitOp', 'search_area matcher anchor target_color wait_for_appear timeout_s continue_on_timeout')
+ImageFindOp = namedtuple('ImageFindOp', 'search_area template_path display_path threshold')
+MousePathOp = namedtuple('MousePathOp', 'kind points duration_s rate_hz button') # button이 None이면 이동만, 있으면 드래그. 경로 점은 실행 시 생성
+InvalidOp = namedtuple('InvalidOp', 'message fatal')          # 컴파일 시 발견한 문제: fatal이면 실행 중단, 아니면 상태 메시지만
+
+# 흐름 제어 연산 (condition은 검사할 ColorFindOp, 인덱스는 계획 안의 위치). 처리 함수가 다음 실행 위치를 반환
+LoopStartOp = namedtuple('LoopStartOp', 'count condition until_found max_iterations exit_index') # condition이 None이면 count회 반복
+LoopEndOp = namedtuple('LoopEndOp', 'start_index exit_index')  # 본문 끝: 계속 반복하면 start_index + 1로
+IfColorOp = namedtuple('IfColorOp', 'condition when_found else_index') # 조건이 거짓이면 else_index로
+ElseOp = namedtuple('ElseOp', 'end_index')                      # 참 분기의 끝: 거짓 분기를 건너뜀
+EndIfOp = namedtuple('EndIfOp', '')
+LabelOp = namedtuple('LabelOp', 'label')
+GotoOp = namedtuple('GotoOp', 'label target_index')
+CONTROL_OPS = frozenset((LoopStartOp, LoopEndOp, IfColorOp, ElseOp, EndIfOp, LabelOp, GotoOp)) # 입력이 아니므로 액션 사이 패딩 없음
+
+PlanStep = namedtuple('PlanStep', 'name op')
+
+
+class ExecutionPlan:
+    """컴파일된 실행 계획 (불변). steps는 PlanStep 튜플"""
+    __slots__ = ('steps',)
+
+    def __init__(self, steps):
+        self.steps = tuple(steps)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __iter__(self):
+        return iter(self.steps)
+
+
+def block_depths(actions_list):
+    """목록 표시용 들여쓰기 깊이 (반복/조건 블록 안쪽일수록 1씩 증가)"""
+    depth = 0; depths = []
+    for action in actions_list:
+        code = action.code
+        if code in BLOCK_CLOSE_CODES or code in BLOCK_MIDDLE_CODES: depth = max(0, depth - 1)
+        depths.append(depth)
+        if code in BLOCK_OPEN_CODES or code in BLOCK_MIDDLE_CODES: depth += 1
+    return depths
+
+
+def _modifier_key_map(keyboard_module):
+    Key = keyboard_module.Key
+    return {"Ctrl": Key.ctrl, "Shift": Key.shift, "Alt": Key.alt,
+            "Meta": Key.cmd if sys.platform == "darwin" else getattr(Key, 'super', getattr(Key, 'win_l', Key.cmd))}
+
+
+# 키 캡처가 표시하는 이름 중 pynput Key 이름과 다른 것
+_KEY_NAME_ALIASES = {'del': 'delete', 'pageup': 'page_up', 'pagedown': 'page_down', 'win': 'cmd'}
+
+
+def _compile_key(key_str, keyboard_module, modifier_map):
+    Key = keyboard_module.Key
+    modifiers = []; main_parts = []
+    parts = key_str.split('+')
+    if key_str.endswith('+'): parts = parts[:-2] + ['+'] # '+' 키 자체 ("+", "Ctrl++")
+    for part in parts:
+        if part in modifier_map: modifiers.append(modifier_map[part])
+        else: main_parts.append(part)
+    main_str = "".join(main_parts); modifiers = tuple(modifiers)
+    if not main_str and modifiers: return KeyModifiersOnlyOp(modifiers)
+    special_key = getattr(Key, _KEY_NAME_ALIASES.get(main_str.lower(), main_str.lower()), None)
+    if special_key is not None and isinstance(special_key, Key): return KeyComboOp(modifiers, special_key)
+    if len(main_str) == 1: return KeyComboOp(modifiers, main_str.lower())
+    return KeyTypeOp(modifiers, main_str)
+
+
+def types_text_verbatim(text, keyboard_module):
+    """여러 글자 text를 키보드 입력 액션의 key_str로 두면 글자 그대로 입력되는지 (특수 키 이름/모디파이어/'+' 조합으로 해석되지 않는지)"""
+    op = _compile_key(text, keyboard_module, _modifier_key_map(keyboard_module))
+    return type(op) is KeyTypeOp and not op.modifiers and op.text == text
+
+
+def _valid_search_area(search_area):
+    if len(search_area) == 4 and search_area[0] < search_area[2] and search_area[1] < search_area[3]: return tuple(search_area)
+    return None
+
+
+def _compile_color_common(action):
+    search_area = _valid_search_area(action.search_area)
+    if search_area is None: return None, InvalidOp(f"오류: '{action.type_label}' 검색 범위 잘못됨 {tuple(action.search_area)}.", False)
+    anchor = tuple(action.initial_xy) if action.search_order == SEARCH_ORDER_NEAREST and action.initial_xy else None
+    return (search_area, matcher_for_action(action), anchor, tuple(action.target_color)), None
+
+
+def _compile_condition(action):
+    # 반복/조건 액션의 색 조건. 조건을 검사할 수 없으면 흐름 전체가 의미 없으므로 실행 중단 (fatal)
+    common, invalid = _compile_color_common(action)
+    if invalid is not None: return None, invalid._replace(fatal=True)
+    return ColorFindOp(*common), None
+
+
+def _compile_click(action, mouse_module, keyboard_module, config_file, modifier_map):
+    button = getattr(mouse_module.Button, action.button, None)
+    if button is None: return InvalidOp(f"알 수 없는 마우스 버튼: {action.button}", True)
+    return ClickOp(action.x, action.y, button)
+
+
+def _compile_color_click(action, *_):
+    common, invalid = _compile_color_common(action)
+    return invalid or ColorFindOp(*common)
+
+
+def _compile_color_wait(action, *_):
+    common, invalid = _compile_color_common(action)
+    return invalid or ColorWaitOp(*common, action.wait_until != 'disappear', max(0, action.timeout_ms) / 1000.0, action.on_timeout == 'continue')
+
+
+def _compile_image_click(action, mouse_module, keyboard_module, config_file, modifier_map):
+    search_area = _valid_search_area(action.search_area)
+    if search_area is None: return InvalidOp(f"오류: '{action.type_label}' 검색 범위 잘못됨 {tuple(action.search_area)}.", False)
+    return ImageFindOp(search_area, macro_templates.resolve_template_path(action.template_path, config_file), action.template_path, action.match_threshold)
+
+
+def _compile_mouse_path(action, mouse_module, keyboard_module, config_file, modifier_map):
+    button = None
+    if isinstance(action, MouseDragAction):
+        button = getattr(mouse_module.Button, action.button, None)
+        if button is None: return InvalidOp(f"알 수 없는 마우스 버튼: {action.button}", True)
+    error = validate_path(action.path_kind, action.points)
+    if error: return InvalidOp(f"오류: '{action.type_label}' {error}", True)
+    return MousePathOp(action.path_kind, action.points, max(0, action.duration_ms) / 1000.0, min(max(1, int(action.rate_hz)), MAX_PATH_RATE_HZ), button)
+
+
+def _compile_loop_start(action, *_):
+    if action.loop_mode == LOOP_MODE_COUNT: return LoopStartOp(max(0, int(action.count)), None, True, 0, -1)
+    condition, invalid = _compile_condition(action)
+    return invalid or LoopStartOp(0, condition, action.loop_mode != LOOP_MODE_UNTIL_DISAPPEAR, max(0, int(action.max_iterations)), -1)
+
+
+def _compile_if_color(action, *_):
+    condition, invalid = _compile_condition(action)
+    return invalid or IfColorOp(condition, action.condition != 'not_found', -1)
+
+
+# 액션 클래스 -> 변환 함수 (action, mouse_module, keyboard_module, config_file, modifier_map). 문자열 비교 if/elif 없음
+_COMPILERS = {
+    ClickAction: _compile_click,
+    KeyAction: lambda action, mouse_module, keyboard_module, config_file, modifier_map: _compile_key(action.key_str, keyboard_module, modifier_map),
+    DelayAction: lambda action, *_: DelayOp(action.duration_ms / 1000.0),
+    ColorClickAction: _compile_color_click,
+    ColorWaitAction: _compile_color_wait,
+    ImageClickAction: _compile_image_click,
+    LoopStartAction: _compile_loop_start,
+    LoopEndAction: lambda action, *_: LoopEndOp(-1, -1),
+    IfColorAction: _compile_if_color,
+    ElseAction: lambda action, *_: ElseOp(-1),
+    EndIfAction: lambda action, *_: EndIfOp(),
+    LabelAction: lambda action, *_: LabelOp(action.label),
+    GotoAction: lambda action, *_: GotoOp(action.label, -1),
+    MousePathAction: _compile_mouse_path,
+    MouseDragAction: _compile_mouse_path,
+}
+
+
+def compile_action(action, mouse_module, keyboard_module, config_file="macro_config.json", modifier_map=None):
+    """액션 하나(객체 또는 예전 형식 dict)를 실행 연산으로 변환 (흐름 제어 연산의 점프 위치는 compile_plan에서 채움)"""
+    action = as_action(action)
+    compiler = _COMPILERS.get(type(action))
+    if compiler is None: return InvalidOp(f"알 수 없는 액션 유형: {action.type_label}", False)
+    return compiler(action, mouse_module, keyboard_module, config_file, modifier_map or _modifier_key_map(keyboard_module))
+
+
+def _resolve_control_flow(steps):
+    """반복/조건 블록의 짝과 라벨 위치를 찾아 점프 인덱스를 채움. 짝이 맞지 않는 단계는 fatal InvalidOp로 바꿈"""
+    def fail(index, message): steps[index] = PlanStep(steps[index].name, InvalidOp(message, True))
+    stack = []; else_at = {}; labels = {}
+    for i, step in enumerate(steps):
+        kind = type(step.op)
+        if kind is LoopStartOp or kind is IfColorOp: stack.append(i)
+        elif kind is ElseOp:
+            if not stack or type(steps[stack[-1]].op) is not IfColorOp or stack[-1] in else_at: fail(i, f"'{step.name}': 짝이 맞는 '조건 시작'이 없습니다.")
+            else: else_at[stack[-1]] = i
+        elif kind is EndIfOp:
+            if not stack or type(steps[stack[-1]].op) is not IfColorOp: fail(i, f"'{step.name}': 짝이 맞는 '조건 시작'이 없습니다."); continue
+            start = stack.pop(); else_index = else_at.pop(start, None)
+            if else_index is None: steps[start] = steps[start]._replace(op=steps[start].op._replace(else_index=i + 1))
+            else:
+                steps[start] = steps[start]._replace(op=steps[start].op._replace(else_index=else_index + 1))
+                steps[else_index] = steps[else_index]._replace(op=ElseOp(i + 1))
+        elif kind is LoopEndOp:
+            if not stack or type(steps[stack[-1]].op) is not LoopStartOp: fail(i, f"'{step.name}': 짝이 맞는 '반복 시작'이 없습니다."); continue
+            start = stack.pop()
+            steps[start] = steps[start]._replace(op=steps[start].op._replace(exit_index=i + 1))
+            steps[i] = step._replace(op=LoopEndOp(start, i + 1))
+        elif kind is LabelOp:
+            if step.op.label in labels: fail(i, f"라벨 '{step.op.label}'이(가) 중복되었습니다.")
+            else: labels[step.op.label] = i
+    for start in stack: # 닫히지 않은 블록
+        fail(start, f"'{steps[start].name}': 짝이 맞는 '{'반복 끝' if type(steps[start].op) is LoopStartOp else '조건 끝'}'이 없습니다.")
+        if start in else_at: fail(else_at[start], f"'{steps[else_at[start]].name}': 짝이 맞는 '조건 끝'이 없습니다.")
+    for i, step in enumerate(steps):
+        if type(step.op) is GotoOp:
+            target = labels.get(step.op.label)
+            if target is None: fail(i, f"'{step.name}': 라벨 '{step.op.label}'을(를) 찾을 수 없습니다.")
+            else: steps[i] = step._replace(op=step.op._replace(target_index=target))
+
+
+def compile_plan(actions_list, mouse_module, keyboard_module, config_file="macro_config.json"):
+    """액션 목록 전체를 ExecutionPlan으로 컴파일. 개별 액션 해석 오류는 InvalidOp(fatal)로 담아 실행 시 보고"""
+    modifier_map = _modifier_key_map(keyboard_module); steps = []
+    for action in actions_list:
+        action = as_action(action); name = action.display_name()
+        try: op = compile_action(action, mouse_module, keyboard_module, config_file, modifier_map)
+        except Exception as e: op = InvalidOp(f"액션 '{name}' 해석 중 오류: {type(e).__name__}: {e}", True)
+        steps.append(PlanStep(name, op))
+    _resolve_control_flow(steps)
+    return ExecutionPlan(steps)
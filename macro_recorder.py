@@ -0,0 +1,145 @@
+# macro_recorder.py
+# 매크로 녹화: pynput 리스너가 넘겨 주는 입력 이벤트를 받는 즉시 액션으로 합침 (Qt에 의존하지 않음. 리스너 스레드는 macro_input_listeners)
+# 마우스 이동은 액션을 만들지 않고 마지막 위치만 갱신하고 (버튼을 누른 채 움직이면 표본 간격마다 드래그 경로 표본으로 남김), 이어서 입력한 글자는 텍스트 입력 액션 하나로,
+# 액션 사이에 흐른 시간은 다음 액션 앞의 딜레이 하나로 (짧은 간격은 버리고 해상도 단위로 반올림) 합치므로
+# 원시 이벤트 수가 아니라 의미 있는 입력 수만큼만 액션이 생기고, 녹화 중 메모리도 그만큼만 씀
+import threading
+import time
+
+from macro_actions import ClickAction, KeyAction, DelayAction, MouseDragAction
+from macro_mouse_path import PATH_RECORDED, DEFAULT_PATH_RATE_HZ
+from macro_plan import types_text_verbatim
+
+DEFAULT_MIN_DELAY_MS = 30        # 이보다 짧은 간격은 딜레이로 남기지 않음 (실행기의 액션 사이 패딩으로 충분)
+DEFAULT_DELAY_RESOLUTION_MS = 10 # 딜레이를 이 단위로 반올림
+DEFAULT_TEXT_PAUSE_MS = 1000     # 글자 사이 간격이 이보다 길면 텍스트 입력을 끊고 딜레이를 남김
+MODIFIER_ORDER = ("Ctrl", "Shift", "Alt", "Meta") # 조합 키 문자열의 모디파이어 순서 (키 캡처와 같음)
+RECORD_STOP_KEY = "Esc"          # 녹화를 끝내는 키 (녹화되지 않음)
+DRAG_THRESHOLD_PX = 5            # 버튼을 누른 채 이보다 멀리 움직였으면 클릭이 아니라 드래그
+DRAG_SAMPLE_MS = 10              # 드래그 경로 표본 최소 간격 (재생 시에는 표본 사이를 보간하므로 더 촘촘할 필요 없음)
+
+
+class MacroRecorder:
+    """입력 이벤트 -> 액션 목록. 마우스/키보드 리스너 스레드에서 동시에 호출되므로 잠금으로 보호
+    각 메서드의 t는 time.perf_counter() 기준 초 (생략하면 호출 시각)"""
+
+    def __init__(self, keyboard_module, min_delay_ms=DEFAULT_MIN_DELAY_MS, delay_resolution_ms=DEFAULT_DELAY_RESOLUTION_MS,
+                 text_pause_ms=DEFAULT_TEXT_PAUSE_MS, clock=time.perf_counter):
+        self.keyboard_module = keyboard_module; self.clock = clock
+        self.min_delay_ms = min_delay_ms; self.delay_resolution_ms = max(1, delay_resolution_ms); self.text_pause_ms = text_pause_ms
+        self._lock = threading.Lock()
+        self._actions = []
+        self._text = ''        # 이어서 입력 중인 글자 (끊길 때 액션 하나로 만듦)
+        self._last_t = None    # 마지막 액션(또는 입력 중인 글자)의 시각
+        self.raw_events = 0    # 받은 이벤트 수 (이동 포함)
+        self.dropped_moves = 0
+        self.position = None   # 마지막 마우스 위치
+        self._press = None     # 누르고 아직 떼지 않은 버튼: [x, y, 버튼, 시각, 경로 표본 [(x, y, ms)], 최대 이동 거리]
+
+    def __len__(self):
+        with self._lock: return len(self._actions) + bool(self._text)
+
+    def move(self, x, y, t=None):
+        with self._lock:
+            self.raw_events += 1; self.position = (x, y)
+            if self._press is None or not self._add_drag_sample(x, y, self._now(t)): self.dropped_moves += 1
+
+    def press(self, x, y, button='left', t=None):
+        """버튼 누름. 뗄 때 움직인 거리에 따라 클릭 또는 드래그가 됨 (다른 버튼이 눌려 있으면 그 버튼은 클릭으로 마무리)"""
+        with self._lock:
+            self.raw_events += 1; self.position = (x, y)
+            self._finish_press()
+            self._press = [x, y, button, self._now(t), [(x, y, 0)], 0]
+
+    def release(self, x, y, button='left', t=None):
+        with self._lock:
+            self.raw_events += 1; self.position = (x, y)
+            if self._press is None or self._press[2] != button: return
+            t = self._now(t); self._add_drag_sample(x, y, t, force=True)
+            self._finish_press(t)
+
+    def click(self, x, y, button='left', t=None):
+        with self._lock:
+            self.raw_events += 1; self.position = (x, y)
+            self._add(ClickAction(x=x, y=y, button=button), self._now(t))
+
+    def key(self, name, modifiers=(), t=None):
+        """키 하나 입력. name은 키 캡처와 같은 표시 이름 ('a', 'Enter', 'F5' ...), modifiers는 눌려 있던 모디파이어 이름"""
+        with self._lock:
+            self.raw_events += 1; t = self._now(t)
+            modifiers = [m for m in MODIFIER_ORDER if m in modifiers]
+            char = ' ' if name == "Space" else name
+            # Shift만 눌린 한 글자는 이미 Shift가 반영된 글자로 오므로 텍스트로 합침
+            if len(char) == 1 and char.isprintable() and modifiers in ([], ["Shift"]): self._add_char(char, t)
+            else: self._add(KeyAction(key_str="+".join(modifiers + [name])), t)
+
+    def modifiers_only(self, modifiers, t=None):
+        """다른 키 없이 눌렀다 뗀 모디파이어"""
+        with self._lock:
+            self.raw_events += 1
+            self._add(KeyAction(key_str="+".join(m for m in MODIFIER_ORDER if m in modifiers)), self._now(t))
+
+    def ignore(self):
+        """액션이 되지 않는 이벤트 (모디파이어 누름 등)도 원시 이벤트 수에는 셈"""
+        with self._lock: self.raw_events += 1
+
+    def finish(self):
+        """입력 중인 글자를 마무리하고 녹화된 액션 목록 반환"""
+        with self._lock:
+            self._finish_press()
+            self._flush_text()
+            return list(self._actions)
+
+    def _now(self, t):
+        return self.clock() if t is None else t
+
+    def _add_drag_sample(self, x, y, t, force=False):
+        # 누른 시각 기준 경과 ms와 함께 표본 추가. 직전 표본과 같은 위치이거나 DRAG_SAMPLE_MS보다 가까우면 버림
+        # 떼는 위치(force)는 항상 남김 (같은 위치에 머물렀다 뗀 시간도 재생되도록)
+        press = self._press; samples = press[4]; last = samples[-1]
+        ms = max(last[2], round((t - press[3]) * 1000))
+        if force:
+            if (x, y, ms) == last: return False
+        elif (x, y) == last[:2] or ms - last[2] < DRAG_SAMPLE_MS: return False
+        samples.append((x, y, ms)); press[5] = max(press[5], abs(x - press[0]), abs(y - press[1]))
+        return True
+
+    def _finish_press(self, t=None):
+        # 누른 버튼을 액션으로. 거의 움직이지 않았으면 누른 위치의 클릭, 아니면 녹화된 경로 드래그 (딜레이는 누른 시각 기준)
+        press = self._press
+        if press is None: return
+        self._press = None; x, y, button, pressed_t, samples, distance = press
+        if distance < DRAG_THRESHOLD_PX: self._add(ClickAction(x=x, y=y, button=button), pressed_t); return
+        self._add(MouseDragAction(path_kind=PATH_RECORDED, points=[list(sample) for sample in samples], duration_ms=samples[-1][2],
+                                  rate_hz=DEFAULT_PATH_RATE_HZ, button=button), pressed_t)
+        self._last_t = pressed_t + samples[-1][2] / 1000 if t is None else t # 다음 딜레이는 드래그가 끝난 뒤부터
+
+    def _add_char(self, char, t):
+        typing = bool(self._text) and (t - self._last_t) * 1000 < self.text_pause_ms
+        if typing and types_text_verbatim(self._text + char, self.keyboard_module): self._text += char; self._last_t = t; return
+        # 멈췄다 이어 치면 딜레이를 남기고, 이어 붙이면 특수 키 이름 등으로 잘못 해석될 때('end' -> End 키)는 딜레이 없이 나눔
+        self._flush_text()
+        if not typing: self._add_delay(t)
+        self._text = char; self._last_t = t
+
+    def _add(self, action, t):
+        self._flush_text(); self._add_delay(t)
+        self._actions.append(action); self._last_t = t
+
+    def _add_delay(self, t):
+        # 직전 액션 이후 흐른 시간을 딜레이 하나로. 이미 딜레이로 끝나 있으면 합침 (녹화 시작 전 시간은 남기지 않음)
+        if self._last_t is None: return
+        delay_ms = round((t - self._last_t) * 1000 / self.delay_resolution_ms) * self.delay_resolution_ms
+        if delay_ms < self.min_delay_ms: return
+        if self._actions and type(self._actions[-1]) is DelayAction: delay_ms += self._actions.pop().duration_ms
+        self._actions.append(DelayAction(duration_ms=delay_ms))
+
+    def _flush_text(self):
+        text = self._text
+        if not text: return
+        self._text = ''
+        if len(text) > 1: self._actions.append(KeyAction(key_str=text)); return
+        if text == ' ': key_str = "Space"
+        elif text != text.lower(): key_str = "Shift+" + text.lower() # 한 글자 키 입력은 소문자로 누르므로 대문자는 Shift 조합으로
+        else: key_str = text
+        self._actions.append(KeyAction(key_str=key_str))
@@ -0,0 +1,47 @@
+# macro_runner.py
+# 액션 목록을 GUI 스레드가 아닌 작업 스레드에서 실행하는 러너
+# 진행 상황/오류/완료는 Qt 시그널로 MacroApp에 전달 (위젯 접근은 GUI 스레드에서만)
+# 실제 실행은 macro_executor.MacroExecutor가 담당하고, 이 클래스는 콜백을 시그널로 연결만 함
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from macro_executor import MacroExecutor
+from macro_input_arbiter import DEFAULT_INPUT_PRIORITY
+
+
+class MacroRunnerThread(QThread):
+    status_signal = pyqtSignal(str)              # 상태 표시줄 메시지
+    progress_signal = pyqtSignal(int, int, str)  # (현재 인덱스 1-based, 전체 개수, 액션 표시 이름)
+    warning_signal = pyqtSignal(str, str)        # (제목, 메시지): 실행은 계속되는 경고
+    action_failed_signal = pyqtSignal(str)       # 액션 오류로 실행 중단
+    run_finished_signal = pyqtSignal(bool)       # True: 끝까지 실행, False: 오류/중지로 중단
+
+    def __init__(self, plan, pynput_mouse_module, pynput_keyboard_module, parent=None, capture_backend=None, diagnostics=None,
+                 config_file="macro_config.json", controllers=None, timing=None, tracer=None, arbiter=None, input_priority=DEFAULT_INPUT_PRIORITY):
+        super().__init__(parent)
+        self.executor = MacroExecutor(plan, pynput_mouse_module, pynput_keyboard_module, capture_backend=capture_backend,
+                                      diagnostics=diagnostics, config_file=config_file, controllers=controllers, timing=timing, tracer=tracer,
+                                      arbiter=arbiter, input_priority=input_priority)
+        self.executor.on_status = self.status_signal.emit
+        self.executor.on_progress = self.progress_signal.emit
+        self.executor.on_warning = self.warning_signal.emit
+        self.executor.on_action_failed = self.action_failed_signal.emit
+
+    @property
+    def plan(self):
+        return self.executor.plan
+
+    @property
+    def timing_report(self):
+        return self.executor.timing_report
+
+    def request_stop(self):
+        """실행 중지를 요청 (현재 액션 또는 대기가 끝나는 즉시 중단)"""
+        self.executor.request_stop()
+
+    def is_stop_requested(self):
+        return self.executor.is_stop_requested()
+
+    def run(self):
+        completed = False
+        try: completed = self.executor.run()
+        finally: self.run_finished_signal.emit(completed)
@@ -0,0 +1,204 @@
+# macro_scheduler.py
+# 매크로 예약 실행: 여러 매크로의 예약(한 번 / 일정 간격 / cron 식)을 다음 실행 시각 기준 최소 힙으로 관리 (Qt에 의존하지 않음)
+# GUI는 가장 이른 예약 하나에 맞춰 단발 타이머만 걸고, 타이머가 울리면 pop_due로 도달한 예약을 꺼낸 뒤 다음 예약으로 타이머를 다시 검
+# 예약이 없으면 타이머도 없으므로 매초 깨어나지 않음. 시각은 벽시계(time.time, epoch 초) 기준
+import datetime
+import heapq
+import itertools
+import time
+import uuid
+
+SCHEDULE_ONCE = 'once'         # 지정한 시각에 한 번
+SCHEDULE_INTERVAL = 'interval' # 지정한 시각부터 일정 간격마다
+SCHEDULE_CRON = 'cron'         # cron 식 (분 시 일 월 요일)
+SCHEDULE_KINDS = (SCHEDULE_ONCE, SCHEDULE_INTERVAL, SCHEDULE_CRON)
+SCHEDULE_KIND_LABELS = {SCHEDULE_ONCE: "한 번", SCHEDULE_INTERVAL: "일정 간격마다", SCHEDULE_CRON: "cron 식"}
+MIN_INTERVAL_S = 1.0
+MAX_TIMER_WAIT_S = 3600.0 # 타이머 한 번의 최대 대기. 절전/시계 변경 후에도 이 시간 안에 다시 계산 (QTimer 자체도 약 24일까지만 지원)
+CRON_SEARCH_DAYS = 366 * 5 # 이 기간 안에 일치하는 시각이 없으면 (예: 2월 30일) 잘못된 식으로 봄
+
+
+def _parse_cron_field(text, low, high):
+    """cron 필드 하나 ('*', '5', '1-5', '*/15', '0,30', '9-18/2')를 허용 값 frozenset으로"""
+    values = set()
+    for part in text.split(','):
+        base, _, step_text = part.partition('/')
+        step = int(step_text) if step_text else 1
+        if step <= 0: raise ValueError(f"잘못된 간격: '{part}'")
+        if base == '*': start, end = low, high
+        elif '-' in base:
+            start_text, end_text = base.split('-', 1); start, end = int(start_text), int(end_text)
+        else:
+            start = int(base); end = high if step_text else start
+        if start < low or end > high or start > end: raise ValueError(f"범위를 벗어난 값: '{part}' (허용 {low}-{high})")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSpec:
+    """5필드 cron 식 '분 시 일 월 요일' (요일 0/7=일요일). 일과 요일이 모두 지정되면 둘 중 하나만 맞아도 실행 (표준 cron과 같음)"""
+    __slots__ = ('text', 'minutes', 'hours', 'days', 'months', 'weekdays', '_any_day', '_any_weekday')
+
+    def __init__(self, text):
+        fields = text.split()
+        if len(fields) != 5: raise ValueError("cron 식은 '분 시 일 월 요일' 5개 필드여야 합니다.")
+        self.text = ' '.join(fields)
+        try:
+            self.minutes = _parse_cron_field(fields[0], 0, 59); self.hours = _parse_cron_field(fields[1], 0, 23)
+            self.days = _parse_cron_field(fields[2], 1, 31); self.months = _parse_cron_field(fields[3], 1, 12)
+            weekdays = _parse_cron_field(fields[4], 0, 7)
+        except ValueError as e: raise ValueError(f"잘못된 cron 식 '{text}': {e}") from None
+        self.weekdays = frozenset(d % 7 for d in weekdays)
+        self._any_day = fields[2] == '*'; self._any_weekday = fields[4] == '*'
+
+    def _day_matches(self, dt):
+        day_ok = dt.day in self.days; weekday_ok = (dt.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday: return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, ts):
+        """ts(epoch 초) 이후 처음 일치하는 분의 시작 시각 (epoch 초, 지역 시간 기준)"""
+        dt = datetime.datetime.fromtimestamp(ts).replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        limit = dt + datetime.timedelta(days=CRON_SEARCH_DAYS)
+        while dt < limit: # 맞지 않는 월/일/시는 통째로 건너뜀
+            if dt.month not in self.months:
+                dt = dt.replace(year=dt.year + (dt.month == 12), month=dt.month % 12 + 1, day=1, hour=0, minute=0); continue
+            if not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + datetime.timedelta(days=1); continue
+            if dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + datetime.timedelta(hours=1); continue
+            if dt.minute not in self.minutes:
+                dt += datetime.timedelta(minutes=1); continue
+            return dt.timestamp()
+        raise ValueError(f"cron 식 '{self.text}'에 해당하는 시각이 없습니다.")
+
+
+class Schedule:
+    """예약 하나. start_at은 한 번/간격 예약의 (첫) 실행 시각(epoch 초), interval_s는 간격 예약의 주기"""
+    __slots__ = ('schedule_id', 'macro_id', 'kind', 'start_at', 'interval_s', 'cron', 'next_run', '_cron_spec')
+
+    def __init__(self, macro_id, kind, start_at=None, interval_s=None, cron=None, schedule_id=None):
+        if kind not in SCHEDULE_KINDS: raise ValueError(f"알 수 없는 예약 종류: {kind}")
+        self.schedule_id = schedule_id or uuid.uuid4().hex[:12]
+        self.macro_id = macro_id; self.kind = kind
+        self.start_at = start_at; self.interval_s = interval_s; self.cron = cron
+        self._cron_spec = None
+        if kind in (SCHEDULE_ONCE, SCHEDULE_INTERVAL) and start_at is None: raise ValueError("실행 시각이 필요합니다.")
+        if kind == SCHEDULE_INTERVAL and (interval_s is None or interval_s < MIN_INTERVAL_S): raise ValueError(f"간격은 {MIN_INTERVAL_S:g}초 이상이어야 합니다.")
+        if kind == SCHEDULE_CRON: self._cron_spec = CronSpec(cron or ''); self.cron = self._cron_spec.text
+        self.next_run = None # ScheduleQueue가 채움
+
+    def next_run_after(self, t):
+        """t 이후 첫 실행 시각. 한 번 예약이 이미 지났으면 None. 간격 예약은 놓친 회차를 몰아서 실행하지 않고 다음 회차로"""
+        if self.kind == SCHEDULE_ONCE: return self.start_at if self.start_at > t else None
+        if self.kind == SCHEDULE_INTERVAL:
+            if self.start_at > t: return self.start_at
+            return self.start_at + ((t - self.start_at) // self.interval_s + 1) * self.interval_s
+        return self._cron_spec.next_after(t)
+
+    def describe(self):
+        if self.kind == SCHEDULE_ONCE: return f"{_format_time(self.start_at)}에 한 번"
+        if self.kind == SCHEDULE_INTERVAL: return f"{_format_time(self.start_at)}부터 {_format_interval(self.interval_s)}마다"
+        return f"cron '{self.cron}'"
+
+    def to_dict(self):
+        data = {'id': self.schedule_id, 'macro_id': self.macro_id, 'kind': self.kind}
+        if self.kind != SCHEDULE_CRON: data['start_at'] = self.start_at
+        if self.kind == SCHEDULE_INTERVAL: data['interval_s'] = self.interval_s
+        if self.kind == SCHEDULE_CRON: data['cron'] = self.cron
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['macro_id'], data['kind'], data.get('start_at'), data.get('interval_s'), data.get('cron'), data.get('id'))
+
+
+def _format_time(ts):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))
+
+
+def _format_interval(seconds):
+    seconds = int(seconds)
+    for unit, size in (("일", 86400), ("시간", 3600), ("분", 60)):
+        if seconds >= size and seconds % size == 0: return f"{seconds // size}{unit}"
+    return f"{seconds}초"
+
+
+class ScheduleQueue:
+    """예약 목록 + 다음 실행 시각 최소 힙. 삭제/변경된 예약의 힙 항목은 꺼낼 때 버림 (지연 삭제)"""
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._schedules = {} # id -> Schedule (추가 순서 유지)
+        self._heap = []      # (실행 시각, 순번, id)
+        self._live = {}      # id -> 유효한 힙 항목의 순번
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._schedules)
+
+    def __iter__(self):
+        return iter(list(self._schedules.values()))
+
+    def get(self, schedule_id):
+        return self._schedules.get(schedule_id)
+
+    def add(self, schedule, now=None):
+        """예약 추가. 앞으로 실행될 시각이 없으면 (이미 지난 한 번 예약) 추가하지 않고 False. 일치하는 시각이 없는 cron 식이면 ValueError"""
+        next_run = schedule.next_run_after(self.clock() if now is None else now)
+        if next_run is None: return False
+        self._schedules[schedule.schedule_id] = schedule
+        self._push(schedule, next_run)
+        return True
+
+    def remove(self, schedule_id):
+        self._live.pop(schedule_id, None)
+        return self._schedules.pop(schedule_id, None)
+
+    def remove_macro(self, macro_id):
+        """매크로가 삭제될 때 그 매크로의 예약을 모두 제거하고 개수 반환"""
+        removed = [s.schedule_id for s in self._schedules.values() if s.macro_id == macro_id]
+        for schedule_id in removed: self.remove(schedule_id)
+        return len(removed)
+
+    def _push(self, schedule, next_run):
+        seq = next(self._seq); schedule.next_run = next_run; self._live[schedule.schedule_id] = seq
+        heapq.heappush(self._heap, (next_run, seq, schedule.schedule_id))
+
+    def _discard_stale(self):
+        heap = self._heap
+        while heap and self._live.get(heap[0][2]) != heap[0][1]: heapq.heappop(heap)
+
+    def next_deadline(self):
+        """가장 이른 실행 시각 (예약이 없으면 None)"""
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now=None):
+        """now까지 도달한 예약들을 [(Schedule, 예정 시각)]으로 반환. 반복 예약은 다음 회차로 다시 넣고, 끝난 한 번 예약은 제거"""
+        now = self.clock() if now is None else now; due = []
+        while True:
+            self._discard_stale()
+            if not self._heap or self._heap[0][0] > now: return due
+            deadline, seq, schedule_id = heapq.heappop(self._heap); schedule = self._schedules[schedule_id]
+            due.append((schedule, deadline))
+            next_run = schedule.next_run_after(max(deadline, now)) # 실행이 늦었으면 지난 회차를 건너뜀
+            if next_run is None: self.remove(schedule_id)
+            else: self._push(schedule, next_run)
+
+    def to_list(self):
+        return [s.to_dict() for s in self._schedules.values()]
+
+    def load(self, items, now=None, macro_ids=None):
+        """설정의 예약 목록을 불러옴. (불러온 개수, 버린 개수) 반환
+        지난 한 번 예약, 없는 매크로의 예약, 읽을 수 없는 항목은 버림"""
+        self._schedules = {}; self._heap = []; self._live = {}
+        loaded = dropped = 0
+        for data in items or []:
+            try:
+                schedule = Schedule.from_dict(data)
+                added = (macro_ids is None or schedule.macro_id in macro_ids) and self.add(schedule, now)
+            except (KeyError, TypeError, ValueError): added = False
+            if added: loaded += 1
+            else: dropped += 1
+        return loaded, dropped
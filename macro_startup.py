@@ -0,0 +1,80 @@
+# macro_startup.py
+# 시작 시간 측정: 모듈별 import 시간 보고서(-X importtime과 같은 self/누적 시간)와 창 표시까지의 시간 예산 확인
+# 사용법: python macro_main.py --import-report   (또는 환경 변수 MACRO_IMPORT_REPORT=1)
+import sys
+import time
+
+STARTUP_BUDGET_S = 0.8  # 프로세스 시작(macro_main 로드)부터 첫 이벤트 루프 진입까지 목표 시간
+REPORT_TOP_N = 25
+
+
+class _TimedLoader:
+    """실제 로더를 감싸 모듈 생성/실행 시간을 ImportTimer에 보고. 나머지 속성은 원래 로더에 위임"""
+
+    def __init__(self, loader, timer, name):
+        self._loader = loader; self._timer = timer; self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        self._timer._enter(self._name) # 측정 구간: create_module 시작 ~ exec_module 끝
+        try: return self._loader.create_module(spec)
+        except BaseException: self._timer._exit(); raise # 실패한 모듈이 이후 import들의 부모로 남지 않게
+
+    def exec_module(self, module):
+        self._timer._ensure_entered(self._name)
+        try: self._loader.exec_module(module)
+        finally: self._timer._exit()
+
+
+class ImportTimer:
+    """sys.meta_path 맨 앞에 설치되는 finder. 이후 새로 import되는 모듈의 self/누적 시간(us)을 기록"""
+
+    def __init__(self):
+        self.records = [] # (이름, self_us, 누적_us, 깊이) - import가 끝난 순서
+        self._stack = []  # [이름, 시작 시각, 자식 모듈 누적 시간]
+        self._installed = False
+
+    def install(self):
+        if not self._installed: sys.meta_path.insert(0, self); self._installed = True
+        return self
+
+    def uninstall(self):
+        if self._installed: sys.meta_path.remove(self); self._installed = False
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'): continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'): spec.loader = _TimedLoader(spec.loader, self, name)
+                return spec
+        return None
+
+    def _enter(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def _ensure_entered(self, name):
+        if not self._stack or self._stack[-1][0] != name: self._enter(name) # create_module 없이 exec_module만 호출된 경우
+
+    def _exit(self):
+        entry_name, start, child = self._stack.pop()
+        total = time.perf_counter() - start
+        self.records.append((entry_name, (total - child) * 1e6, total * 1e6, len(self._stack)))
+        if self._stack: self._stack[-1][2] += total
+
+    def report_lines(self, top_n=REPORT_TOP_N):
+        """누적 시간이 큰 순서로 상위 top_n개 ("import time: self | cumulative | module" 형식)"""
+        lines = ["import time: self [us] | cumulative | imported package"]
+        for name, self_us, cumulative_us, depth in sorted(self.records, key=lambda r: r[2], reverse=True)[:top_n]:
+            lines.append(f"import time: {self_us:9.0f} | {cumulative_us:10.0f} | {'  ' * depth}{name}")
+        top_level = sum(r[2] for r in self.records if r[3] == 0)
+        lines.append(f"import time: 총 {len(self.records)}개 모듈, 최상위 누적 {top_level / 1000:.1f} ms")
+        return lines
+
+
+def check_startup_budget(start_time, budget_s=STARTUP_BUDGET_S):
+    """시작 후 경과 시간과 예산 초과 여부 반환 (초, bool)"""
+    elapsed = time.perf_counter() - start_time
+    return elapsed, elapsed > budget_s
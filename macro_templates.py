@@ -0,0 +1,187 @@
+# macro_templates.py
+# '이미지 찾기 후 클릭' 액션용 템플릿 저장/캐시와 피라미드(coarse-to-fine) 템플릿 매칭
+# 템플릿은 macro_config.json 옆 templates/ 폴더에 PNG로 저장되고, 세션당 한 번만 디코딩되어 캐시됨
+import os
+import threading
+import time
+
+from macro_lazy import lazy_import
+
+np = lazy_import('numpy')        # 첫 매칭 때 로드
+Image = lazy_import('PIL.Image')
+
+TEMPLATE_DIR_NAME = "templates"
+DEFAULT_MATCH_THRESHOLD = 0.9
+PYRAMID_MIN_TEMPLATE_SIDE = 6 # 가장 거친 단계에서도 템플릿 한 변이 이 값 이상이 되도록 단계 수 제한
+PYRAMID_MAX_LEVELS = 4
+COARSE_CANDIDATES = 5         # 거친 단계에서 정밀 단계로 넘길 후보 수
+REFINE_RADIUS = 2             # 한 단계 내려갈 때 후보 주변 탐색 반경 (픽셀)
+FLAT_VARIANCE_FLOOR = 1e-3    # 픽셀당 분산이 이보다 작은 창(단색 배경)은 상관이 정의되지 않으므로 점수 0 (FFT 반올림 오차로 점수가 폭주하지 않게)
+
+
+def is_available():
+    return np is not None and Image is not None
+
+
+def template_dir_for(config_file):
+    """설정 파일과 같은 폴더의 templates/ 경로"""
+    return os.path.join(os.path.dirname(os.path.abspath(config_file)), TEMPLATE_DIR_NAME)
+
+
+def resolve_template_path(template_path, config_file):
+    """액션에 저장된 (설정 파일 기준 상대) 템플릿 경로를 절대 경로로 변환"""
+    if os.path.isabs(template_path): return template_path
+    return os.path.join(os.path.dirname(os.path.abspath(config_file)), template_path)
+
+
+def save_template(frame, config_file):
+    """캡처한 프레임을 templates/에 PNG로 저장하고 설정 파일 기준 상대 경로('templates/xxx.png')를 반환"""
+    directory = template_dir_for(config_file); os.makedirs(directory, exist_ok=True)
+    base_name = f"tpl_{time.strftime('%Y%m%d_%H%M%S')}"; file_name = f"{base_name}.png"; n = 1
+    while os.path.exists(os.path.join(directory, file_name)): file_name = f"{base_name}_{n}.png"; n += 1
+    frame.to_pil().save(os.path.join(directory, file_name))
+    return f"{TEMPLATE_DIR_NAME}/{file_name}"
+
+
+def _to_gray(rgb):
+    # (높이, 너비, 3) uint8 -> float32 휘도
+    rgb = rgb.astype(np.float32, copy=False)
+    return rgb[..., 0] * 0.299 + rgb[..., 1] * 0.587 + rgb[..., 2] * 0.114
+
+
+def _downsample(gray):
+    # 2x2 블록 평균 (홀수 끝 행/열은 버림)
+    h, w = gray.shape[0] // 2 * 2, gray.shape[1] // 2 * 2
+    g = gray[:h, :w]
+    return (g[0::2, 0::2] + g[1::2, 0::2] + g[0::2, 1::2] + g[1::2, 1::2]) * 0.25
+
+
+class TemplateImage:
+    """디코딩된 템플릿(회색조)과 피라미드. 피라미드 단계는 필요 시 만들어 재사용"""
+
+    def __init__(self, gray):
+        self.gray = gray
+        self.height, self.width = gray.shape
+        self._pyramid = [gray]
+
+    def level(self, n):
+        while len(self._pyramid) <= n: self._pyramid.append(_downsample(self._pyramid[-1]))
+        return self._pyramid[n]
+
+    def max_levels(self):
+        levels = 0
+        while levels < PYRAMID_MAX_LEVELS and min(self.height, self.width) >> (levels + 1) >= PYRAMID_MIN_TEMPLATE_SIDE: levels += 1
+        return levels
+
+
+class TemplateCache:
+    """경로별로 템플릿을 한 번만 디코딩해 보관 (파일이 바뀌면 수정 시각으로 감지해 다시 읽음)"""
+
+    def __init__(self):
+        self._entries = {}; self._lock = threading.Lock()
+
+    def get(self, path):
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[0] == mtime: return entry[1]
+        with Image.open(path) as img: rgb = np.asarray(img.convert('RGB'))
+        template = TemplateImage(_to_gray(rgb))
+        with self._lock: self._entries[path] = (mtime, template)
+        return template
+
+    def clear(self):
+        with self._lock: self._entries.clear()
+
+
+_default_cache = None
+
+
+def get_template_cache():
+    global _default_cache
+    if _default_cache is None: _default_cache = TemplateCache()
+    return _default_cache
+
+
+def _window_sums(img, th, tw):
+    # 적분 영상으로 모든 (th, tw) 창의 합을 계산 -> (H-th+1, W-tw+1)
+    ii = np.zeros((img.shape[0] + 1, img.shape[1] + 1), dtype=np.float64)
+    np.cumsum(np.cumsum(img, axis=0, dtype=np.float64), axis=1, out=ii[1:, 1:])
+    return ii[th:, tw:] - ii[:-th, tw:] - ii[th:, :-tw] + ii[:-th, :-tw]
+
+
+def _ncc_full(search, templ):
+    """전체 위치에 대한 정규화 상호상관(평균 제거) 맵. 분자는 FFT 상관, 분모는 적분 영상으로 계산"""
+    th, tw = templ.shape; sh, sw = search.shape
+    t = templ - templ.mean(); t_norm = float(np.sqrt((t * t).sum()))
+    n = th * tw
+    fh, fw = sh + th - 1, sw + tw - 1
+    corr = np.fft.irfft2(np.fft.rfft2(search, (fh, fw)) * np.fft.rfft2(t[::-1, ::-1], (fh, fw)), (fh, fw))
+    numerator = corr[th - 1:sh, tw - 1:sw]
+    s_sum = _window_sums(search, th, tw); s_sq = _window_sums(search * search, th, tw)
+    s_var = np.maximum(s_sq - s_sum * s_sum / n, 0.0)
+    if t_norm < 1e-6: # 단색 템플릿: 상관 정의 불가 -> 평균 밝기 차이 + 창 분산으로 유사도 근사
+        diff = np.abs(s_sum / n - float(templ.mean())) + np.sqrt(s_var / n)
+        return 1.0 - diff / 255.0
+    flat = s_var < FLAT_VARIANCE_FLOOR * n
+    return np.where(flat, 0.0, numerator / (np.sqrt(np.where(flat, 1.0, s_var)) * t_norm))
+
+
+def _ncc_at(search, templ, positions):
+    """지정한 (y, x) 위치들에서만 NCC 계산 (정밀 단계용)"""
+    th, tw = templ.shape
+    t = templ - templ.mean(); t_norm = float(np.sqrt((t * t).sum()))
+    patches = np.stack([search[y:y + th, x:x + tw] for y, x in positions]).reshape(len(positions), -1)
+    if t_norm < 1e-6:
+        diff = np.abs(patches.mean(axis=1) - float(templ.mean())) + patches.std(axis=1)
+        return 1.0 - diff / 255.0
+    p = patches - patches.mean(axis=1, keepdims=True)
+    p_sq = (p * p).sum(axis=1); flat = p_sq < FLAT_VARIANCE_FLOOR * th * tw
+    return np.where(flat, 0.0, (p @ t.reshape(-1)) / (np.sqrt(np.where(flat, 1.0, p_sq)) * t_norm))
+
+
+def _top_candidates(score_map, count, suppress_h, suppress_w):
+    # 최댓값을 고르고 주변을 지우는 방식의 간단한 비최대 억제
+    scores = score_map.copy(); picks = []
+    for _ in range(count):
+        idx = int(np.argmax(scores)); y, x = divmod(idx, scores.shape[1])
+        if not np.isfinite(scores[y, x]) or scores[y, x] == -np.inf: break
+        picks.append((y, x))
+        scores[max(0, y - suppress_h):y + suppress_h + 1, max(0, x - suppress_w):x + suppress_w + 1] = -np.inf
+    return picks
+
+
+def find_template(search_rgb, template, threshold=DEFAULT_MATCH_THRESHOLD):
+    """search_rgb((높이, 너비, 3) 배열)에서 template(TemplateImage)을 찾아 ((x, y) 좌상단, 점수) 반환
+    점수가 threshold 미만이거나 검색 영역이 템플릿보다 작으면 (None, 최고 점수)"""
+    search = _to_gray(search_rgb)
+    if search.shape[0] < template.height or search.shape[1] < template.width: return None, 0.0
+    levels = template.max_levels()
+    pyramid = [search]
+    for _ in range(levels): pyramid.append(_downsample(pyramid[-1]))
+
+    coarse_t = template.level(levels); coarse_s = pyramid[levels]
+    if coarse_s.shape[0] < coarse_t.shape[0] or coarse_s.shape[1] < coarse_t.shape[1]: levels = 0; coarse_t = template.gray; coarse_s = search
+    score_map = _ncc_full(coarse_s, coarse_t)
+    candidates = _top_candidates(score_map, COARSE_CANDIDATES if levels else 1, max(1, coarse_t.shape[0] // 2), max(1, coarse_t.shape[1] // 2))
+    if not levels:
+        if not candidates: return None, 0.0
+        y, x = candidates[0]; score = float(score_map[y, x])
+        return ((x, y), score) if score >= threshold else (None, score)
+
+    for level in range(levels - 1, -1, -1):
+        s, t = pyramid[level], template.level(level)
+        max_y, max_x = s.shape[0] - t.shape[0], s.shape[1] - t.shape[1]
+        refined = []
+        for cy, cx in candidates:
+            positions = [(yy, xx) for yy in range(max(0, 2 * cy - REFINE_RADIUS), min(max_y, 2 * cy + REFINE_RADIUS) + 1)
+                                  for xx in range(max(0, 2 * cx - REFINE_RADIUS), min(max_x, 2 * cx + REFINE_RADIUS) + 1)]
+            if not positions: continue
+            scores = _ncc_at(s, t, positions); best = int(np.argmax(scores))
+            refined.append((float(scores[best]), positions[best]))
+        if not refined: return None, 0.0
+        refined.sort(reverse=True)
+        candidates = [pos for _, pos in refined]
+        best_score = refined[0][0]
+    y, x = candidates[0]
+    return ((x, y), best_score) if best_score >= threshold else (None, best_score)
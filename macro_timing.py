@@ -0,0 +1,93 @@
+# macro_timing.py
+# 매크로 실행 타이밍: 액션 사이 여유 시간(패딩) 설정과, 절대 perf_counter 시간축 기준 데드라인 대기
+# 각 대기는 "지금부터 N초"가 아니라 "시작 시각 + 누적 예정 시간"까지 기다리므로 sleep 오차가 누적되지 않음
+import threading
+import time
+
+DEFAULT_TIMING_SETTINGS = {'pre_action_ms': 10, 'post_move_ms': 30, 'post_action_ms': 50, 'modifier_tap_ms': 10,
+                           'inter_action_enabled': False, 'inter_action_ms': 600}
+SPIN_THRESHOLD_S = 0.002 # 데드라인까지 이보다 적게 남으면 sleep 대신 스핀 (sleep 해상도 보정)
+
+
+class TimingProfile:
+    """매크로별 액션 패딩 (초 단위로 보관, 설정 파일에는 ms로 저장). 0이면 해당 대기 생략
+    inter_action_s는 '모든 액션 사이 딜레이' 실행 정책: 켜져 있으면 실행된 액션과 다음 액션 사이마다 기다림 (목록에 딜레이를 넣지 않음)"""
+    __slots__ = ('pre_action_s', 'post_move_s', 'post_action_s', 'modifier_tap_s', 'inter_action_enabled', 'inter_action_s')
+
+    def __init__(self, pre_action_ms=10, post_move_ms=30, post_action_ms=50, modifier_tap_ms=10, inter_action_enabled=False, inter_action_ms=600):
+        self.pre_action_s = max(0, pre_action_ms) / 1000.0      # 액션 시작 전
+        self.post_move_s = max(0, post_move_ms) / 1000.0        # 마우스 이동 후 클릭 전
+        self.post_action_s = max(0, post_action_ms) / 1000.0    # 액션 종료 후
+        self.modifier_tap_s = max(0, modifier_tap_ms) / 1000.0  # 모디파이어 단독 입력 사이
+        self.inter_action_enabled = bool(inter_action_enabled)
+        self.inter_action_s = max(0, inter_action_ms) / 1000.0  # 꺼져 있어도 길이는 보관 (다시 켤 때 그대로)
+
+    @property
+    def inter_action_wait_s(self):
+        """실행 시 액션 사이에 실제로 기다릴 시간 (정책이 꺼져 있으면 0)"""
+        return self.inter_action_s if self.inter_action_enabled else 0.0
+
+    @classmethod
+    def from_settings(cls, settings):
+        merged = dict(DEFAULT_TIMING_SETTINGS); merged.update(settings or {})
+        return cls(merged['pre_action_ms'], merged['post_move_ms'], merged['post_action_ms'], merged['modifier_tap_ms'],
+                   merged['inter_action_enabled'], merged['inter_action_ms'])
+
+    def to_settings(self):
+        return {'pre_action_ms': round(self.pre_action_s * 1000), 'post_move_ms': round(self.post_move_s * 1000),
+                'post_action_ms': round(self.post_action_s * 1000), 'modifier_tap_ms': round(self.modifier_tap_s * 1000),
+                'inter_action_enabled': self.inter_action_enabled, 'inter_action_ms': round(self.inter_action_s * 1000)}
+
+
+def fold_auto_inserted_delays(actions, timing_settings):
+    """예전 방식으로 목록에 끼워 넣은 자동 딜레이('auto_inserted' 딜레이 액션)를 빼고 액션 사이 딜레이 정책으로 바꿈
+    actions는 설정 JSON의 액션 dict 목록 (액션 객체로 바꾸기 전). (액션 dict 목록, 타이밍 설정) 반환. 자동 딜레이가 없으면 받은 객체를 그대로 반환"""
+    durations = [action.get('duration_ms', 0) for action in actions if action.get('auto_inserted') and action.get('type') == '딜레이']
+    if not durations: return actions, timing_settings
+    folded = [action for action in actions if not (action.get('auto_inserted') and action.get('type') == '딜레이')]
+    settings = dict(timing_settings or {}); settings.update(inter_action_enabled=True, inter_action_ms=durations[0])
+    return folded, settings
+
+
+class DeadlineClock:
+    """절대 시간축 기반 대기. advance(s)는 직전 데드라인 + s 시각까지 기다리고, 실제 깨어난 시각과의 차이(지터)를 기록
+    stop_event가 설정되면 대기 도중 즉시 깨어남"""
+
+    def __init__(self, stop_event=None, spin_threshold_s=SPIN_THRESHOLD_S):
+        self._stop_event = stop_event if stop_event is not None else threading.Event()
+        self.spin_threshold_s = spin_threshold_s
+        self.start_time = self.deadline = time.perf_counter()
+        self._lateness = [] # 실제로 기다린 대기들의 (깨어난 시각 - 데드라인), 초
+
+    def start(self):
+        self.start_time = self.deadline = time.perf_counter(); self._lateness = []
+
+    def rebase(self):
+        """소요 시간이 가변적인 작업(화면 검색 등) 뒤에 호출: 시간축을 현재 시각으로 다시 맞춤"""
+        now = time.perf_counter()
+        if now > self.deadline: self.deadline = now
+
+    def advance(self, seconds):
+        """시간축을 seconds만큼 진행하고 그 데드라인까지 대기. 중지 요청으로 깨어났으면 True"""
+        if seconds <= 0: return self._stop_event.is_set()
+        self.deadline += seconds
+        return self.wait_until(self.deadline)
+
+    def wait_until(self, deadline):
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0: return self._stop_event.is_set() # 이미 늦음 (앞선 작업이 예정보다 오래 걸림): 기다리지 않음
+        if remaining > self.spin_threshold_s and self._stop_event.wait(remaining - self.spin_threshold_s): return True
+        while True: # 남은 짧은 구간은 스핀으로 정밀하게 맞춤
+            now = time.perf_counter()
+            if now >= deadline: break
+            time.sleep(0) # 다른 스레드에 GIL 양보
+        self._lateness.append(now - deadline)
+        return self._stop_event.is_set()
+
+    def report(self):
+        """이번 실행의 대기 지터 요약 (ms)"""
+        samples = sorted(self._lateness); n = len(samples)
+        report = {'waits': n, 'elapsed_s': time.perf_counter() - self.start_time, 'mean_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+        if n:
+            report.update(mean_ms=sum(samples) / n * 1000, p95_ms=samples[min(n - 1, int(n * 0.95))] * 1000, max_ms=samples[-1] * 1000)
+        return report
@@ -0,0 +1,144 @@
+# macro_trace.py
+# 매크로 실행 추적: 액션별 실행 시간과 (색/이미지 찾기의) 캡처·검색·입력 단계별 시간을 기록
+# 실행(run)마다 히스토그램을 만들고 JSON/CSV로 내보냄. 훅 콜백으로 외부 프로파일러 연결 가능
+# 비활성 시 러너는 실행 시작 때 한 번만 확인하고 이후 추적 코드를 거치지 않음
+import csv
+import json
+import os
+import threading
+import time
+from collections import deque
+
+DEFAULT_TRACING_SETTINGS = {'enabled': False, 'max_runs': 20, 'output_dir': 'traces'}
+# 히스토그램 구간 상한 (ms). 마지막 구간은 그 이상 전부
+HISTOGRAM_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 10000)
+
+
+def _histogram(values_s):
+    counts = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+    for v in values_s:
+        ms = v * 1000; i = 0
+        while i < len(HISTOGRAM_BOUNDS_MS) and ms > HISTOGRAM_BOUNDS_MS[i]: i += 1
+        counts[i] += 1
+    labels = [f"<={b}ms" for b in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}ms"]
+    return {label: c for label, c in zip(labels, counts) if c}
+
+
+class ActionTrace:
+    __slots__ = ('index', 'name', 'kind', 'start_s', 'wall_s', 'phases', 'error')
+
+    def __init__(self, index, name, kind, start_s, wall_s, phases, error=None):
+        self.index = index; self.name = name; self.kind = kind # kind: 실행 연산 이름 (예: 'ColorFindOp')
+        self.start_s = start_s; self.wall_s = wall_s           # 실행 시작 기준 시작 시각, 소요 시간 (초)
+        self.phases = phases or {}                              # {'capture': 초, 'search': 초, 'inject': 초, 'input_wait': 초}
+        self.error = error
+
+    def to_dict(self):
+        return {'index': self.index, 'name': self.name, 'kind': self.kind, 'start_ms': self.start_s * 1000, 'wall_ms': self.wall_s * 1000,
+                'phases_ms': {k: v * 1000 for k, v in self.phases.items()}, 'error': self.error}
+
+
+class RunTrace:
+    """실행 1회의 추적 결과"""
+
+    def __init__(self, run_id, total_actions):
+        self.run_id = run_id; self.total_actions = total_actions
+        self.started_at = time.time(); self._t0 = time.perf_counter()
+        self.actions = []; self.completed = None; self.elapsed_s = None; self.timing = None
+
+    def offset(self, t):
+        """perf_counter 시각 t를 실행 시작 기준 경과 초로"""
+        return t - self._t0
+
+    def elapsed(self):
+        return self.offset(time.perf_counter())
+
+    def histograms(self):
+        """전체 및 연산 종류별, 단계별 소요 시간 히스토그램"""
+        by_kind = {}; by_phase = {}
+        for a in self.actions:
+            by_kind.setdefault(a.kind, []).append(a.wall_s)
+            for phase, v in a.phases.items(): by_phase.setdefault(phase, []).append(v)
+        return {'all': _histogram(a.wall_s for a in self.actions),
+                'by_kind': {k: _histogram(v) for k, v in by_kind.items()},
+                'by_phase': {k: _histogram(v) for k, v in by_phase.items()}}
+
+    def to_dict(self):
+        return {'run_id': self.run_id, 'started_at': self.started_at, 'total_actions': self.total_actions, 'completed': self.completed,
+                'elapsed_ms': self.elapsed_s * 1000 if self.elapsed_s is not None else None, 'timing': self.timing,
+                'histograms': self.histograms(), 'actions': [a.to_dict() for a in self.actions]}
+
+
+class ExecutionTracer:
+    """실행 추적기 (기본 비활성). 최근 max_runs회의 RunTrace를 보관
+    훅은 hook(event, data) 형태로 작업 스레드에서 호출됨: event는 'run_start' / 'action' / 'run_end'"""
+
+    def __init__(self, enabled=False, max_runs=20, output_dir='traces'):
+        self.enabled = bool(enabled)
+        self.output_dir = output_dir
+        self._runs = deque(maxlen=max(1, int(max_runs)))
+        self._hooks = []
+        self._lock = threading.Lock()
+        self._run_seq = 0
+
+    @classmethod
+    def from_settings(cls, settings):
+        merged = dict(DEFAULT_TRACING_SETTINGS); merged.update(settings or {})
+        return cls(merged['enabled'], merged['max_runs'], merged['output_dir'])
+
+    def to_settings(self):
+        return {'enabled': self.enabled, 'max_runs': self._runs.maxlen, 'output_dir': self.output_dir}
+
+    def add_hook(self, hook):
+        with self._lock: self._hooks.append(hook)
+
+    def remove_hook(self, hook):
+        with self._lock:
+            if hook in self._hooks: self._hooks.remove(hook)
+
+    def _emit(self, event, data):
+        with self._lock: hooks = list(self._hooks) # 훅 호출은 잠금 밖에서 (훅이 add_hook/remove_hook을 불러도 교착 없음)
+        for hook in hooks:
+            try: hook(event, data)
+            except Exception as e: print(f"[추적] 훅 오류: {type(e).__name__}: {e}")
+
+    def begin_run(self, total_actions):
+        with self._lock: self._run_seq += 1; run = RunTrace(self._run_seq, total_actions)
+        if self._hooks: self._emit('run_start', run)
+        return run
+
+    def record_action(self, run, index, name, kind, start_s, wall_s, phases, error=None):
+        trace = ActionTrace(index, name, kind, start_s, wall_s, phases, error)
+        run.actions.append(trace)
+        if self._hooks: self._emit('action', trace)
+
+    def end_run(self, run, completed, timing=None):
+        run.completed = completed; run.elapsed_s = run.elapsed(); run.timing = timing
+        with self._lock: self._runs.append(run)
+        if self._hooks: self._emit('run_end', run)
+
+    def runs(self):
+        with self._lock: return list(self._runs)
+
+    def clear(self):
+        with self._lock: self._runs.clear()
+
+    def export_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f: json.dump({'runs': [r.to_dict() for r in self.runs()]}, f, ensure_ascii=False, indent=4)
+
+    def export_csv(self, path):
+        phase_names = ('capture', 'search', 'inject', 'input_wait')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['run_id', 'index', 'name', 'kind', 'start_ms', 'wall_ms'] + [f"{p}_ms" for p in phase_names] + ['error'])
+            for run in self.runs():
+                for a in run.actions:
+                    writer.writerow([run.run_id, a.index, a.name, a.kind, f"{a.start_s * 1000:.3f}", f"{a.wall_s * 1000:.3f}"]
+                                    + [f"{a.phases[p] * 1000:.3f}" if p in a.phases else "" for p in phase_names] + [a.error or ""])
+
+    def export(self, base_dir="."):
+        """output_dir에 JSON과 CSV를 함께 저장하고 (json 경로, csv 경로) 반환"""
+        directory = os.path.join(base_dir, self.output_dir); os.makedirs(directory, exist_ok=True)
+        prefix = os.path.join(directory, f"trace_{time.strftime('%Y%m%d_%H%M%S')}")
+        self.export_json(prefix + ".json"); self.export_csv(prefix + ".csv")
+        return prefix + ".json", prefix + ".csv"